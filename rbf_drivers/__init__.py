@@ -29,6 +29,9 @@ bl_info = {
 
 from nodeitems_utils import NodeCategory, NodeItem
 from . import core, sockets, nodes
+from .app.events import batch
+from .app.frame_cache import frame_cache_register, frame_cache_unregister
+from .app.tracing import trace_export, trace_start, trace_stop
 
 
 
@@ -195,11 +198,15 @@ def register():
     for cls in CLASSES:
         register_class(cls)
     register_node_categories(core.RBFDriverNodeTreeMain.bl_idname, NODE_CATEGORIES)
+    frame_cache_register()
+    core.topology_register()
 
 
 def unregister():
     from bpy.utils import unregister_class
     from nodeitems_utils import unregister_node_categories
+    frame_cache_unregister()
+    core.topology_unregister()
     unregister_node_categories(core.RBFDriverNodeTreeMain.bl_idname)
     for cls in reversed(CLASSES):
         unregister_class(cls)
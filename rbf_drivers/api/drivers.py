@@ -3,7 +3,12 @@ from typing import Optional
 from bpy.types import PropertyGroup
 from bpy.props import CollectionProperty, IntProperty
 from rbf_drivers.api.id_properties import idprop_delete
-from .mixins import Collection, Reorderable, Searchable
+from .mixins import (Collection,
+                     Reorderable,
+                     Searchable,
+                     collection_index,
+                     collection_index_append,
+                     collection_index_remove)
 from .driver import RBFDriver, DRIVER_TYPE_TABLE
 from ..app.events import dataclass, dispatch_event, Event
 from ..lib.symmetry import symmetrical_target
@@ -17,6 +22,7 @@ class DriverNewEvent(Event):
 @dataclass(frozen=True)
 class DriverDisposableEvent(Event):
     driver: RBFDriver
+    disposes = ("driver",)
 
 
 @dataclass(frozen=True)
@@ -86,6 +92,7 @@ class RBFDrivers(Reorderable,
 
         driver = self.internal__.add()
         driver.__init__(type=type, name=name, mirror=mirror)
+        collection_index_append(self, "internal__", driver)
 
         dispatch_event(DriverNewEvent(driver))
 
@@ -98,7 +105,7 @@ class RBFDrivers(Reorderable,
             raise TypeError((f'{self.__class__.__name__}.remove(driver): '
                              f'Expected driver to be RBFDriver, not {driver.__class__.__name__}'))
 
-        index = next((index for index, item in enumerate(self) if item == driver), -1)
+        index = collection_index(self, "internal__", driver)
 
         if index == -1:
             raise ValueError((f'{self.__class__.__name__}.remove(driver): '
@@ -111,10 +118,9 @@ class RBFDrivers(Reorderable,
 
         dispatch_event(DriverDisposableEvent(driver))
 
+        collection_index_remove(self, "internal__", index)
         self.internal__.remove(index)
         self.active_index = min(self.active_index, len(self)-1)
 
         dispatch_event(DriverRemovedEvent(self, index))
 
-    def search(self, identifier: str) -> Optional[RBFDriver]:
-        return next((item for item in self if item.identifier == identifier), None)
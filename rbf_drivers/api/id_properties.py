@@ -17,6 +17,7 @@ from bpy.types import PropertyGroup
 from bpy.props import EnumProperty, FloatProperty, IntProperty, IntVectorProperty, StringProperty
 from .mixins import Identifiable
 from ..app.events import dataclass, dispatch_event, Event
+from ..app.owners import owner_resolve
 if TYPE_CHECKING:
     from bpy.types import ID
 
@@ -60,8 +61,7 @@ class PoseDataValue(PropertyGroup):
 
     @property
     def data(self) -> 'PoseDataTable':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     data_path: StringProperty(
         name="Path",
@@ -1,9 +1,15 @@
 
 from typing import TYPE_CHECKING, Dict, List, Tuple
 from bpy.types import Object, PropertyGroup
-from bpy.props import BoolProperty, EnumProperty, PointerProperty, StringProperty
+from bpy.props import (BoolProperty,
+                       EnumProperty,
+                       FloatProperty,
+                       IntProperty,
+                       PointerProperty,
+                       StringProperty)
 from .mixins import Symmetrical
 from ..app.events import dataclass, dispatch_event, Event
+from ..app.owners import owner_resolve
 if TYPE_CHECKING:
     from bpy.types import Context
     from .driver import RBFDriver
@@ -52,6 +58,13 @@ INPUT_ROTATION_AXIS_TABLE: Dict[str, int] = {
     _item[0]: _index for _index, _item in enumerate(INPUT_ROTATION_AXIS_ITEMS)
     }
 
+INPUT_RADIUS_STRATEGY_ITEMS = [
+    ('NEAREST'     , "Nearest"     , "Distance to the nearest pose"        ),
+    ('KTH_NEAREST' , "K-th Nearest", "Distance to the k-th nearest pose"   ),
+    ('MEAN_NEAREST', "Mean Nearest", "Mean distance to the k nearest poses"),
+    ('CONSTANT'    , "Constant"    , "A single radius shared by all poses" ),
+    ]
+
 INPUT_ROTATION_MODE_ITEMS = [
     ('EULER'     , "Euler"     , "Euler angles"       ),
     ('QUATERNION', "Quaternion", "Quaternion rotation"),
@@ -144,6 +157,11 @@ class InputObjectUpdateEvent(InputPropertyUpdateEvent):
     value: Object
 
 
+@dataclass(frozen=True)
+class InputRadiusStrategyUpdateEvent(InputPropertyUpdateEvent):
+    value: str
+
+
 @dataclass(frozen=True)
 class InputRotationAxisUpdateEvent(InputPropertyUpdateEvent):
     value: str
@@ -166,6 +184,11 @@ class InputUseMirrorXUpdateEvent(InputPropertyUpdateEvent):
     value: bool
 
 
+@dataclass(frozen=True)
+class InputUsePoseIndexUpdateEvent(InputPropertyUpdateEvent):
+    value: bool
+
+
 @dataclass(frozen=True)
 class InputUseSwingUpdateEvent(InputPropertyUpdateEvent):
     value: bool
@@ -206,6 +229,10 @@ def input_object_update_handler(input_: 'Input', _: 'Context') -> None:
     dispatch_event(InputObjectUpdateEvent(input_, input_.object))
 
 
+def input_radius_strategy_update_handler(input_: 'Input', _: 'Context') -> None:
+    dispatch_event(InputRadiusStrategyUpdateEvent(input_, input_.radius_strategy))
+
+
 def input_rotation_axis(input_: 'Input') -> int:
     return input_.get("rotation_axis", INPUT_ROTATION_AXIS_TABLE['Y'])
 
@@ -240,6 +267,10 @@ def input_use_mirror_x_update_handler(input: 'Input', _: 'Context') -> None:
     dispatch_event(InputUseMirrorXUpdateEvent(input, input.use_mirror_x))
 
 
+def input_use_pose_index_update_handler(input_: 'Input', _: 'Context') -> None:
+    dispatch_event(InputUsePoseIndexUpdateEvent(input_, input_.use_pose_index))
+
+
 def input_use_x_update_handler(input_: 'Input', _: 'Context') -> None:
     dispatch_event(InputUseXUpdateEvent(input_, input_.use_x))
 
@@ -271,8 +302,7 @@ class Input(Symmetrical, PropertyGroup):
 
     @property
     def driver(self) -> 'RBFDriver':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".inputs")[0])
+        return owner_resolve(self, ".inputs")
 
     name: StringProperty(
         name="Name",
@@ -304,6 +334,33 @@ class Input(Symmetrical, PropertyGroup):
         update=input_object_update_handler
         )
 
+    radius_neighbours: IntProperty(
+        name="Neighbours",
+        description="Number of nearest poses used by the k-th nearest and mean radius strategies",
+        min=1,
+        default=1,
+        options=set(),
+        update=input_radius_strategy_update_handler
+        )
+
+    radius_strategy: EnumProperty(
+        name="Radius",
+        description="How the radius of each pose is calculated",
+        items=INPUT_RADIUS_STRATEGY_ITEMS,
+        default='NEAREST',
+        options=set(),
+        update=input_radius_strategy_update_handler
+        )
+
+    radius_value: FloatProperty(
+        name="Value",
+        description="Constant pose radius (uses the mean nearest pose distance when zero)",
+        min=0.0,
+        default=0.0,
+        options=set(),
+        update=input_radius_strategy_update_handler
+        )
+
     rotation_axis: EnumProperty(
         name="Axis",
         description="The axis of rotation",
@@ -360,6 +417,15 @@ class Input(Symmetrical, PropertyGroup):
         update=input_use_mirror_x_update_handler
         )
 
+    use_pose_index: BoolProperty(
+        name="Spatial Index",
+        description=("Maintain pose radii with a spatial index rather than a dense distance matrix. "
+                     "Scales to large pose sets (nearest radius with location or quaternion input only)"),
+        default=False,
+        options=set(),
+        update=input_use_pose_index_update_handler
+        )
+
     use_x: BoolProperty(
         name="X",
         default=False,
@@ -1,10 +1,13 @@
 
-from typing import Any, Dict, Iterable, Iterator, TYPE_CHECKING
+from typing import Any, Dict, Iterable, Iterator, Optional, TYPE_CHECKING
+import numpy as np
 from numpy.linalg import norm
 from bpy.types import PropertyGroup
 from bpy.props import CollectionProperty, FloatProperty
 from ..app.events import dataclass, throttle_event, Event
-from .mixins import BPYPropCollectionInterface, Collection
+from ..app.owners import owner_resolve
+from .interfaces import ICollection
+from .mixins import Collection, collection_foreach_get, collection_foreach_set
 if TYPE_CHECKING:
     from .input_variables import InputVariable
     from .input import Input
@@ -27,6 +30,10 @@ def input_sample_value_set(sample: 'InputSample', value: float) -> None:
     throttle_event(InputSampleUpdateEvent(sample, value), timespan=0.2)
 
 
+def input_sample_value_update(sample: 'InputSample', _) -> None:
+    throttle_event(InputSampleUpdateEvent(sample, sample.value), timespan=0.2)
+
+
 class InputSample(PropertyGroup):
 
     angle: FloatProperty(
@@ -52,21 +59,18 @@ class InputSample(PropertyGroup):
 
     @property
     def input(self) -> 'Input':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".variables")[0])
+        return owner_resolve(self, ".variables")
 
     value: FloatProperty(
         name="Value",
         description="Input sample value",
-        get=input_sample_value,
-        set=input_sample_value_set,
+        update=input_sample_value_update,
         options=set()
         )
 
     @property
     def variable(self) -> 'InputVariable':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".data")[0])
+        return owner_resolve(self, ".data")
 
     def __init__(self, **properties: Dict[str, Any]) -> None:
         for key, value in properties.items():
@@ -92,29 +96,28 @@ class InputData(Collection[InputSample], PropertyGroup):
 
     @property
     def input(self) -> 'Input':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".variables")[0])
+        return owner_resolve(self, ".variables")
 
     @property
     def norm(self) -> float:
-        return norm(tuple(self.values()))
+        return norm(self.to_array())
 
     @property
     def variable(self) -> 'InputVariable':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     def __init__(self, data: Iterable[float]) -> None:
-        samples: BPYPropCollectionInterface[InputSample] = self.internal__
-        samples.clear()
-        for value in data:
-            samples.add().__init__(value=value)
+        samples: ICollection[InputSample] = self.internal__
+        collection_foreach_set(samples, "value", np.fromiter(data, dtype=float), resize=True)
 
     def __str__(self) -> str:
         path: str = self.path_from_id()
         path = path.replace(".internal__", "")
         return f'{self.__class__.__name__} @ bpy.data.objects["{self.id_data.name}"].{path}'
 
+    def to_array(self, out: Optional[np.ndarray]=None) -> np.ndarray:
+        return collection_foreach_get(self.internal__, "value", out)
+
     def values(self) -> Iterator[float]:
         for item in self:
             yield item.value
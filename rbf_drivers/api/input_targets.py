@@ -270,8 +270,7 @@ class InputTarget(Symmetrical, PropertyGroup):
     @property
     def input(self) -> 'Input':
         '''The input to which this input-target belongs (read-only)'''
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".variables")[0])
+        return owner_resolve(self, ".variables")
 
     object: PointerProperty(
         name="Object",
@@ -312,8 +311,7 @@ class InputTarget(Symmetrical, PropertyGroup):
     @property
     def variable(self) -> 'InputVariable':
         '''The input-variable to which this input-target belongs (read-only)'''
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".targets")[0])
+        return owner_resolve(self, ".targets")
 
     def __str__(self) -> str:
         path: str = self.path_from_id()
@@ -335,8 +333,7 @@ class InputTargets(Searchable[InputTarget], Collection[InputTarget], PropertyGro
     @property
     def input(self) -> 'Input':
         '''The input to which the input-targets belong (read-only)'''
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".variables")[0])
+        return owner_resolve(self, ".variables")
 
     def __getitem__(self, key: Union[int, slice]) -> Union[InputTarget, List[InputTarget]]:
         return self.internal__[key]
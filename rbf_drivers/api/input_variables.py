@@ -9,10 +9,16 @@ from bpy.props import (BoolProperty,
                        PointerProperty,
                        StringProperty)
 from rbf_drivers.app.utils import name_unique
-from .mixins import Collection, Searchable, Symmetrical
+from .mixins import (Collection,
+                     Searchable,
+                     Symmetrical,
+                     collection_index,
+                     collection_index_append,
+                     collection_index_remove)
 from .input_targets import InputTargetDataPathUpdateEvent, InputTargets, INPUT_TARGET_ID_TYPE_TABLE
 from .input_data import InputData
 from ..app.events import dataclass, dispatch_event, Event
+from ..app.owners import owner_resolve
 from ..lib.transform_utils import (transform_matrix,
                                    transform_matrix_element,
                                    transform_target,
@@ -234,8 +240,7 @@ class InputVariable(Symmetrical, PropertyGroup):
         """
         Parent input (read-only)
         """
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".variables"))
+        return owner_resolve(self, ".variables")
 
     is_enabled: BoolProperty(
         name="Enabled",
@@ -345,8 +350,7 @@ class InputVariables(Searchable, Collection[InputVariable], PropertyGroup):
 
     @property
     def input(self) -> 'Input':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition("."))
+        return owner_resolve(self, ".")
 
     def __repr__(self) -> str:
         return f'{self.__class__.__name__}'
@@ -375,6 +379,7 @@ class InputVariables(Searchable, Collection[InputVariable], PropertyGroup):
         variable: InputVariable = self.internal__.add()
         variable["name"] = name
         variable.targets.internal__.add()
+        collection_index_append(self, "internal__", variable)
 
         if input.type == 'SHAPE_KEY':
             object = input.object
@@ -400,7 +405,7 @@ class InputVariables(Searchable, Collection[InputVariable], PropertyGroup):
                              f'Expected variable to be {InputVariable.__class__.__name__}, '
                              f'not {variable.__class__.__name__}'))
 
-        index = next((index for index, item in enumerate(self) if item == variable), -1)
+        index = collection_index(self, "internal__", variable)
 
         if index == -1:
             raise ValueError((f'{self.__class__.__name__}.remove(variable): '
@@ -411,5 +416,6 @@ class InputVariables(Searchable, Collection[InputVariable], PropertyGroup):
                                 f'Inputs must have at least one variable to remain operational'))
 
         dispatch_event(InputVariableDisposableEvent(variable))
+        collection_index_remove(self, "internal__", index)
         self.internal__.remove(index)
         dispatch_event(InputVariableRemovedEvent(self, index))
\ No newline at end of file
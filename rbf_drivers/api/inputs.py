@@ -1,6 +1,11 @@
 
 from typing import Optional
-from .mixins import Collection, Reorderable, Searchable
+from .mixins import (Collection,
+                     Reorderable,
+                     Searchable,
+                     collection_index,
+                     collection_index_append,
+                     collection_index_remove)
 from bpy.types import PropertyGroup
 from bpy.props import CollectionProperty, IntProperty
 from ..app.events import dataclass, dispatch_event, Event
@@ -15,6 +20,7 @@ class InputNewEvent(Event):
 @dataclass(frozen=True)
 class InputDisposableEvent(Event):
     input: Input
+    disposes = ("input",)
 
 
 @dataclass(frozen=True)
@@ -71,6 +77,7 @@ class Inputs(Reorderable, Searchable[Input], Collection[Input], PropertyGroup):
 
         input: Input = self.internal__.add()
         input["type"] = INPUT_TYPE_TABLE[type]
+        collection_index_append(self, "internal__", input)
 
         dispatch_event(InputNewEvent(input))
 
@@ -84,13 +91,14 @@ class Inputs(Reorderable, Searchable[Input], Collection[Input], PropertyGroup):
                              f'Expected input to be {Input.__name__}, '
                              f'not {input.__class__.__name__}'))
 
-        index = next((index for index, item in enumerate(self) if item == input), -1)
+        index = collection_index(self, "internal__", input)
         if index == -1:
             raise ValueError((f'{self.__class__.__name__}.remove(input): '
                              f'Input {input} not found in collection {self}'))
 
         dispatch_event(InputDisposableEvent(input))
 
+        collection_index_remove(self, "internal__", index)
         self.internal__.remove(index)
         self.active_index = min(self.active_index, len(self)-1)
 
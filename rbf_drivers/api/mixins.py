@@ -1,16 +1,21 @@
 
 from typing import (
     Any,
+    Dict,
     Generic,
+    Hashable,
     Iterable,
     Iterator,
     List,
     Optional,
+    Sequence,
     Tuple,
     Union
     )
 from uuid import uuid4
+import numpy as np
 from .interfaces import ICollection, TPropertyGroup
+from ..app.owners import owner_cache_clear
 from bpy.types import PropertyGroup
 from bpy.props import StringProperty
 
@@ -51,7 +56,7 @@ class Collection(Generic[TPropertyGroup]):
 
     def index(self, item: TPropertyGroup) -> int:
         '''Return the index of an item in a collection, raising a ValueError when not found.'''
-        index = next((index for index, member in enumerate(self) if member == item), -1)
+        index = collection_index(self, "internal__", item)
         if index == -1:
             raise ValueError((f'{self.__class__.__name__}.index(item): '
                               f'item is not a member of this collection'))
@@ -66,6 +71,146 @@ class Collection(Generic[TPropertyGroup]):
         return self.internal__.items()
 
 
+#region Index Maps
+#--------------------------------------------------------------------------------------------------
+# Finding a member's index in a collection property otherwise means scanning the collection. Each
+# map is keyed by the collection's owner and property name and maps member keys (identifiers
+# where members have them, otherwise pointers) to indices. Maps are updated by the operations
+# that reorder collections, and every lookup checks the member found at the mapped index, so a
+# map left stale by an operation that bypasses them (undo, or a reallocation moving pointers) is
+# rebuilt on first use rather than giving a wrong answer.
+
+_index_maps: Dict[Tuple[int, str], Dict[Hashable, int]] = {}
+
+
+def collection_member_key(member: PropertyGroup) -> Hashable:
+    return member.identifier if isinstance(member, Identifiable) else member.as_pointer()
+
+
+def collection_index(owner: PropertyGroup, name: str, member: PropertyGroup) -> int:
+    '''Returns the index of member in the collection property name of owner, or -1'''
+    collection: ICollection = getattr(owner, name)
+    key = collection_member_key(member)
+    mapkey = (owner.as_pointer(), name)
+    indices = _index_maps.get(mapkey)
+    if indices is not None:
+        index = indices.get(key, -1)
+        if 0 <= index < len(collection) and collection_member_key(collection[index]) == key:
+            return index
+    indices = {collection_member_key(item): index for index, item in enumerate(collection)}
+    _index_maps[mapkey] = indices
+    return indices.get(key, -1)
+
+
+def collection_search(owner: PropertyGroup, name: str, identifier: str) -> Optional[PropertyGroup]:
+    '''
+    Returns the member of the collection property name of owner with identifier, or None. Members
+    must be identifiable. A miss rebuilds the map, so costs as much as a scan.
+    '''
+    collection: ICollection = getattr(owner, name)
+    mapkey = (owner.as_pointer(), name)
+    indices = _index_maps.get(mapkey)
+    if indices is not None:
+        index = indices.get(identifier, -1)
+        if 0 <= index < len(collection):
+            member = collection[index]
+            if member.identifier == identifier:
+                return member
+    indices = {collection_member_key(item): index for index, item in enumerate(collection)}
+    _index_maps[mapkey] = indices
+    index = indices.get(identifier, -1)
+    return collection[index] if index != -1 else None
+
+
+def collection_index_invalidate(owner: PropertyGroup, name: str) -> None:
+    owner_cache_clear()
+    _index_maps.pop((owner.as_pointer(), name), None)
+
+
+def collection_index_append(owner: PropertyGroup, name: str, member: PropertyGroup) -> None:
+    '''Records member, just added to the end of the collection'''
+    owner_cache_clear()
+    indices = _index_maps.get((owner.as_pointer(), name))
+    if indices is not None:
+        key = collection_member_key(member)
+        if isinstance(key, str):
+            indices[key] = len(getattr(owner, name)) - 1
+        else:
+            # Adding may reallocate the collection, moving the other members
+            collection_index_invalidate(owner, name)
+
+
+def collection_index_remove(owner: PropertyGroup, name: str, index: int) -> None:
+    '''Updates the map for the removal of the member at index. Call before removing it.'''
+    owner_cache_clear()
+    mapkey = (owner.as_pointer(), name)
+    indices = _index_maps.get(mapkey)
+    if indices is not None:
+        key = collection_member_key(getattr(owner, name)[index])
+        if not isinstance(key, str):
+            del _index_maps[mapkey]
+            return
+        indices.pop(key, None)
+        for item, value in indices.items():
+            if value > index:
+                indices[item] = value - 1
+
+
+def collection_index_move(owner: PropertyGroup, name: str, from_index: int, to_index: int) -> None:
+    '''Updates the map for a completed move, re-reading the members between the two indices'''
+    owner_cache_clear()
+    indices = _index_maps.get((owner.as_pointer(), name))
+    if indices is not None:
+        collection: ICollection = getattr(owner, name)
+        for index in range(min(from_index, to_index), max(from_index, to_index) + 1):
+            indices[collection_member_key(collection[index])] = index
+
+
+def collection_indices_clear() -> None:
+    _index_maps.clear()
+
+#endregion Index Maps
+
+
+def collection_resize(collection: ICollection, count: int) -> None:
+    '''Adds or removes trailing members so that collection has count members.'''
+    owner_cache_clear()
+    size = len(collection)
+    while size > count:
+        size -= 1
+        collection.remove(size)
+    while size < count:
+        collection.add()
+        size += 1
+
+
+def collection_foreach_get(collection: ICollection,
+                           key: str,
+                           out: Optional[np.ndarray]=None) -> np.ndarray:
+    '''
+    Reads the float property key of every member of collection into out (allocated when None)
+    with a single foreach_get call. out must be contiguous.
+    '''
+    if out is None:
+        out = np.empty(len(collection), dtype=float)
+    collection.foreach_get(key, out.reshape(-1))
+    return out
+
+
+def collection_foreach_set(collection: ICollection,
+                           key: str,
+                           data: Union[Sequence[float], np.ndarray],
+                           resize: Optional[bool]=False) -> None:
+    '''
+    Writes data to the float property key of every member of collection with a single
+    foreach_set call, optionally resizing the collection to match first.
+    '''
+    data = np.ascontiguousarray(data, dtype=float).reshape(-1)
+    if resize:
+        collection_resize(collection, len(data))
+    collection.foreach_set(key, data)
+
+
 class Reorderable(Collection[TPropertyGroup]):
 
     def move(self, from_index: int, to_index: int) -> None:
@@ -87,6 +232,7 @@ class Reorderable(Collection[TPropertyGroup]):
                               f'to_index {to_index} out of range 0-{len(self)-1}'))
 
         self.internal__.move(from_index, to_index)
+        collection_index_move(self, "internal__", from_index, to_index)
 
 
 class Searchable(Generic[TPropertyGroup]):
@@ -97,7 +243,7 @@ class Searchable(Generic[TPropertyGroup]):
             raise TypeError((f'{self.__class__.__name__}.search(identifier): '
                              f'Expected identifer to be str, not {identifier.__class__.__name__}'))
 
-        return next((item for item in self if item.identifier == identifier), None)
+        return collection_search(self, "internal__", identifier)
 
 
 def identifier(pgroup: 'Identifiable') -> str:
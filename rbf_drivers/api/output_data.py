@@ -1,9 +1,12 @@
 
-from typing import Any, Dict, Iterable, Iterator, Tuple, Union, TYPE_CHECKING
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union, TYPE_CHECKING
+import numpy as np
 from bpy.types import PropertyGroup
 from bpy.props import CollectionProperty, FloatProperty, StringProperty
 from ..app.events import dataclass, dispatch_event, Event
-from .mixins import BPYPropCollectionInterface, Collection
+from ..app.owners import owner_resolve
+from .interfaces import ICollection
+from .mixins import Collection, collection_foreach_get, collection_foreach_set
 if TYPE_CHECKING:
     from .outputs import Output
 
@@ -33,6 +36,10 @@ def output_sample_value_set(sample: 'OutputSample', value: float) -> None:
     dispatch_event(OutputSampleUpdateEvent(sample, value))
 
 
+def output_sample_value_update(sample: 'OutputSample', _) -> None:
+    dispatch_event(OutputSampleUpdateEvent(sample, sample.value))
+
+
 class OutputSample(PropertyGroup):
 
     angle: FloatProperty(
@@ -54,14 +61,12 @@ class OutputSample(PropertyGroup):
 
     @property
     def output(self) -> 'Output':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".channels")[0])
+        return owner_resolve(self, ".channels")
 
     value: FloatProperty(
         name="Value",
         description="The output channel data sample value",
-        get=output_sample_value,
-        set=output_sample_value_set,
+        update=output_sample_value_update,
         options=set()
         )
 
@@ -89,10 +94,12 @@ class OutputData(Collection[OutputSample], PropertyGroup):
         )
 
     def __init__(self, items: Iterable[Tuple[str, float]]) -> None:
-        samples: BPYPropCollectionInterface = self.internal__
-        samples.clear()
-        for name, value in items:
-            samples.add().__init__(name=name, value=value)
+        samples: ICollection[OutputSample] = self.internal__
+        items = tuple(items)
+        names, values = zip(*items) if items else ((), ())
+        collection_foreach_set(samples, "value", values, resize=True)
+        for sample, name in zip(samples, names):
+            sample["name"] = name
 
     def __str__(self) -> str:
         path: str = self.path_from_id()
@@ -103,6 +110,9 @@ class OutputData(Collection[OutputSample], PropertyGroup):
         # TODO error checking
         return self[key].value
 
+    def to_array(self, out: Optional[np.ndarray]=None) -> np.ndarray:
+        return collection_foreach_get(self.internal__, "value", out)
+
     def values(self) -> Iterator[float]:
         for item in self:
             yield item.value
@@ -18,11 +18,15 @@ from .mixins import (
     Searchable,
     Symmetrical,
     IDPropertyController,
-    IDPropertyQuaternionController
+    IDPropertyQuaternionController,
+    collection_index,
+    collection_index_append,
+    collection_index_remove
     )
 from .property_target import RBFDriverPropertyTarget
 from .output_channels import RBFDriverOutputChannels
 from ..app.events import dataclass, dispatch_event, Event
+from ..app.owners import owner_resolve
 if TYPE_CHECKING:
     from bpy.types import Context, ID
 
@@ -35,40 +39,35 @@ class LogarithmicSum(IDPropertyController, PropertyGroup):
 
     @property
     def output(self) -> 'Output':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
 
 class Magnitude(IDPropertyController, PropertyGroup):
 
     @property
     def output(self) -> 'Output':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
 
 class Sine(IDPropertyController, PropertyGroup):
 
     @property
     def output(self) -> 'Output':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
 
 class Exponent(IDPropertyController, PropertyGroup):
 
     @property
     def output(self) -> 'Output':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
 
 class ExponentialMap(IDPropertyQuaternionController, PropertyGroup):
 
     @property
     def output(self) -> 'Output':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
 
 #endregion
@@ -619,6 +618,7 @@ class RBFDriverOutputs(Reorderable, Searchable[Output], Collection[Output], Prop
 
         output: Output = self.internal__.add()
         output["type"] = OUTPUT_TYPE_TABLE[type]
+        collection_index_append(self, "internal__", output)
 
         dispatch_event(OutputNewEvent(output))
 
@@ -632,13 +632,14 @@ class RBFDriverOutputs(Reorderable, Searchable[Output], Collection[Output], Prop
                              f'Expected input to be {Output.__name__}, '
                              f'not {output.__class__.__name__}'))
 
-        index = next((index for index, item in enumerate(self) if item == output), -1)
+        index = collection_index(self, "internal__", output)
 
         if index == -1:
             raise ValueError((f'{self.__class__.__name__}.remove(output): '
                               f'{output} not found in {self}'))
 
         dispatch_event(OutputDisposableEvent(output))
+        collection_index_remove(self, "internal__", index)
         self.internal__.remove(index)
         dispatch_event(OutputRemovedEvent(output, index))
 
@@ -3,6 +3,7 @@ from typing import Iterator, List, Optional, Sequence, Tuple, Union, TYPE_CHECKI
 from bpy.types import PropertyGroup
 from bpy.props import CollectionProperty, EnumProperty, FloatProperty, StringProperty
 from ..app.events import dataclass, dispatch_event, Event
+from ..app.owners import owner_resolve
 from .input import Input
 from .outputs import Output
 if TYPE_CHECKING:
@@ -38,8 +39,7 @@ class PoseDataComponent(PropertyGroup):
 
     @property
     def data(self) -> 'PoseDataContainer':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     default_value: FloatProperty(
         name="Default",
@@ -49,8 +49,7 @@ class PoseDataComponent(PropertyGroup):
 
     @property
     def pose(self) -> 'Pose':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".data")[0])
+        return owner_resolve(self, ".data")
 
     type: EnumProperty(
         items=POSE_DATA_COMPONENT_TYPE_ITEMS,
@@ -1,12 +1,19 @@
 
-from operator import attrgetter
 from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple, Union
 import numpy as np
 from bpy.types import PropertyGroup
 from bpy.props import CollectionProperty, FloatProperty, IntVectorProperty, StringProperty
 from idprop.types import IDPropertyArray
 from rbf_drivers.api.interfaces import ICollection
-from .mixins import Collection, Identifiable
+from ..app.idprop import idprop_assign, idprop_view
+from ..app.owners import owner_resolve
+from .mixins import (Collection,
+                     Identifiable,
+                     collection_foreach_get,
+                     collection_foreach_set,
+                     collection_index,
+                     collection_index_invalidate,
+                     collection_index_remove)
 if TYPE_CHECKING:
     from bpy.types import Driver, FCurve, ID
 
@@ -16,7 +23,7 @@ if TYPE_CHECKING:
 def pose_data_component_index(component: 'PoseDataComponent',
                               container: Optional['PoseDataContainer']=None) -> int:
     if container is None: container = component.data
-    return next(i for i, x in container.items__internal__ if x == component)
+    return collection_index(container, "items__internal__", component)
 
 
 def pose_data_component_value(component: 'PoseDataComponent') -> float:
@@ -25,7 +32,7 @@ def pose_data_component_value(component: 'PoseDataComponent') -> float:
         try:
             value = component.id.path_resolve(component.value_path)
         except ValueError: pass
-    return value if isinstance(value, float) else component.get("value", 0.0)
+    return value if isinstance(value, float) else component.value__internal__
 
 
 class PoseDataComponent(PropertyGroup):
@@ -40,8 +47,7 @@ class PoseDataComponent(PropertyGroup):
 
     @property
     def data(self) -> 'PoseDataContainer':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     @property
     def id_type(self) -> Optional[str]:
@@ -69,6 +75,10 @@ class PoseDataComponent(PropertyGroup):
         options=set()
         )
 
+    value__internal__: FloatProperty(
+        options={'HIDDEN'}
+        )
+
     @property
     def value_path(self) -> str:
         data = self.data
@@ -107,8 +117,7 @@ class PoseDataContainer(PropertyGroup):
 
     @property
     def data_group(self) -> 'PoseDataGroup':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     @property
     def data_path(self) -> str:
@@ -173,15 +182,19 @@ class PoseDataGroup(Collection[PoseDataContainer], PropertyGroup):
 #region Utilities
 #--------------------------------------------------------------------------------------------------
 
-def pose_data_container_to_array(container: PoseDataContainer) -> np.ndarray:
+def pose_data_container_to_array(container: PoseDataContainer,
+                                 out: Optional[np.ndarray]=None) -> np.ndarray:
     items: ICollection[PoseDataComponent] = container.items__internal__
+    count = len(items)
+    if out is None:
+        out = np.empty(count, dtype=float)
     if container.is_id_property:
         value = container.id.get(container.id_property_name)
-        count = len(items)
         if isinstance(value, IDPropertyArray) and len(value) == count:
-            return np.array(value, dtype=float).reshape(container.shape)
-    array = np.empty(count, dtype=np.float)
-    items.foreach_get("value", array)
+            np.copyto(out, idprop_view(value).reshape(out.shape))
+            return out.reshape(container.shape)
+    collection_foreach_get(items, "value__internal__", out)
+    return out.reshape(container.shape)
 
 
 # def pose_data_container_create(group: PoseDataGroup,
@@ -242,6 +255,7 @@ def pose_data_container_remove(container: PoseDataContainer,
         fcurve = pose_data_component_fcurve(component)
         if fcurve:
             fcurve.id_data.animation_data.drivers.remove(fcurve)
+    collection_index_remove(container, "items__internal__", index)
     container.items__internal__.remove(index)
 
 
@@ -256,28 +270,22 @@ def pose_data_container_update(container: PoseDataContainer,
                                             Tuple[Tuple[int, slice], Sequence[float]],
                                             Tuple[Tuple[slice, int], float],
                                             Tuple[Tuple[slice, slice], Sequence[float]]]) -> None:
-    items = container.items__internal__
+    items: ICollection[PoseDataComponent] = container.items__internal__
     if not args:
         if container.is_id_property:
-            container.id[container.id_property_name] = list(map(attrgetter("value"), items))
+            idprop_assign(container.id,
+                          container.id_property_name,
+                          collection_foreach_get(items, "value__internal__"))
     elif len(args) == 1:
         array = np.asarray(args[0], dtype=float)
         shape = array.shape
-        items: ICollection[PoseDataComponent] = container.items__internal__
-        if len(items):
-            count = array.size
-            while len(items) < count: items.add()
-            while len(items) > count: items.remove(-1)
-        else:
-            for _ in range(array.size):
-                items.add()
-        container.shape__internal__ = (shape[0], shape[1] if len(shape) else -1)
-        data = array.flatten()
-        items.foreach_set("value", data)
-        # for item, value in zip(items, array.flat):
-        #     item["value"] = value
+        data = array.reshape(-1)
+        if len(items) != len(data):
+            collection_index_invalidate(container, "items__internal__")
+        collection_foreach_set(items, "value__internal__", data, resize=True)
+        container.shape__internal__ = (shape[0], shape[1] if len(shape) > 1 else -1)
         if container.is_id_property:
-            container.id[container.id_property_name] = data
+            idprop_assign(container.id, container.id_property_name, data)
     else:
         array = pose_data_container_to_array(container)
         array[args[0]] = args[1]
@@ -10,6 +10,7 @@ from bpy.props import (
     PointerProperty
     )
 from ..app.events import dataclass, dispatch_event, Event
+from ..app.owners import owner_resolve
 from .interfaces import ICollection
 from .mixins import Collection, Identifiable
 if TYPE_CHECKING:
@@ -222,8 +223,7 @@ class PoseInterpolationPoint(PropertyGroup):
 
     @property
     def pose(self) -> 'Pose':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".interpolation")[0])
+        return owner_resolve(self, ".interpolation")
 
     select: BoolProperty(
         name="Select",
@@ -258,8 +258,7 @@ class PoseInterpolationPoints(Collection[PoseInterpolationPoint], PropertyGroup)
 
     @property
     def pose(self) -> 'Pose':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".interpolation")[0])
+        return owner_resolve(self, ".interpolation")
 
     def __init__(self, data: Iterable[CurvePointInterface]) -> None:
         points: ICollection[PoseInterpolationPoint] = self.internal__
@@ -451,8 +450,7 @@ class PoseInterpolation(Identifiable, PropertyGroup):
 
     @property
     def pose(self) -> 'Pose':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".interpolation")[0])
+        return owner_resolve(self, ".interpolation")
 
     def __init__(self,
                  points: Optional[Sequence[CurvePointInterface]]=None,
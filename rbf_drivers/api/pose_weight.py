@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 from bpy.types import PropertyGroup
 from bpy.props import PointerProperty
 from .mixins import IDPropertyController
+from ..app.owners import owner_resolve
 if TYPE_CHECKING:
     from .poses import Pose
 
@@ -15,13 +16,11 @@ class PoseWeightNormalized(IDPropertyController, PropertyGroup):
 
     @property
     def pose(self) -> 'Pose':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".weight")[0])
+        return owner_resolve(self, ".weight")
 
     @property
     def weight(self) -> 'PoseWeight':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     def __init__(self, pose: 'Pose') -> None:
         key = f'rbf_pose_{pose.identifier}_weight_normalized'
@@ -39,8 +38,7 @@ class PoseWeight(IDPropertyController, PropertyGroup):
 
     @property
     def pose(self) -> 'Pose':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".weight")[0])
+        return owner_resolve(self, ".weight")
 
     def __init__(self, pose: 'Pose') -> None:
         super().__init__(f'rbf_poseweight_{pose.identifier}', True)
@@ -11,9 +11,17 @@ from bpy.props import (
     )
 from rbf_drivers.api.interfaces import ICollection
 from .pose_interpolation import PoseInterpolation
-from .mixins import Collection, Reorderable, Searchable, Symmetrical, IDPropertyController
+from .mixins import (Collection,
+                     Reorderable,
+                     Searchable,
+                     Symmetrical,
+                     IDPropertyController,
+                     collection_index,
+                     collection_index_append,
+                     collection_index_remove)
 from ..app.events import dataclass, dispatch_event, event_handler, Event
 from ..app.utils import name_unique
+from ..app.owners import owner_resolve
 from .input import InputRotationAxisUpdateEvent, InputRotationModeUpdateEvent
 from .pose_data import PoseData
 if TYPE_CHECKING:
@@ -27,8 +35,7 @@ class PoseInfluence(IDPropertyController, PropertyGroup):
 
     @property
     def pose(self) -> 'Pose':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     def __init__(self, pose: 'Pose') -> None:
         super().__init__(f'rbf_pose_{pose.identifier}_influence', True, min=0.0, soft_max=1.0)
@@ -68,12 +75,11 @@ class Pose(Symmetrical, PropertyGroup):
 
     @property
     def driver(self) -> 'RBFDriver':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".poses")[0])
+        return owner_resolve(self, ".poses")
 
     @property
     def index(self) -> int:
-        return self.driver.poses.index(self)
+        return collection_index(self.driver.poses, "internal__", self)
 
     input_samples: PointerProperty(
         type=PoseData
@@ -133,8 +139,7 @@ class SummedPoseWeights(IDPropertyController, PropertyGroup):
 
     @property
     def poses(self) -> 'Poses':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     def __init__(self, poses: 'Poses') -> None:
         key = f'rbf_{poses.driver.identifier}_summed_pose_weights'
@@ -211,8 +216,7 @@ class Poses(Reorderable, Searchable[Pose], Collection[Pose], PropertyGroup):
 
     @property
     def driver(self) -> 'RBFDriver':
-        path: str = self.path_from_id()
-        return self.id_data.path_resolve(path.rpartition(".")[0])
+        return owner_resolve(self, ".")
 
     normalize_weights: BoolProperty(
         name="Normalized",
@@ -251,6 +255,7 @@ class Poses(Reorderable, Searchable[Pose], Collection[Pose], PropertyGroup):
 
         pose: Pose = self.internal__.add()
         pose.__init__(name)
+        collection_index_append(self, "internal__", pose)
 
         for input in pose.driver.inputs:
             variable: 'InputVariable'
@@ -268,7 +273,7 @@ class Poses(Reorderable, Searchable[Pose], Collection[Pose], PropertyGroup):
             raise TypeError((f'{self.__class__.__name__}.remove(pose): '
                              f'Expected pose to be Pose, not {pose.__class__.__name__}'))
 
-        index = next((index for index, item in enumerate(self) if item == pose), -1)
+        index = collection_index(self, "internal__", pose)
         if index == -1:
             raise ValueError((f'{self.__class__.__name__}.remove(pose): '
                              f'pose is not a member of this collection'))
@@ -283,6 +288,7 @@ class Poses(Reorderable, Searchable[Pose], Collection[Pose], PropertyGroup):
 
         dispatch_event(PoseDisposableEvent(pose))
 
+        collection_index_remove(self, "internal__", index)
         self.internal__.remove(index)
         self.active_index = min(self.active_index, len(self) - 1)
 
@@ -0,0 +1,502 @@
+from functools import partial
+from math import sqrt
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence, Tuple
+import numpy as np
+from .idprop import idprop_view
+if TYPE_CHECKING:
+    from ..api.input import Input
+
+DistanceKernel = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+#region Kernels
+#--------------------------------------------------------------------------------------------------
+# Each kernel takes an (N, D) and an (M, D) sample array and returns the (N, M) matrix of
+# pairwise distances. The formulae match the scripted driver expressions used for pose
+# weights so that radii calculated here agree with the values evaluated by Blender.
+
+def cdist_euclidean(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Accumulate per column rather than broadcasting (N, M, D) so memory stays O(N*M)
+    result = np.zeros((len(a), len(b)), dtype=float)
+    for col_a, col_b in zip(a.T, b.T):
+        delta = np.subtract.outer(col_a, col_b)
+        np.multiply(delta, delta, out=delta)
+        result += delta
+    return np.sqrt(result, out=result)
+
+
+def cdist_angle(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    result = np.abs(np.subtract.outer(a[:, 0], b[:, 0]))
+    result /= np.pi
+    return result
+
+
+def cdist_quaternion(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    dot = np.clip(a @ b.T, -1.0, 1.0)
+    np.multiply(dot, dot, out=dot)
+    dot *= 2.0
+    dot -= 1.0
+    result = np.arccos(np.clip(dot, -1.0, 1.0, out=dot), out=dot)
+    result /= np.pi
+    return result
+
+
+def swing_axis(data: np.ndarray, axis: str) -> np.ndarray:
+    '''
+    Returns the (N, 3) array of the rotated X, Y or Z axis vectors for an (N, 4) array of
+    WXYZ quaternions.
+    '''
+    w, x, y, z = data.T
+    if axis == 'X':
+        vectors = (1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y + w * z), 2.0 * (x * z - w * y))
+    elif axis == 'Y':
+        vectors = (2.0 * (x * y - w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z + w * x))
+    else:
+        vectors = (2.0 * (x * z + w * y), 2.0 * (y * z - w * x), 1.0 - 2.0 * (x * x + y * y))
+    return np.stack(vectors, axis=-1)
+
+
+def cdist_direction(a: np.ndarray, b: np.ndarray, axis: Optional[str]='Y') -> np.ndarray:
+    dot = swing_axis(a, axis) @ swing_axis(b, axis).T
+    result = np.arcsin(np.clip(dot, -1.0, 1.0, out=dot), out=dot)
+    result += np.pi / 2.0
+    result /= np.pi
+    return result
+
+
+KERNELS: Dict[str, DistanceKernel] = {
+    'EUCLIDEAN' : cdist_euclidean,
+    'ANGLE'     : cdist_angle,
+    'QUATERNION': cdist_quaternion,
+    'DIRECTION' : cdist_direction,
+    }
+
+#endregion Kernels
+
+#region Utilities
+#--------------------------------------------------------------------------------------------------
+
+def distance_kernel(metric: str, axis: Optional[str]=None) -> DistanceKernel:
+    if metric.startswith('SWING_'):
+        metric, axis = 'DIRECTION', metric[-1]
+    kernel = KERNELS.get(metric)
+    if kernel is None:
+        raise ValueError(f'Unknown distance metric "{metric}"')
+    if metric == 'DIRECTION':
+        kernel = partial(kernel, axis=axis or 'Y')
+    return kernel
+
+
+def input_distance_metric(input_: 'Input') -> Tuple[str, Optional[str]]:
+    if input_.type == 'ROTATION':
+        mode = input_.rotation_mode
+        if mode == 'QUATERNION': return 'QUATERNION', None
+        if mode == 'SWING'     : return 'DIRECTION', input_.rotation_axis
+        if mode == 'TWIST'     : return 'ANGLE', None
+    return 'EUCLIDEAN', None
+
+
+def cdist(a: np.ndarray,
+          b: np.ndarray,
+          metric: Optional[str]='EUCLIDEAN',
+          axis: Optional[str]=None) -> np.ndarray:
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if a.shape[-1] == 0:
+        return np.zeros((len(a), len(b)), dtype=float)
+    return distance_kernel(metric, axis)(a, b)
+
+
+def distance_matrix(data: np.ndarray,
+                    metric: Optional[str]='EUCLIDEAN',
+                    axis: Optional[str]=None) -> np.ndarray:
+    '''
+    Returns the symmetric (N, N) distance matrix for an (N, D) array of samples
+    '''
+    data = np.asarray(data, dtype=float)
+    return cdist(data, data, metric, axis)
+
+#endregion Utilities
+
+#region Condensed Storage
+#--------------------------------------------------------------------------------------------------
+# Distance matrices are symmetric so only the strict upper triangle is persisted, row by row,
+# as N*(N-1)/2 floats. The diagonal is implied (zero).
+
+def condensed_size(count: int) -> int:
+    return count * (count - 1) // 2
+
+
+def condensed_count(size: int) -> int:
+    # Note that an empty array is taken to be a single pose (the rest pose always exists)
+    count = int(round((1.0 + sqrt(1.0 + 8.0 * size)) / 2.0))
+    if condensed_size(count) != size:
+        raise ValueError(f'{size} is not a valid condensed distance matrix length')
+    return count
+
+
+def condensed_index(count: int, i: int, j: int) -> int:
+    if i > j:
+        i, j = j, i
+    return count * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+def condense(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=float)
+    return matrix[np.triu_indices(len(matrix), 1)]
+
+
+def squareform(condensed: np.ndarray,
+               count: Optional[int]=None,
+               diagonal: Optional[float]=0.0) -> np.ndarray:
+    condensed = np.asarray(condensed, dtype=float)
+    if count is None:
+        count = condensed_count(len(condensed))
+    matrix = np.empty((count, count), dtype=float)
+    rows, cols = np.triu_indices(count, 1)
+    matrix[rows, cols] = condensed
+    matrix[cols, rows] = condensed
+    np.fill_diagonal(matrix, diagonal)
+    return matrix
+
+
+class CondensedDistanceMatrix:
+    '''
+    Read access to a distance matrix stored in condensed form (e.g. in an IDPropertyArray)
+    '''
+
+    def __init__(self, data: Sequence[float]) -> None:
+        self._data = data
+        self._count = condensed_count(len(data))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._count, self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key: Tuple[int, int]) -> float:
+        count = self._count
+        i, j = key
+        if i < 0: i += count
+        if j < 0: j += count
+        if not (0 <= i < count and 0 <= j < count):
+            raise IndexError(f'{self.__class__.__name__}[{key}] index out of range')
+        return 0.0 if i == j else self._data[condensed_index(count, i, j)]
+
+    def view(self) -> np.ndarray:
+        '''The condensed values as a NumPy array (zero-copy where possible)'''
+        return idprop_view(self._data)
+
+    def row(self, index: int) -> np.ndarray:
+        count = self._count
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f'{self.__class__.__name__}.row({index}) index out of range')
+        other = np.arange(count)
+        lo = np.minimum(other, index)
+        hi = np.maximum(other, index)
+        keys = count * lo - lo * (lo + 1) // 2 + (hi - lo - 1)
+        keys[index] = 0
+        result = self.view()[keys] if count > 1 else np.zeros(count, dtype=float)
+        result[index] = 0.0
+        return result
+
+    def to_array(self, diagonal: Optional[float]=0.0) -> np.ndarray:
+        return squareform(self.view(), self._count, diagonal)
+
+#endregion Condensed Storage
+
+#region DistanceMatrix
+#--------------------------------------------------------------------------------------------------
+
+def as_samples(data: np.ndarray) -> np.ndarray:
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 2:
+        return data
+    return data.reshape(len(data), -1) if data.size else np.empty((len(data), 0), dtype=float)
+
+
+class DistanceMatrix:
+    '''
+    Incrementally maintained (N, N) distance matrix over an (N, D) array of samples.
+
+    Inserting, deleting or editing a sample only evaluates the distance kernel for the
+    affected row/column. Each edit returns a boolean mask flagging the samples whose nearest
+    non-coincident neighbour distance (i.e. pose radius) may have changed. Storage is
+    over-allocated so that appending samples does not reallocate on every call.
+    '''
+
+    def __init__(self,
+                 data: Optional[np.ndarray]=(),
+                 metric: Optional[str]='EUCLIDEAN',
+                 axis: Optional[str]=None,
+                 tolerance: Optional[float]=0.001) -> None:
+        self.tolerance = tolerance
+        self._metric = metric
+        self._axis = axis
+        self._kernel = distance_kernel(metric, axis)
+        self.reset(data)
+
+    @property
+    def array(self) -> np.ndarray:
+        '''The (N, N) distance matrix (a view of the internal buffer)'''
+        size = self._size
+        return self._matrix[:size, :size]
+
+    @property
+    def axis(self) -> Optional[str]:
+        return self._axis
+
+    @property
+    def data(self) -> np.ndarray:
+        '''The (N, D) samples (a view of the internal buffer)'''
+        return self._samples[:self._size]
+
+    @property
+    def metric(self) -> str:
+        return self._metric
+
+    @property
+    def nearest(self) -> np.ndarray:
+        '''Distance from each sample to its nearest non-coincident sample or 0.0 where none'''
+        nearest = self._nearest[:self._size]
+        return np.where(np.isinf(nearest), 0.0, nearest)
+
+    @property
+    def nearest_raw(self) -> np.ndarray:
+        '''As nearest but with inf where a sample has no non-coincident neighbour'''
+        return self._nearest[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _distances(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        if a.shape[-1] == 0:
+            return np.zeros((len(a), len(b)), dtype=float)
+        return self._kernel(a, b)
+
+    def _candidates(self, distances: np.ndarray) -> np.ndarray:
+        return np.where(distances > self.tolerance, distances, np.inf)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._matrix)
+        if size > capacity:
+            capacity = max(size, capacity * 2, 8)
+            count = self._size
+            samples = np.empty((capacity, self._samples.shape[1]), dtype=float)
+            samples[:count] = self._samples[:count]
+            matrix = np.empty((capacity, capacity), dtype=float)
+            matrix[:count, :count] = self._matrix[:count, :count]
+            nearest = np.empty(capacity, dtype=float)
+            nearest[:count] = self._nearest[:count]
+            self._samples = samples
+            self._matrix = matrix
+            self._nearest = nearest
+
+    def _sample(self, sample: np.ndarray) -> np.ndarray:
+        sample = np.asarray(sample, dtype=float).reshape(-1)
+        if len(sample) != self._samples.shape[1]:
+            raise ValueError((f'{self.__class__.__name__}: '
+                              f'Expected sample of length {self._samples.shape[1]}, not {len(sample)}'))
+        return sample
+
+    def _index(self, index: int, limit: int) -> int:
+        if index < 0:
+            index += limit
+        if not 0 <= index < limit:
+            raise IndexError(f'{self.__class__.__name__}: index {index} out of range 0-{limit-1}')
+        return index
+
+    def reset(self,
+              data: np.ndarray,
+              metric: Optional[str]=None,
+              axis: Optional[str]=None) -> np.ndarray:
+        '''Rebuilds the matrix from data, returning a mask with every sample flagged'''
+        if metric is not None:
+            self._kernel = distance_kernel(metric, axis)
+            self._metric = metric
+            self._axis = axis
+        data = as_samples(data)
+        count = self._allocate(data)
+        matrix = self._matrix[:count, :count]
+        matrix[...] = self._distances(data, data)
+        self._nearest[:count] = self._candidates(matrix).min(axis=1, initial=np.inf)
+        return np.ones(count, dtype=bool)
+
+    def _allocate(self, data: np.ndarray) -> int:
+        count = len(data)
+        self._size = 0
+        self._samples = np.empty((0, data.shape[1]), dtype=float)
+        self._matrix = np.empty((0, 0), dtype=float)
+        self._nearest = np.empty(0, dtype=float)
+        self._reserve(count)
+        self._size = count
+        self._samples[:count] = data
+        return count
+
+    @classmethod
+    def restore(cls,
+                data: np.ndarray,
+                matrix: np.ndarray,
+                nearest: np.ndarray,
+                metric: Optional[str]='EUCLIDEAN',
+                axis: Optional[str]=None,
+                tolerance: Optional[float]=0.001) -> 'DistanceMatrix':
+        '''
+        Recreates a matrix from previously calculated samples, (N, N) distances and nearest
+        distances (see nearest_raw) without evaluating the distance kernel
+        '''
+        result = cls.__new__(cls)
+        result.tolerance = tolerance
+        result._metric = metric
+        result._axis = axis
+        result._kernel = distance_kernel(metric, axis)
+        count = result._allocate(as_samples(data))
+        result._matrix[:count, :count] = matrix
+        result._nearest[:count] = nearest
+        return result
+
+    def insert(self, index: int, sample: np.ndarray) -> np.ndarray:
+        '''Inserts a sample before index (O(N·D) kernel evaluations)'''
+        sample = self._sample(sample)
+        count = self._size
+        index = self._index(index, count + 1)
+        self._reserve(count + 1)
+
+        samples = self._samples
+        matrix = self._matrix
+        nearest = self._nearest
+
+        if index < count:
+            samples[index+1:count+1] = samples[index:count]
+            matrix[index+1:count+1, :count] = matrix[index:count, :count]
+            matrix[:count+1, index+1:count+1] = matrix[:count+1, index:count]
+            nearest[index+1:count+1] = nearest[index:count]
+
+        count += 1
+        self._size = count
+        samples[index] = sample
+
+        row = self._distances(sample[np.newaxis], samples[:count])[0]
+        matrix[index, :count] = row
+        matrix[:count, index] = row
+
+        candidates = self._candidates(row)
+        nearest = nearest[:count]
+        mask = candidates < nearest
+        np.minimum(nearest, candidates, out=nearest)
+        nearest[index] = candidates.min()
+        mask[index] = True
+        return mask
+
+    def append(self, sample: np.ndarray) -> np.ndarray:
+        '''Appends a sample (amortized O(N·D))'''
+        return self.insert(self._size, sample)
+
+    def delete(self, index: int) -> np.ndarray:
+        '''Deletes the sample at index, returning the mask for the remaining samples'''
+        count = self._size
+        index = self._index(index, count)
+
+        samples = self._samples
+        matrix = self._matrix
+        nearest = self._nearest
+
+        removed = np.delete(matrix[:count, index], index)
+
+        samples[index:count-1] = samples[index+1:count]
+        matrix[index:count-1, :count] = matrix[index+1:count, :count]
+        matrix[:count-1, index:count-1] = matrix[:count-1, index+1:count]
+        nearest[index:count-1] = nearest[index+1:count]
+
+        count -= 1
+        self._size = count
+
+        nearest = nearest[:count]
+        mask = (removed > self.tolerance) & (removed <= nearest)
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            nearest[rows] = self._candidates(matrix[rows, :count]).min(axis=1, initial=np.inf)
+        return mask
+
+    def update(self, index: int, sample: np.ndarray) -> np.ndarray:
+        '''Replaces the sample at index, refreshing only its row/column'''
+        sample = self._sample(sample)
+        count = self._size
+        index = self._index(index, count)
+
+        samples = self._samples
+        matrix = self._matrix
+        nearest = self._nearest[:count]
+
+        previous = matrix[:count, index].copy()
+        samples[index] = sample
+
+        row = self._distances(sample[np.newaxis], samples[:count])[0]
+        matrix[index, :count] = row
+        matrix[:count, index] = row
+
+        candidates = self._candidates(row)
+        shrunk = candidates < nearest
+        grown = (previous > self.tolerance) & (previous <= nearest) & (candidates > previous)
+        np.minimum(nearest, candidates, out=nearest)
+
+        rows = np.flatnonzero(grown & ~shrunk)
+        if len(rows):
+            nearest[rows] = self._candidates(matrix[rows, :count]).min(axis=1, initial=np.inf)
+
+        nearest[index] = candidates.min()
+        mask = shrunk | grown
+        mask[index] = True
+        return mask
+
+    def sync(self,
+             data: np.ndarray,
+             metric: Optional[str]=None,
+             axis: Optional[str]=None) -> np.ndarray:
+        '''
+        Brings the matrix in line with data, detecting a single insertion or deletion or a
+        small number of edited samples and falling back to a full rebuild otherwise.
+        '''
+        data = as_samples(data)
+
+        if metric is not None and (metric, axis) != (self._metric, self._axis):
+            return self.reset(data, metric, axis)
+
+        if data.shape[1] != self._samples.shape[1]:
+            return self.reset(data)
+
+        count = self._size
+        cache = self._samples[:count]
+        delta = len(data) - count
+
+        if delta == 0:
+            rows = np.flatnonzero(np.any(cache != data, axis=1))
+            if len(rows) * 4 > count:
+                return self.reset(data)
+            mask = np.zeros(count, dtype=bool)
+            for index in rows:
+                mask |= self.update(index, data[index])
+            return mask
+
+        if delta == 1:
+            index = first_mismatch(cache, data[:count])
+            if np.array_equal(cache[index:], data[index+1:]):
+                return self.insert(index, data[index])
+
+        elif delta == -1:
+            index = first_mismatch(cache[:-1], data)
+            if np.array_equal(cache[index+1:], data[index:]):
+                return self.delete(index)
+
+        return self.reset(data)
+
+
+def first_mismatch(a: np.ndarray, b: np.ndarray) -> int:
+    rows = np.flatnonzero(np.any(a != b, axis=1))
+    return int(rows[0]) if len(rows) else len(a)
+
+#endregion DistanceMatrix
@@ -0,0 +1,103 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from .driver_spec import DriverSpec, DriverVariableSpec, IDPropertySpec
+from .idprop import idprop_assign, idprop_delete, idprop_isarray
+from .utils import driver_ensure, driver_variables_ensure, keyframe_points_assign
+if TYPE_CHECKING:
+    from bpy.types import DriverVariable, FCurve, FModifierGenerator, ID
+
+DRIVER_TARGET_ATTRIBUTES: Dict[str, Tuple[str, ...]] = {
+    'SINGLE_PROP'  : ("id_type", "id", "data_path"),
+    'TRANSFORMS'   : ("id", "bone_target", "transform_type", "transform_space", "rotation_mode"),
+    'LOC_DIFF'     : ("id", "bone_target", "transform_space"),
+    'ROTATION_DIFF': ("id", "bone_target", "transform_space"),
+    }
+
+# Enum attributes are skipped when unset in the spec rather than assigned an invalid value
+DRIVER_TARGET_ENUMS = {"transform_type", "transform_space", "rotation_mode"}
+
+
+def drivers_remove(id_: 'ID', data_path: str, start: Optional[int]=0) -> None:
+    '''Removes the drivers on data_path with an array index of start or greater'''
+    animdata = id_.animation_data
+    if animdata is not None:
+        drivers = animdata.drivers
+        for fcurve in [fc for fc in drivers if fc.data_path == data_path and fc.array_index >= start]:
+            drivers.remove(fcurve)
+
+
+def driver_variable_spec_apply(variable: 'DriverVariable', spec: DriverVariableSpec) -> None:
+    variable.type = spec.type
+    variable.name = spec.name
+    attributes = DRIVER_TARGET_ATTRIBUTES.get(spec.type, ())
+    for target, target_spec in zip(variable.targets, spec.targets):
+        for attribute in attributes:
+            value = getattr(target_spec, attribute)
+            if value or attribute not in DRIVER_TARGET_ENUMS:
+                setattr(target, attribute, value)
+
+
+def generator_modifiers(fcurve: 'FCurve') -> List['FModifierGenerator']:
+    return [modifier for modifier in fcurve.modifiers if modifier.type == 'GENERATOR']
+
+
+def generator_spec_apply(fcurve: 'FCurve', coefficients: Tuple[float, ...]) -> None:
+    '''Makes coefficients the fcurve's only generator modifier, or removes it if empty'''
+    modifiers = generator_modifiers(fcurve)
+    if coefficients:
+        modifier = modifiers.pop(0) if modifiers else fcurve.modifiers.new('GENERATOR')
+        modifier.mode = 'POLYNOMIAL'
+        modifier.use_additive = False
+        modifier.poly_order = len(coefficients) - 1
+        for index, value in enumerate(coefficients):
+            modifier.coefficients[index] = value
+    for modifier in modifiers:
+        fcurve.modifiers.remove(modifier)
+
+
+def driver_spec_apply(spec: DriverSpec) -> 'FCurve':
+    fcurve = driver_ensure(spec.id, spec.data_path, spec.array_index)
+    if spec.mute is not None:
+        fcurve.mute = spec.mute
+
+    driver = fcurve.driver
+    driver.type = spec.type
+    if spec.type == 'SCRIPTED':
+        driver.expression = spec.expression
+
+    variables = driver_variables_ensure(driver.variables, len(spec.variables))
+    for variable, variable_spec in zip(variables, spec.variables):
+        driver_variable_spec_apply(variable, variable_spec)
+
+    if spec.keyframes:
+        keyframe_points_assign(fcurve.keyframe_points, spec.keyframes)
+
+    generator_spec_apply(fcurve, spec.generator)
+    return fcurve
+
+
+def idprop_spec_ensure(spec: IDPropertySpec) -> bool:
+    '''Creates or resizes the ID property for spec, returning True if it was written to'''
+    id_ = spec.id
+    name = spec.name
+    if spec.size is None:
+        if spec.value:
+            id_[name] = float(spec.value[0])
+            return True
+        if not isinstance(id_.get(name), float):
+            id_[name] = 0.0
+            return True
+        return False
+    if spec.value:
+        idprop_assign(id_, name, spec.value)
+        return True
+    prop = id_.get(name)
+    if not idprop_isarray(prop) or len(prop) != spec.size:
+        id_[name] = [0.0] * spec.size
+        return True
+    return False
+
+
+def idprop_spec_remove(spec: IDPropertySpec) -> None:
+    drivers_remove(spec.id, spec.data_path)
+    idprop_delete(spec.id, spec.name)
+
@@ -0,0 +1,74 @@
+'''
+Reports whether the scripted drivers on an ID are evaluated natively by Blender.
+'''
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+from .simple_expression import expression_issues, expression_simplify
+if TYPE_CHECKING:
+    from bpy.types import FCurve, ID
+
+
+@dataclass(frozen=True)
+class DriverCheck:
+    id: str
+    data_path: str
+    array_index: int
+    expression: str
+    issues: Tuple[str, ...] = ()
+    # Blender's own verdict, when available
+    is_simple_expression: Optional[bool] = None
+    # True if the expression was rewritten by the check
+    rewritten: bool = False
+
+    @property
+    def is_simple(self) -> bool:
+        if self.is_simple_expression is not None:
+            return self.is_simple_expression
+        return len(self.issues) == 0
+
+    def __str__(self) -> str:
+        status = "pass" if self.is_simple else "fail"
+        path = f'{self.id}: {self.data_path}[{self.array_index}]'
+        if self.issues:
+            return f'{status} {path} "{self.expression}" ({"; ".join(self.issues)})'
+        return f'{status} {path} "{self.expression}"'
+
+
+def driver_check(fcurve: 'FCurve', rewrite: Optional[bool]=False) -> DriverCheck:
+    '''
+    Checks the expression of a scripted driver, optionally rewriting it into an equivalent simple
+    form if it is not one.
+    '''
+    driver = fcurve.driver
+    names = [variable.name for variable in driver.variables]
+    expression = driver.expression
+    issues = expression_issues(expression, names)
+    rewritten = False
+
+    if rewrite and issues:
+        simplified = expression_simplify(expression, names)
+        if simplified != expression:
+            driver.expression = expression = simplified
+            issues = expression_issues(expression, names)
+            rewritten = True
+
+    return DriverCheck(fcurve.id_data.name,
+                       fcurve.data_path,
+                       fcurve.array_index,
+                       expression,
+                       tuple(issues),
+                       getattr(driver, "is_simple_expression", None),
+                       rewritten)
+
+
+def drivers_check(ids: Iterable['ID'], rewrite: Optional[bool]=False) -> List[DriverCheck]:
+    '''Checks the scripted drivers of each ID in ids'''
+    result = []
+    for id_ in ids:
+        animdata = getattr(id_, "animation_data", None)
+        if animdata is not None:
+            for fcurve in animdata.drivers:
+                if fcurve.driver.type == 'SCRIPTED':
+                    result.append(driver_check(fcurve, rewrite))
+    return result
@@ -0,0 +1,119 @@
+'''
+Plain-data description of the drivers maintained for an RBF driver.
+
+Spec generation reads addon data and returns these records without touching Blender's
+animation data, so specs can be built, cached, compared and benchmarked without bpy. The
+applier in .driver_applier writes them to Blender.
+'''
+
+from dataclasses import dataclass, replace
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+Keyframe = Tuple[Tuple[float, float], Tuple[float, float], Tuple[float, float]]
+
+#region Records
+#--------------------------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class DriverTargetSpec:
+    id_type: str = 'OBJECT'
+    id: Any = None
+    data_path: str = ""
+    bone_target: str = ""
+    transform_type: str = ""
+    transform_space: str = ""
+    rotation_mode: str = ""
+
+
+@dataclass(frozen=True)
+class DriverVariableSpec:
+    name: str
+    type: str = 'SINGLE_PROP'
+    targets: Tuple[DriverTargetSpec, ...] = ()
+
+
+@dataclass(frozen=True)
+class DriverSpec:
+    id: Any
+    data_path: str
+    array_index: Optional[int] = None
+    type: str = 'SCRIPTED'
+    expression: str = ""
+    variables: Tuple[DriverVariableSpec, ...] = ()
+    # (co, handle_left, handle_right) for each bezier keyframe point. Left empty to leave the
+    # fcurve's keyframe points as they are.
+    keyframes: Tuple[Keyframe, ...] = ()
+    # Polynomial coefficients (lowest order first) of a generator modifier replacing the
+    # driver's value. Only meaningful for fcurves without keyframes. Empty for no modifier.
+    generator: Tuple[float, ...] = ()
+    # None leaves the fcurve's mute state as it is
+    mute: Optional[bool] = None
+
+    @property
+    def key(self) -> Tuple[Any, str, int]:
+        '''Identifies the fcurve the spec is written to, keyed as Blender reports fcurves'''
+        # Blender reports the fcurve of a non-array property with array_index 0
+        return (self.id, self.data_path, self.array_index or 0)
+
+    @property
+    def path(self) -> str:
+        '''The data path of the driven value, for use as a driver variable target'''
+        if self.array_index is None:
+            return self.data_path
+        return f'{self.data_path}[{self.array_index}]'
+
+
+@dataclass(frozen=True)
+class IDPropertySpec:
+    id: Any
+    name: str
+    # None for a float property, otherwise the length of a float array property
+    size: Optional[int] = None
+    # Values to assign. When empty, existing values are kept if the property already has the
+    # right size and zero filled otherwise.
+    value: Tuple[float, ...] = ()
+
+    @property
+    def data_path(self) -> str:
+        return f'["{self.name}"]'
+
+
+@dataclass(frozen=True)
+class DriverSpecSet:
+    properties: Tuple[IDPropertySpec, ...] = ()
+    drivers: Tuple[DriverSpec, ...] = ()
+    # ID properties that must not exist, removed together with their drivers
+    removed: Tuple[IDPropertySpec, ...] = ()
+
+    def __add__(self, other: 'DriverSpecSet') -> 'DriverSpecSet':
+        return DriverSpecSet(self.properties + other.properties,
+                             self.drivers + other.drivers,
+                             self.removed + other.removed)
+
+    def __iter__(self) -> Iterator[DriverSpec]:
+        return iter(self.drivers)
+
+    def __len__(self) -> int:
+        return len(self.drivers)
+
+#endregion Records
+
+#region Utilities
+#--------------------------------------------------------------------------------------------------
+
+def single_prop_variable(name: str, id_type: str, id: Any, data_path: str) -> DriverVariableSpec:
+    return DriverVariableSpec(name, 'SINGLE_PROP', (DriverTargetSpec(id_type, id, data_path),))
+
+
+def driver_spec_extend(spec: DriverSpec,
+                       variables: Sequence[DriverVariableSpec]=(),
+                       **fields: Any) -> DriverSpec:
+    '''Returns a copy of spec with variables appended and fields replaced'''
+    return replace(spec, variables=spec.variables + tuple(variables), **fields)
+
+
+def keyframes_from_bezier(bezier: Iterable[Sequence[Sequence[float]]]) -> Tuple[Keyframe, ...]:
+    '''Converts the output of utils.to_bezier into hashable keyframe records'''
+    return tuple(tuple((float(point[0]), float(point[1])) for point in item) for item in bezier)
+
+#endregion Utilities
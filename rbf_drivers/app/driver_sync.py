@@ -0,0 +1,198 @@
+'''
+Synchronizes Blender's drivers with a DriverSpecSet by editing only what differs.
+
+The applier in .driver_applier rewrites every fcurve it is given, which marks the depsgraph
+relations as dirty even when nothing changed. The synchronizer reads the existing drivers on the
+data paths the spec set writes, compares them field by field with the specs and only creates,
+edits or removes the fcurves that differ. Fcurves are only removed from the paths of the ID
+properties the spec set declares, which it owns outright.
+'''
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple
+from .driver_applier import (DRIVER_TARGET_ATTRIBUTES,
+                             DRIVER_TARGET_ENUMS,
+                             driver_spec_apply,
+                             driver_variable_spec_apply,
+                             generator_modifiers,
+                             generator_spec_apply,
+                             idprop_spec_ensure)
+from .driver_spec import DriverSpec, DriverSpecSet, DriverVariableSpec, Keyframe
+from .idprop import idprop_delete
+from .utils import driver_variables_ensure, keyframe_points_assign
+if TYPE_CHECKING:
+    from bpy.types import DriverVariable, FCurve, FCurveKeyframePoints, ID
+
+DriverKey = Tuple[Any, str, int]
+
+# Keyframe coordinates are stored as single precision floats
+KEYFRAME_TOLERANCE = 1e-5
+
+
+@dataclass
+class DriverSyncReport:
+    created: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.created or self.updated or self.removed)
+
+    def __add__(self, other: 'DriverSyncReport') -> 'DriverSyncReport':
+        return DriverSyncReport(self.created + other.created,
+                                self.updated + other.updated,
+                                self.removed + other.removed,
+                                self.unchanged + other.unchanged)
+
+    def __str__(self) -> str:
+        return (f'{self.created} created, {self.updated} updated, '
+                f'{self.removed} removed, {self.unchanged} unchanged')
+
+#region Comparison
+#--------------------------------------------------------------------------------------------------
+
+def driver_variable_matches(variable: 'DriverVariable', spec: DriverVariableSpec) -> bool:
+    if variable.name != spec.name or variable.type != spec.type:
+        return False
+    attributes = DRIVER_TARGET_ATTRIBUTES.get(spec.type, ())
+    for target, target_spec in zip(variable.targets, spec.targets):
+        for attribute in attributes:
+            value = getattr(target_spec, attribute)
+            if (value or attribute not in DRIVER_TARGET_ENUMS) and getattr(target, attribute) != value:
+                return False
+    return True
+
+
+def keyframe_points_match(points: 'FCurveKeyframePoints',
+                          keyframes: Sequence[Keyframe],
+                          tolerance: Optional[float]=KEYFRAME_TOLERANCE) -> bool:
+    if len(points) != len(keyframes):
+        return False
+    for point, (co, hl, hr) in zip(points, keyframes):
+        for a, b in ((point.co, co), (point.handle_left, hl), (point.handle_right, hr)):
+            if abs(a[0] - b[0]) > tolerance or abs(a[1] - b[1]) > tolerance:
+                return False
+    return True
+
+
+def generator_matches(fcurve: 'FCurve',
+                      coefficients: Tuple[float, ...],
+                      tolerance: Optional[float]=KEYFRAME_TOLERANCE) -> bool:
+    modifiers = generator_modifiers(fcurve)
+    if not coefficients:
+        return not modifiers
+    if len(modifiers) != 1:
+        return False
+    modifier = modifiers[0]
+    return (modifier.mode == 'POLYNOMIAL'
+            and not modifier.use_additive
+            and modifier.poly_order == len(coefficients) - 1
+            and all(abs(a - b) <= tolerance for a, b in zip(modifier.coefficients, coefficients)))
+
+#endregion Comparison
+
+#region Synchronization
+#--------------------------------------------------------------------------------------------------
+
+def driver_spec_sync(fcurve: 'FCurve', spec: DriverSpec) -> bool:
+    '''
+    Edits the fields of an existing fcurve that differ from spec, returning True if anything was
+    written.
+    '''
+    changed = False
+
+    if spec.mute is not None and fcurve.mute != spec.mute:
+        fcurve.mute = spec.mute
+        changed = True
+
+    driver = fcurve.driver
+    if driver.type != spec.type:
+        driver.type = spec.type
+        changed = True
+
+    if spec.type == 'SCRIPTED' and driver.expression != spec.expression:
+        driver.expression = spec.expression
+        changed = True
+
+    variables = driver.variables
+    if len(variables) != len(spec.variables):
+        driver_variables_ensure(variables, len(spec.variables))
+        changed = True
+
+    for variable, variable_spec in zip(variables, spec.variables):
+        if not driver_variable_matches(variable, variable_spec):
+            driver_variable_spec_apply(variable, variable_spec)
+            changed = True
+
+    points = fcurve.keyframe_points
+    if spec.keyframes and not keyframe_points_match(points, spec.keyframes):
+        keyframe_points_assign(points, spec.keyframes)
+        changed = True
+
+    if not generator_matches(fcurve, spec.generator):
+        generator_spec_apply(fcurve, spec.generator)
+        changed = True
+
+    return changed
+
+
+def drivers_index(id_: 'ID', data_paths: Sequence[str]) -> Dict[DriverKey, 'FCurve']:
+    '''Maps the keys of the drivers on the given data paths of id_ to their fcurves'''
+    animdata = id_.animation_data
+    if animdata is None:
+        return {}
+    data_paths = set(data_paths)
+    return {
+        (id_, fcurve.data_path, fcurve.array_index): fcurve
+        for fcurve in animdata.drivers if fcurve.data_path in data_paths
+        }
+
+
+def driver_spec_set_sync(specs: DriverSpecSet) -> DriverSyncReport:
+    '''
+    Brings the drivers on the data paths owned by specs (those of its properties and removed
+    properties) into line with specs.drivers. Drivers on owned paths that are not in the spec set
+    are removed, matching drivers are left untouched and the rest are edited or created. Drivers
+    on other paths, such as the properties an output drives, are only created or edited, since
+    other spec sets or the user may drive the remaining indices of those paths.
+    '''
+    report = DriverSyncReport()
+
+    owned: Dict[Any, set] = {}
+    for spec in specs.properties + specs.removed:
+        owned.setdefault(spec.id, set()).add(spec.data_path)
+
+    paths: Dict[Any, set] = {id_: set(items) for id_, items in owned.items()}
+    for spec in specs.drivers:
+        paths.setdefault(spec.id, set()).add(spec.data_path)
+
+    existing: Dict[DriverKey, 'FCurve'] = {}
+    for id_, items in paths.items():
+        existing.update(drivers_index(id_, items))
+
+    for spec in specs.removed:
+        idprop_delete(spec.id, spec.name)
+
+    for spec in specs.properties:
+        idprop_spec_ensure(spec)
+
+    for spec in specs.drivers:
+        fcurve = existing.pop(spec.key, None)
+        if fcurve is None:
+            driver_spec_apply(spec)
+            report.created += 1
+        elif driver_spec_sync(fcurve, spec):
+            report.updated += 1
+        else:
+            report.unchanged += 1
+
+    for (id_, path, _), fcurve in existing.items():
+        if path in owned.get(id_, ()):
+            id_.animation_data.drivers.remove(fcurve)
+            report.removed += 1
+
+    return report
+
+#endregion Synchronization
@@ -1,71 +1,402 @@
-
 from collections import deque
-from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+from contextlib import contextmanager
+from typing import Any, Callable, ClassVar, Deque, Dict, Hashable, Iterator, List, Optional, Tuple, Type
 from logging import getLogger
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import time
 from bpy.app import timers
+from . import tracing
+from .owners import owner_cache
 
 log = getLogger(__name__)
 
 
 @dataclass(frozen=True)
-class Event:pass
+class Event:
+    # Names of the fields identifying what the event is about. When set, an event dispatched while
+    # an event of the same class and owner is still queued is merged into the queued one, and
+    # dispatch is deferred to the end of any open batch.
+    coalesce_by: ClassVar[Tuple[str, ...]] = ()
+    # Names of the fields holding data about to be removed from a collection. Removal frees the
+    # data and moves the later members of the collection in memory, so when such an event is
+    # dispatched the held events and pending rebuilds about the data are dropped and the others
+    # are processed while their references are still valid.
+    disposes: ClassVar[Tuple[str, ...]] = ()
+
+    def merge(self, event: 'Event') -> 'Event':
+        '''Returns the event to process in place of self and a newer queued duplicate'''
+        return event
+
+
+@dataclass
+class Batch:
+    # Number of events deferred to the end of the batch
+    deferred: int = 0
+    # Number of deferred events merged into an earlier one
+    merged: int = 0
+    # Number of rebuilds run when the batch closed
+    rebuilds: int = 0
 
 
 EventHandler = Callable[[Event], None]
-_handlers: Dict[Type[Event], List[EventHandler]] = {}
-_queue: Deque[Event] = deque()
-_throttled: Dict[Type[Event], Tuple[float, float, Event]] = {}
+
+
+@dataclass(frozen=True)
+class _Registration:
+    handler: EventHandler
+    priority: int
+    # Registration sequence number, breaking ties between equal priorities
+    order: int
+
+
+_handlers: Dict[Type[Event], List[_Registration]] = {}
+# Handlers for each dispatched event class, resolved against its MRO. Cleared on registration.
+_dispatch: Dict[Type[Event], Tuple[EventHandler, ...]] = {}
+_queue: Deque[List[Event]] = deque()
+_held: Deque[List[Event]] = deque()
+_batch: Optional[Batch] = None
+_queued: Dict[Hashable, List[Event]] = {}
+_rebuilds: Dict[Hashable, Tuple[Callable[..., None], Tuple[Any, ...]]] = {}
+_throttled: Dict[Hashable, '_Debounce'] = {}
+_timer_deadline: Optional[float] = None
 _processing_queue = False
+_rebuild_count = 0
+_registrations = 0
+
+
+@dataclass
+class _Debounce:
+    deadline: float
+    # The event to dispatch when the deadline passes, if any
+    event: Optional[Event]
 
 
 def _throttle() -> Optional[float]:
-    currtime = time.time()
-    for key, (calltime, timespan, event) in tuple(_throttled.items()):
-        if currtime - calltime > timespan:
+    '''Timer callback dispatching debounced events that are due, then sleeping until the next'''
+    global _timer_deadline
+    currtime = time.monotonic()
+    for key, item in tuple(_throttled.items()):
+        if item.deadline <= currtime:
             del _throttled[key]
-            dispatch_event(event)
+            if item.event is not None:
+                dispatch_event(item.event)
     if _throttled:
-        return 0.1
+        _timer_deadline = min(item.deadline for item in _throttled.values())
+        return max(_timer_deadline - time.monotonic(), 0.0)
+    _timer_deadline = None
+    return None
+
+
+def _throttle_schedule(deadline: float) -> None:
+    '''Ensures the timer fires no later than deadline'''
+    global _timer_deadline
+    registered = timers.is_registered(_throttle)
+    if registered and _timer_deadline is not None and _timer_deadline <= deadline:
+        return
+    if registered:
+        timers.unregister(_throttle)
+    _timer_deadline = deadline
+    timers.register(_throttle, first_interval=max(deadline - time.monotonic(), 0.0))
+
+
+def owner_key(value: Any) -> Hashable:
+    '''Identifies value (usually blender data) for use in coalescing and rebuild keys'''
+    if hasattr(value, "as_pointer"):
+        return value.as_pointer()
+    try:
+        hash(value)
+    except TypeError:
+        return id(value)
+    return value
+
+
+def _coalesce_key(event: Event) -> Optional[Hashable]:
+    fields = event.coalesce_by
+    if fields:
+        return (event.__class__,) + tuple(owner_key(getattr(event, name)) for name in fields)
+
+
+def _owner_fields(event: Event) -> Tuple[str, ...]:
+    '''Names of the fields of event giving its owner: coalesce_by, or else the first field'''
+    names = event.coalesce_by
+    if not names:
+        items = fields(event)
+        names = (items[0].name,) if items else ()
+    return names
+
+
+def owner_label(value: Any) -> str:
+    '''A short human readable description of value for traces'''
+    name = getattr(value, "name", None)
+    if isinstance(name, str):
+        return f'{value.__class__.__name__}("{name}")'
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return repr(value)
+    return value.__class__.__name__
+
+
+def event_owner_label(event: Event) -> str:
+    return ", ".join(owner_label(getattr(event, name)) for name in _owner_fields(event))
+
+
+def _callback_name(callback: Callable[..., Any]) -> str:
+    return f'{getattr(callback, "__module__", "")}.{getattr(callback, "__qualname__", repr(callback))}'
+
+
+def _dispatch_table(cls: Type[Event]) -> Tuple[EventHandler, ...]:
+    '''
+    Returns the handlers for events of class cls: those registered for cls or any of its bases,
+    each once, highest priority first and then in registration order.
+    '''
+    table = _dispatch.get(cls)
+    if table is None:
+        found: Dict[EventHandler, _Registration] = {}
+        for base in cls.__mro__:
+            for item in _handlers.get(base, ()):
+                if item.handler not in found or item.priority > found[item.handler].priority:
+                    found[item.handler] = item
+        items = sorted(found.values(), key=lambda item: (-item.priority, item.order))
+        table = _dispatch[cls] = tuple(item.handler for item in items)
+    return table
 
 
 def _process_event(event: Event) -> None:
-    handlers = _handlers.get(event.__class__)
+    handlers = _dispatch_table(event.__class__)
     if handlers:
         for handler in handlers:
+            tracer = tracing.tracer()
             try:
-                handler(event)
+                if tracer is None:
+                    handler(event)
+                else:
+                    tracer.call(_callback_name(handler),
+                                event.__class__.__name__,
+                                event_owner_label(event),
+                                handler,
+                                event)
             except Exception as error:
                 log.exception(str(error))
 
 
+def _process_rebuild() -> None:
+    global _rebuild_count
+    _rebuild_count += 1
+    key = next(iter(_rebuilds))
+    callback, args = _rebuilds.pop(key)
+    tracer = tracing.tracer()
+    try:
+        # Rebuilds walk every pose, input and output and look their owners up repeatedly
+        with owner_cache():
+            _process_rebuild_callback(tracer, callback, args)
+    except Exception as error:
+        log.exception(str(error))
+
+
+def _process_rebuild_callback(tracer: Optional[tracing.Tracer],
+                              callback: Callable[..., None],
+                              args: Tuple[Any, ...]) -> None:
+    if tracer is None:
+        callback(*args)
+    else:
+        tracer.call(_callback_name(callback),
+                    "rebuild",
+                    ", ".join(map(owner_label, args)),
+                    callback,
+                    *args)
+
+
 def _process_queue() -> None:
+    '''
+    Processes queued events until the queue is empty, then runs the pending rebuilds one at a
+    time, processing any events they dispatch before the next.
+    '''
     global _processing_queue
     _processing_queue = True
-    while len(_queue):
-        _process_event(_queue.popleft())
-    _processing_queue = False
+    try:
+        while _queue or _rebuilds:
+            while _queue:
+                entry = _queue.popleft()
+                event = entry[0]
+                key = _coalesce_key(event)
+                if key is not None and _queued.get(key) is entry:
+                    del _queued[key]
+                _process_event(event)
+            if _rebuilds and _batch is None:
+                _process_rebuild()
+            else:
+                break
+    finally:
+        _processing_queue = False
+
+
+def rebuild(key: Hashable, callback: Callable[..., None], *args: Any) -> None:
+    '''
+    Schedules callback(*args) to run once the current dispatch cycle has processed its events.
+    Rebuilds requested with the same key before then run only once, with the latest arguments,
+    so handlers can request an expensive idempotent rebuild for every event they receive.
+    '''
+    _rebuilds[key] = (callback, args)
+    if not _processing_queue and _batch is None:
+        _process_queue()
+
+
+def rebuild_cancel(key: Hashable) -> None:
+    _rebuilds.pop(key, None)
+
+
+def throttle_key(event: Event) -> Hashable:
+    '''Identifies the event class and owner that an event is debounced by'''
+    names = _owner_fields(event)
+    return (event.__class__,) + tuple(owner_key(getattr(event, name)) for name in names)
+
+
+def throttle_event(event: Event,
+                   timespan: Optional[float]=0.1,
+                   leading: Optional[bool]=False,
+                   trailing: Optional[bool]=True) -> None:
+    '''
+    Debounces event per event class and owner. Each call pushes the owner's deadline to timespan
+    seconds from now. With leading, the first event of a burst is dispatched straight away. With
+    trailing, the latest event of a burst is dispatched once the deadline passes (unless it was
+    the leading event).
+    '''
+    key = throttle_key(event)
+    deadline = time.monotonic() + timespan
+    item = _throttled.get(key)
+
+    if item is None:
+        item = _throttled[key] = _Debounce(deadline, None if leading or not trailing else event)
+        _throttle_schedule(deadline)
+        if leading:
+            dispatch_event(event)
+        return
+
+    item.deadline = deadline
+    if trailing:
+        item.event = event
+    _throttle_schedule(deadline)
+
 
+def _enqueue(queue: Deque[List[Event]], event: Event, key: Optional[Hashable]) -> bool:
+    '''Queues event, or merges it into a queued event with the same key. True if merged.'''
+    entry = _queued.get(key) if key is not None else None
+    if entry is not None:
+        entry[0] = entry[0].merge(event)
+        return True
+    entry = [event]
+    queue.append(entry)
+    if key is not None:
+        _queued[key] = entry
+    return False
 
-def throttle_event(event: Event, timespan: Optional[float]=0.1) -> None:
-    _throttled[event.__class__] = (time.time(), timespan, event)
-    if not timers.is_registered(_throttle):
-        timers.register(_throttle, first_interval=0.1)
+
+def _contains(data: Any, item: Any) -> bool:
+    '''Whether item is data or belongs to it'''
+    if not hasattr(item, "path_from_id") or item.id_data != data.id_data:
+        return False
+    path = data.path_from_id()
+    other = item.path_from_id()
+    return other == path or other.startswith((path + ".", path + "["))
+
+
+def _release_rebuilds(disposed: List[Any]) -> None:
+    '''Drops the pending rebuilds of the disposed data and runs the rest straight away'''
+    def disposes(args: Tuple[Any, ...]) -> bool:
+        return any(_contains(data, arg) for data in disposed for arg in args)
+
+    for key, (_, args) in tuple(_rebuilds.items()):
+        if disposes(args):
+            del _rebuilds[key]
+
+    # Rebuilds run here may request further rebuilds, which are checked in turn
+    while _rebuilds:
+        key = next(iter(_rebuilds))
+        if disposes(_rebuilds[key][1]):
+            del _rebuilds[key]
+        else:
+            _process_rebuild()
+
+
+def _release_held(event: Event) -> None:
+    '''
+    Drops the held events and pending rebuilds about the data event disposes and processes the
+    rest straight away, since the data is removed as soon as event has been dispatched.
+    '''
+    disposed = [getattr(event, name) for name in event.disposes]
+    entries = list(_held)
+    _held.clear()
+    for entry in entries:
+        item = entry[0]
+        key = _coalesce_key(item)
+        if _queued.get(key) is entry:
+            del _queued[key]
+        owners = [getattr(item, name) for name in item.coalesce_by]
+        if not any(_contains(data, owner) for data in disposed for owner in owners):
+            _process_event(item)
+    _release_rebuilds(disposed)
 
 
 def dispatch_event(event: Event, immediate: Optional[bool]=False) -> None:
-    if immediate:
+    if event.disposes and (_held or _rebuilds):
+        _release_held(event)
+    key = _coalesce_key(event)
+    if key is not None and _batch is not None:
+        if _enqueue(_held, event, key):
+            _batch.merged += 1
+        else:
+            _batch.deferred += 1
+    elif immediate:
         _process_event(event)
     else:
-        _queue.append(event)
+        _enqueue(_queue, event, key)
         if not _processing_queue:
             _process_queue()
 
 
-def event_handler(*types: Tuple[Type[Event]]) -> Callable[[EventHandler], EventHandler]:
+@contextmanager
+def batch() -> Iterator[Batch]:
+    '''
+    Context manager for bulk edits. Structural events (such as new or removed poses) are still
+    processed as they are dispatched, so data stays consistent inside the batch, but events
+    declaring coalesce_by (derived data updates) are held and merged, and rebuilds are collected.
+    When the outermost batch closes the held events are processed once each, followed by one run
+    of each rebuild. Nested batches join the outermost one. Removing data inside a batch releases
+    the held events early (see Event.disposes).
+    '''
+    global _batch
+    if _batch is not None:
+        yield _batch
+        return
+
+    _batch = result = Batch()
+    try:
+        yield result
+    finally:
+        _batch = None
+        _queue.extend(_held)
+        _held.clear()
+        if not _processing_queue:
+            count = _rebuild_count
+            _process_queue()
+            result.rebuilds = _rebuild_count - count
+
+
+def event_handler(*types: Tuple[Type[Event]],
+                  priority: Optional[int]=0) -> Callable[[EventHandler], EventHandler]:
+    '''
+    Registers the decorated function as a handler for events of the given classes and their
+    subclasses. Handlers with a higher priority run first, equal priorities run in registration
+    order. A handler matching an event through several classes runs once.
+    '''
     def add_event_handlers(handler: EventHandler) -> EventHandler:
         for type in types:
-            _handlers.setdefault(type, []).append(handler)
+            _handlers.setdefault(type, []).append(_Registration(handler, priority, _registration_count()))
+        _dispatch.clear()
         return handler
     return add_event_handlers
+
+
+def _registration_count() -> int:
+    global _registrations
+    _registrations += 1
+    return _registrations
@@ -0,0 +1,330 @@
+'''
+Optimization of generated driver expressions.
+
+Expressions are parsed into a Python AST, constants are folded, identity operations are removed
+and the result is unparsed in its minimal form. Subexpressions shared by several drivers (matched
+by structure and by what their variables read rather than by variable name) can be hoisted into
+drivers of their own on a shared float array ID property, so they are evaluated once per frame.
+'''
+
+import ast
+import math
+from collections import Counter
+from dataclasses import replace
+from logging import getLogger
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+from .driver_spec import DriverSpec, DriverSpecSet, DriverVariableSpec, IDPropertySpec, single_prop_variable
+from .utils import DriverVariableNameGenerator
+
+log = getLogger("rbf_drivers")
+
+
+def _clamp(value: float, lower: Optional[float]=0.0, upper: Optional[float]=1.0) -> float:
+    return min(max(value, lower), upper)
+
+
+# Functions of the driver namespace that are evaluated when all their arguments are constant
+FOLDABLE_FUNCTIONS: Dict[str, Callable[..., float]] = {
+    "acos" : math.acos,
+    "asin" : math.asin,
+    "atan" : math.atan,
+    "ceil" : math.ceil,
+    "clamp": _clamp,
+    "cos"  : math.cos,
+    "exp"  : math.exp,
+    "fabs" : math.fabs,
+    "floor": math.floor,
+    "log"  : math.log,
+    "max"  : max,
+    "min"  : min,
+    "pow"  : math.pow,
+    "sin"  : math.sin,
+    "sqrt" : math.sqrt,
+    "tan"  : math.tan,
+    }
+
+FOLDABLE_CONSTANTS: Dict[str, float] = {
+    "pi": math.pi,
+    }
+
+FOLDABLE_OPERATORS: Dict[type, Callable[[float, float], float]] = {
+    ast.Add : lambda a, b: a + b,
+    ast.Sub : lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div : lambda a, b: a / b,
+    ast.Pow : lambda a, b: a ** b,
+    }
+
+# Subexpressions with fewer operations than this are cheaper to repeat than to hoist
+HOIST_MIN_COST = 3
+
+#region Folding
+#--------------------------------------------------------------------------------------------------
+
+def _is_number(node: ast.AST) -> bool:
+    return (isinstance(node, ast.Constant)
+            and isinstance(node.value, (int, float))
+            and not isinstance(node.value, bool))
+
+
+def _is_value(node: ast.AST, value: float) -> bool:
+    return _is_number(node) and node.value == value
+
+
+def _constant(value: Any, node: ast.AST) -> ast.AST:
+    '''Returns value as a constant node or node unchanged if value is not a finite real number'''
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return node
+    return ast.copy_location(ast.Constant(value=float(value)), node)
+
+
+class ExpressionFolder(ast.NodeTransformer):
+    '''Folds constant subexpressions and removes identity operations'''
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        value = FOLDABLE_CONSTANTS.get(node.id)
+        return node if value is None else _constant(value, node)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        operand = node.operand
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.USub):
+            if _is_number(operand):
+                return _constant(-operand.value, node)
+            if isinstance(operand, ast.UnaryOp) and isinstance(operand.op, ast.USub):
+                return operand.operand
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        a, b = node.left, node.right
+        op = type(node.op)
+
+        if _is_number(a) and _is_number(b) and op in FOLDABLE_OPERATORS:
+            try:
+                return _constant(FOLDABLE_OPERATORS[op](a.value, b.value), node)
+            except (ArithmeticError, ValueError):
+                return node
+
+        # (x / c1) / c2 -> x / (c1 * c2) and (x * c1) * c2 -> x * (c1 * c2)
+        if (op is ast.Div or op is ast.Mult) and _is_number(b):
+            if isinstance(a, ast.BinOp) and type(a.op) is op and _is_number(a.right):
+                folded = _constant(a.right.value * b.value, b)
+                if folded is not b:
+                    node = ast.copy_location(ast.BinOp(left=a.left, op=node.op, right=folded), node)
+                    return self.visit_BinOp(node)
+
+        if op is ast.Add:
+            if _is_value(a, 0): return b
+            if _is_value(b, 0): return a
+        elif op is ast.Sub:
+            if _is_value(b, 0): return a
+        elif op is ast.Mult:
+            if _is_value(a, 1): return b
+            if _is_value(b, 1): return a
+        elif op is ast.Div or op is ast.Pow:
+            if _is_value(b, 1): return a
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        func = node.func
+        if not isinstance(func, ast.Name) or node.keywords:
+            return node
+
+        name = func.id
+        args = node.args
+
+        if all(map(_is_number, args)) and name in FOLDABLE_FUNCTIONS:
+            try:
+                return _constant(FOLDABLE_FUNCTIONS[name](*(arg.value for arg in args)), node)
+            except (ArithmeticError, ValueError, TypeError):
+                return node
+
+        if name == "pow" and len(args) == 2 and _is_value(args[1], 1):
+            return args[0]
+
+        return node
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.AST:
+        self.generic_visit(node)
+        if _is_number(node.test):
+            return node.body if node.test.value else node.orelse
+        return node
+
+
+def expression_optimize(expression: str) -> str:
+    '''
+    Returns expression with constant subexpressions folded and identity operations removed, or
+    expression unchanged if it can not be parsed.
+    '''
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        log.warning(f'Failed to parse driver expression "{expression}"')
+        return expression
+    return ast.unparse(ast.fix_missing_locations(ExpressionFolder().visit(tree)))
+
+
+def driver_spec_optimize(spec: DriverSpec) -> DriverSpec:
+    if spec.type != 'SCRIPTED' or not spec.expression:
+        return spec
+    expression = expression_optimize(spec.expression)
+    return spec if expression == spec.expression else replace(spec, expression=expression)
+
+
+def driver_spec_set_optimize(specs: DriverSpecSet) -> DriverSpecSet:
+    return replace(specs, drivers=tuple(map(driver_spec_optimize, specs.drivers)))
+
+#endregion Folding
+
+#region Hoisting
+#--------------------------------------------------------------------------------------------------
+
+def _variable_key(variable: DriverVariableSpec) -> Hashable:
+    return (variable.type, variable.targets)
+
+
+def _node_key(node: Any, names: Dict[str, Hashable]) -> Hashable:
+    '''A structural key for node in which variable names are replaced by what they read'''
+    if isinstance(node, ast.Name):
+        return ('var', names[node.id]) if node.id in names else ('name', node.id)
+    if isinstance(node, ast.AST):
+        return (type(node).__name__,) + tuple(_node_key(getattr(node, field, None), names) for field in node._fields)
+    if isinstance(node, list):
+        return tuple(_node_key(item, names) for item in node)
+    return node
+
+
+def _node_cost(node: ast.AST) -> int:
+    return sum(isinstance(item, (ast.BinOp, ast.UnaryOp, ast.Call, ast.Compare, ast.BoolOp, ast.IfExp))
+               for item in ast.walk(node))
+
+
+def _node_names(node: ast.AST) -> Set[str]:
+    return {item.id for item in ast.walk(node) if isinstance(item, ast.Name)}
+
+
+def _candidates(node: ast.AST, names: Dict[str, Hashable], min_cost: int) -> Set[Hashable]:
+    return {
+        _node_key(item, names) for item in ast.walk(node)
+        if isinstance(item, ast.expr)
+        and _node_names(item).intersection(names)
+        and _node_cost(item) >= min_cost
+        }
+
+
+class _Hoister(ast.NodeTransformer):
+    '''Replaces the outermost shared subexpressions of a tree with names'''
+
+    def __init__(self,
+                 names: Dict[str, Hashable],
+                 shared: Dict[Hashable, int],
+                 hoisted: Dict[int, str]) -> None:
+        self.names = names
+        self.shared = shared
+        self.hoisted = hoisted
+
+    def visit(self, node: ast.AST) -> ast.AST:
+        if isinstance(node, ast.expr) and not isinstance(node, ast.Name):
+            index = self.shared.get(_node_key(node, self.names))
+            if index is not None:
+                return ast.copy_location(ast.Name(id=self.hoisted[index], ctx=ast.Load()), node)
+        return self.generic_visit(node)
+
+
+def driver_specs_hoist(specs: Sequence[DriverSpec],
+                       id_type: str,
+                       id: Any,
+                       name: str,
+                       min_cost: Optional[int]=HOIST_MIN_COST) -> Tuple[DriverSpecSet, List[DriverSpec]]:
+    '''
+    Moves subexpressions that appear in more than one of specs into drivers on the float array ID
+    property name of id, and rewrites specs to read them. Returns the specs for the shared
+    drivers (which remove the ID property if nothing was shared) and the rewritten specs.
+    '''
+    parsed: List[Optional[Tuple[ast.Expression, Dict[str, Hashable]]]] = []
+    counts: Counter = Counter()
+
+    for spec in specs:
+        tree = None
+        if spec.type == 'SCRIPTED' and spec.expression:
+            try:
+                tree = ast.parse(spec.expression, mode='eval')
+            except SyntaxError:
+                log.warning(f'Failed to parse driver expression "{spec.expression}"')
+        if tree is None:
+            parsed.append(None)
+            continue
+        names = {variable.name: _variable_key(variable) for variable in spec.variables}
+        parsed.append((tree, names))
+        counts.update(_candidates(tree.body, names, min_cost))
+
+    shared: Dict[Hashable, int] = {key: -1 for key, count in counts.items() if count > 1}
+    if not shared:
+        return DriverSpecSet(removed=(IDPropertySpec(id, name),)), list(specs)
+
+    path = f'["{name}"]'
+    nodes: List[DriverSpec] = []
+    result: List[DriverSpec] = []
+
+    for spec, item in zip(specs, parsed):
+        if item is None:
+            result.append(spec)
+            continue
+
+        tree, names = item
+        variables = {variable.name: variable for variable in spec.variables}
+
+        # Register the outermost shared subexpressions of this tree as nodes, in order of first use
+        hoisted: Dict[int, str] = {}
+        pending = [tree.body]
+        while pending:
+            node = pending.pop()
+            key = _node_key(node, names) if isinstance(node, ast.expr) else None
+            if key in shared:
+                if shared[key] < 0:
+                    shared[key] = len(nodes)
+                    nodes.append(_node_spec(node, variables, id, path, len(nodes)))
+                hoisted[shared[key]] = ""
+            else:
+                pending.extend(reversed(list(ast.iter_child_nodes(node))))
+
+        if not hoisted:
+            result.append(spec)
+            continue
+
+        keygen = DriverVariableNameGenerator()
+        reserved = _node_names(tree.body).union(variables)
+        for index in hoisted:
+            hoisted[index] = next(key for key in keygen if key not in reserved)
+
+        tree = _Hoister(names, shared, hoisted).visit(tree)
+        used = _node_names(tree)
+
+        rewritten = [variable for variable in spec.variables if variable.name in used]
+        rewritten.extend(single_prop_variable(key, id_type, id, f'{path}[{index}]') for index, key in hoisted.items())
+
+        result.append(replace(spec,
+                              expression=ast.unparse(ast.fix_missing_locations(tree)),
+                              variables=tuple(rewritten)))
+
+    return DriverSpecSet(properties=(IDPropertySpec(id, name, len(nodes)),), drivers=tuple(nodes)), result
+
+
+def _node_spec(node: ast.expr,
+               variables: Dict[str, DriverVariableSpec],
+               id: Any,
+               path: str,
+               index: int) -> DriverSpec:
+    used = _node_names(node)
+    return DriverSpec(id,
+                      path,
+                      index,
+                      'SCRIPTED',
+                      ast.unparse(node),
+                      tuple(variable for key, variable in variables.items() if key in used))
+
+#endregion Hoisting
@@ -0,0 +1,204 @@
+'''
+Bounded cache of DataFrame instances.
+
+Data frames are keyed by frame class, owning object and owner identifier, and kept in least
+recently used order within an entry count and a memory budget (the numpy buffers they hold). The
+cache is emptied when a file is loaded or an undo step is applied, because the frames would
+otherwise describe data that no longer exists, and entries whose object has been deleted are
+dropped after the next depsgraph update. A frame's owner is refreshed from the caller on every
+lookup, and invalidation clears it so a frame that outlives its file holds no dangling RNA
+pointer.
+'''
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Hashable, Iterator, Optional, Tuple
+import numpy as np
+import bpy
+from bpy.app.handlers import persistent
+from ..api.mixins import collection_indices_clear
+from .owners import owner_cache_clear
+if TYPE_CHECKING:
+    from .utils import DataFrame
+
+log = getLogger("rbf_drivers")
+
+FRAME_CACHE_MAX_ENTRIES = 256
+
+FRAME_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# (frame class, object pointer, owner identifier)
+FrameKey = Tuple[type, int, str]
+
+
+@dataclass
+class FrameCacheStats:
+    entries: int = 0
+    nbytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+def _arrays(value: Any) -> Iterator[np.ndarray]:
+    if isinstance(value, np.ndarray):
+        yield value if value.base is None or not isinstance(value.base, np.ndarray) else value.base
+
+
+def frame_nbytes(frame: 'DataFrame') -> int:
+    '''
+    Returns the size of the numpy buffers held by frame, either directly or by the objects it
+    holds (such as a DistanceMatrix). Buffers shared between views are counted once.
+    '''
+    seen = {}
+    for value in vars(frame).values():
+        for array in _arrays(value):
+            seen[id(array)] = array.nbytes
+        if hasattr(value, "__dict__") and not isinstance(value, (type, bpy.types.bpy_struct)):
+            for item in vars(value).values():
+                for array in _arrays(item):
+                    seen[id(array)] = array.nbytes
+    return sum(seen.values())
+
+
+def frame_key(cls: type, owner: Any) -> FrameKey:
+    return (cls, owner.id_data.as_pointer(), owner.identifier)
+
+
+class FrameCache:
+    '''Least recently used cache of data frames bounded by entry count and memory'''
+
+    def __init__(self,
+                 max_entries: Optional[int]=FRAME_CACHE_MAX_ENTRIES,
+                 max_bytes: Optional[int]=FRAME_CACHE_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = FrameCacheStats()
+        self._entries: 'OrderedDict[FrameKey, Tuple[DataFrame, int]]' = OrderedDict()
+        self._object_count = -1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: FrameKey) -> Optional['DataFrame']:
+        '''
+        Returns the frame cached under key, marking it most recently used, or None. The frame's
+        memory is re-measured as frames grow in place.
+        '''
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self._entries.move_to_end(key)
+        frame, nbytes = entry
+        size = frame_nbytes(frame)
+        if size != nbytes:
+            self._entries[key] = (frame, size)
+            self.stats.nbytes += size - nbytes
+            self._evict(keep=key)
+        return frame
+
+    def put(self, key: FrameKey, frame: 'DataFrame') -> None:
+        self.discard(key)
+        size = frame_nbytes(frame)
+        self._entries[key] = (frame, size)
+        self.stats.nbytes += size
+        self.stats.entries = len(self._entries)
+        self._evict(keep=key)
+
+    def discard(self, key: FrameKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._release(entry)
+
+    def discard_owner(self, cls: type, identifier: str) -> None:
+        '''Removes the frames of class cls owned by identifier, whatever object they belong to'''
+        for key in [key for key in self._entries if key[0] is cls and key[2] == identifier]:
+            self.discard(key)
+
+    def clear(self) -> None:
+        if self._entries:
+            log.debug(f'Invalidating {len(self._entries)} cached data frame(s)')
+        for entry in self._entries.values():
+            entry[0]._owner = None
+        self._entries.clear()
+        self.stats.entries = 0
+        self.stats.nbytes = 0
+        self.stats.invalidations += 1
+        self._object_count = -1
+
+    def prune(self) -> None:
+        '''Removes the frames of objects that no longer exist. Cheap unless objects were removed.'''
+        objects = bpy.data.objects
+        count = len(objects)
+        if count == self._object_count or not self._entries:
+            self._object_count = count
+            return
+        self._object_count = count
+        pointers = {object.as_pointer() for object in objects}
+        for key in [key for key in self._entries if key[1] not in pointers]:
+            self.discard(key)
+
+    def _release(self, entry: Tuple['DataFrame', int]) -> None:
+        # The frame may still be in use by a caller so its owner is left in place. It goes once
+        # the last caller lets go of the frame.
+        self.stats.nbytes -= entry[1]
+        self.stats.entries = len(self._entries)
+
+    def _evict(self, keep: FrameKey) -> None:
+        entries = self._entries
+        while (len(entries) > 1
+               and (len(entries) > self.max_entries or self.stats.nbytes > self.max_bytes)):
+            key = next(iter(entries))
+            if key == keep:
+                break
+            self._release(entries.pop(key))
+            self.stats.evictions += 1
+
+
+frame_cache = FrameCache()
+
+#region Handlers
+#--------------------------------------------------------------------------------------------------
+
+@persistent
+def _on_file_or_undo(*_) -> None:
+    frame_cache.clear()
+    collection_indices_clear()
+    owner_cache_clear()
+
+
+@persistent
+def _on_depsgraph_update_post(*_) -> None:
+    frame_cache.prune()
+
+
+FRAME_CACHE_HANDLERS = (
+    ("load_post", _on_file_or_undo),
+    ("undo_post", _on_file_or_undo),
+    ("redo_post", _on_file_or_undo),
+    ("depsgraph_update_post", _on_depsgraph_update_post),
+    )
+
+
+def frame_cache_register() -> None:
+    for name, handler in FRAME_CACHE_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler not in handlers:
+            handlers.append(handler)
+
+
+def frame_cache_unregister() -> None:
+    for name, handler in FRAME_CACHE_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler in handlers:
+            handlers.remove(handler)
+    frame_cache.clear()
+
+#endregion Handlers
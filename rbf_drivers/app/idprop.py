@@ -14,17 +14,19 @@ def idprop_append(id_: 'ID',
                   name: str,
                   data: Union[float, Sequence[float]],
                   axis: Optional[int]=0) -> None:
+    '''
+    Appends data to the float array property name, as a column of a (rows x columns) array if
+    axis is 1.
+    '''
     prop = id_.get(name)
     if idprop_isarray(prop):
         if axis:
+            data = np.asarray(data, dtype=float).ravel()
             rows = len(data)
-            cols = len(prop) // rows
-            prop = np.array(prop.to_list()).reshape(rows, cols)
-            data = np.append(prop, np.asarray(data)[:,np.newaxis], axis=1)
-            idprop_assign(id_, name, data.flatten())
+            prop = idprop_view(prop).reshape(rows, -1)
+            idprop_assign(id_, name, np.column_stack((prop, data)))
         else:
-            data = [data] if isinstance(data, float) else list(data)
-            idprop_assign(id_, name, prop.to_list() + data)
+            idprop_assign(id_, name, np.append(idprop_view(prop), data))
     else:
         raise RuntimeError()
 
@@ -43,9 +45,7 @@ def idprop_exists(id_: 'ID', name: str, *validations: Tuple[Callable[[Any], bool
 def idprop_remove(id_: 'ID', name: str, index: int) -> None:
     prop = id_.get(name)
     if isinstance(prop, IDPropertyArray) and index < len(prop):
-        data = prop.to_list()
-        del data[index]
-        idprop_assign(id_, name, data)
+        idprop_assign(id_, name, np.delete(idprop_view(prop), index))
 
 
 def idprop_assign(id_: 'ID',
@@ -56,6 +56,82 @@ def idprop_assign(id_: 'ID',
         if isinstance(data, float):
             id_[name] = data
         else:
-            id_[name] = np.asarray(data, dtype=float).flatten()
+            data = np.asarray(data, dtype=float).ravel()
+            prop = id_.get(name)
+            if idprop_isarray(prop) and len(prop) == len(data):
+                # Write in place with a single slice assignment rather than rebuilding the
+                # property, which also leaves drivers and UI data on the array untouched
+                prop[:] = data
+            else:
+                id_[name] = data
     if options:
         id_.id_properties_ui(name).update(**options)
+
+
+def idprop_view(prop: Union[IDPropertyArray, Sequence[float]],
+                writable: Optional[bool]=False) -> Optional[np.ndarray]:
+    '''
+    Returns a NumPy array over the values of prop (an IDPropertyArray or any float sequence),
+    sharing its memory where the buffer protocol is supported and falling back to a copy
+    otherwise. With writable, returns None unless the array is a writable view of prop's memory.
+    '''
+    try:
+        view = np.asarray(memoryview(prop))
+    except TypeError:
+        if writable:
+            return None
+        return np.array(prop.to_list() if hasattr(prop, "to_list") else prop, dtype=float)
+    return view if view.flags.writeable or not writable else None
+
+
+def idprop_runs(indices: np.ndarray) -> np.ndarray:
+    '''
+    Splits sorted, distinct indices into runs of consecutive values, returning an (R, 2) array of
+    the (start, stop) positions of each run within indices
+    '''
+    if len(indices) == 0:
+        return np.empty((0, 2), dtype=int)
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    return np.column_stack((np.concatenate(([0], breaks)), np.concatenate((breaks, [len(indices)]))))
+
+
+def idprop_scatter(prop: IDPropertyArray, indices: np.ndarray, values: np.ndarray) -> None:
+    '''
+    Writes values to prop at indices. Writes go straight to the property's buffer where possible,
+    otherwise each run of consecutive indices is written with a single slice assignment, so a
+    contiguous range costs one call however long it is.
+    '''
+    indices = np.asarray(indices, dtype=int).ravel()
+    values = np.asarray(values, dtype=float).ravel()
+
+    if len(indices) == len(prop) and np.array_equal(indices, np.arange(len(prop))):
+        prop[:] = values.tolist()
+        return
+
+    view = idprop_view(prop, writable=True)
+    if view is not None:
+        view[indices] = values
+        return
+
+    order = np.argsort(indices, kind="stable")
+    indices = indices[order]
+    values = values[order]
+    for start, stop in idprop_runs(indices).tolist():
+        if stop - start == 1:
+            prop[int(indices[start])] = float(values[start])
+        else:
+            first = int(indices[start])
+            prop[first:first + stop - start] = values[start:stop].tolist()
+
+
+def idprop_gather(prop: IDPropertyArray, indices: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    '''
+    Reads prop at indices in a single call, taking the value from fallback wherever an index is
+    beyond the end of prop
+    '''
+    indices = np.asarray(indices, dtype=int)
+    result = np.array(fallback, dtype=float)
+    valid = indices < len(prop)
+    if valid.any():
+        result[valid] = idprop_view(prop)[indices[valid]]
+    return result
@@ -63,11 +63,16 @@ class InputDataInitializedEvent(Event):
 class InputDataUpdatedEvent(Event):
     input: 'Input'
     data: np.ndarray
+    coalesce_by = ("input",)
 
 
 def input_data_samples(input_: 'Input') -> np.ndarray:
     variables = tuple(filter(input_variable_is_enabled, input_.variables))
-    return np.array([tuple(v.data.values()) for v in variables], dtype=float).T
+    count = len(variables[0].data) if variables else 0
+    data = np.empty((len(variables), count), dtype=float)
+    for variable, row in zip(variables, data):
+        variable.data.to_array(out=row)
+    return data.T
 
 
 def input_data_samples_normalize(input_: 'Input', data: np.ndarray) -> np.ndarray:
@@ -1,16 +1,18 @@
 
-from typing import TYPE_CHECKING, Callable, Sequence
-from functools import partial
-from math import acos, asin, fabs, pi, sqrt
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 import numpy as np
+from . import distance
 from .events import dataclass, dispatch_event, event_handler, Event
+from .idprop import idprop_assign, idprop_delete, idprop_isarray
+from .snapshot import snapshot_delete, snapshot_restore, snapshot_write
 from .input_data_manager import InputDataInitializedEvent, InputDataUpdatedEvent
-from ..api.pose_data_ import pose_data_container_update, pose_data_group_remove
+from .spatial import input_pose_index_enabled
 from ..api.inputs import InputDisposableEvent
 if TYPE_CHECKING:
     from ..api.input import Input
 
 INPUT_DISTANCE = "pose_distance_matrix"
+INPUT_DISTANCE_SNAPSHOT = "pose_distance_snapshot"
 
 
 @dataclass
@@ -22,81 +24,111 @@ class InputDistanceMatrixInitializedEvent(Event):
 @dataclass
 class InputDistanceMatrixUpdatedEvent(Event):
     input: 'Input'
-    data: np.narray
+    data: np.ndarray
+    # Flags the poses whose radius may have changed. None when every radius is affected.
+    mask: Optional[np.ndarray]=None
 
 
-def distance_euclidean(a: Sequence[float], b: Sequence[float]) -> float:
-    return sqrt(sum(pow(ai - bi, 2.0) for ai, bi in zip(a, b)))
+_distance_matrices: Dict[str, distance.DistanceMatrix] = {}
 
 
-def distance_angle(a: Sequence[float], b: Sequence[float]) -> float:
-    return fabs(a[0]-b[0])/pi
+def distance_matrix(input_: 'Input', data: np.ndarray) -> distance.DistanceMatrix:
+    metric, axis = distance.input_distance_metric(input_)
+    matrix = distance.DistanceMatrix(data, metric, axis, input_.tolerance)
+    _distance_matrices[input_.identifier] = matrix
+    return matrix
 
 
-def distance_quaternion(a: Sequence[float], b: Sequence[float]) -> float:
-    return acos((2.0 * pow(min(max(sum(ai * bi for ai, bi in zip(a, b)), -1.0), 1.0), 2.0)) - 1.0) / pi
+def distance_matrix_restore(input_: 'Input') -> Optional[distance.DistanceMatrix]:
+    '''
+    Recreates the input's distance matrix from its persisted snapshot (for instance after the file
+    is opened) if the snapshot is still valid
+    '''
+    id_ = input_.id_data.data
+    metric, axis = distance.input_distance_metric(input_)
+    matrix = snapshot_restore(id_,
+                              input_propname_distance_snapshot(input_),
+                              id_.get(input_propname_distance(input_)),
+                              metric,
+                              axis,
+                              input_.tolerance)
+    if matrix is not None:
+        _distance_matrices[input_.identifier] = matrix
+    return matrix
 
 
-def distance_direction(a: Sequence[float], b: Sequence[float], axis: str) -> float:
-    aw, ax, ay, az = a
-    bw, bx, by, bz = b
-    if axis == 'X':
-        a = (1.0 - 2.0 * (ay * ay + az * az), 2.0 * (ax * ay + aw * az), 2.0 * (ax * az - aw * ay))
-        b = (1.0 - 2.0 * (by * by + bz * bz), 2.0 * (bx * by + bw * bz), 2.0 * (bx * bz - bw * by))
-    elif axis == 'Y':
-        a = (2.0 * (ax * ay - aw * az), 1.0 - 2.0 * (ax * ax + az * az), 2.0 * (ay * az + aw * ax))
-        b = (2.0 * (bx * by - bw * bz), 1.0 - 2.0 * (bx * bx + bz * bz), 2.0 * (by * bz + bw * bx))
-    else:
-        a = (2.0 * (ax * az + aw * ay), 2.0 * (ay * az - aw * ax), 1.0 - 2.0 * (ax * ax + ay * ay))
-        b = (2.0 * (bx * bz + bw * by), 2.0 * (by * bz - bw * bx), 1.0 - 2.0 * (bx * bx + by * by))
-    return (asin((sum(ai * bi for ai, bi in zip(a, b)))) - -(pi / 2.0)) / pi
+def distance_matrix_sync(input_: 'Input', data: np.ndarray) -> Tuple[distance.DistanceMatrix, np.ndarray]:
+    matrix = _distance_matrices.get(input_.identifier)
+    if matrix is None:
+        matrix = distance_matrix_restore(input_)
+    if matrix is None:
+        matrix = distance_matrix(input_, data)
+        return matrix, np.ones(len(matrix), dtype=bool)
+    matrix.tolerance = input_.tolerance
+    return matrix, matrix.sync(data, *distance.input_distance_metric(input_))
 
 
-def distance_function(input_: 'Input') -> Callable[[Sequence[float], Sequence[float]], float]:
-    type_ = input_.type
-    if type_ == 'ROTATION':
-        mode = input_.rotation_mode
-        if mode == 'QUATERNION': return distance_quaternion
-        if mode == 'SWING'     : return partial(distance_direction, axis=input_.rotation_axis)
-        if mode == 'TWIST'     : return distance_angle
-    return distance_euclidean
+def input_propname_distance(input_: 'Input') -> str:
+    return f'input_{input_.identifier}_{INPUT_DISTANCE}'
 
 
-def distance_matrix(input_: 'Input', data: np.ndarray) -> np.ndarray:
-    input_ = input_
-    metric = distance_function(input_)
-    matrix = np.array([metric(a, b) for a in data for b in data], dtype=float)
-    length = len(data)
-    return matrix.reshape(length, length)
+def input_propname_distance_snapshot(input_: 'Input') -> str:
+    return f'input_{input_.identifier}_{INPUT_DISTANCE_SNAPSHOT}'
 
 
-def distance_matrix_dataframe_create(input_: 'Input', data: np.ndarray) -> np.ndarray:
-    input_.parameters.internal__.add()["name"] = INPUT_DISTANCE
-    return distance_matrix_dataframe_update(input_, data)
+def input_distance_matrix_stored(input_: 'Input') -> Optional[distance.CondensedDistanceMatrix]:
+    data = input_.id_data.data.get(input_propname_distance(input_))
+    if idprop_isarray(data):
+        return distance.CondensedDistanceMatrix(data)
+
 
+def distance_matrix_store(input_: 'Input', matrix: distance.DistanceMatrix) -> None:
+    '''Stores the condensed distances for the pose weight drivers, and the snapshot of matrix'''
+    id_ = input_.id_data.data
+    condensed = distance.condense(matrix.array)
+    idprop_assign(id_, input_propname_distance(input_), condensed)
+    snapshot_write(id_, input_propname_distance_snapshot(input_), matrix, condensed)
 
-def distance_matrix_dataframe_update(input_: 'Input', data: np.ndarray) -> np.ndarray:
+
+def distance_matrix_dataframe_create(input_: 'Input', data: np.ndarray) -> np.ndarray:
     matrix = distance_matrix(input_, data)
-    pose_data_container_update(input_.parameters[INPUT_DISTANCE], matrix)
-    return matrix
+    distance_matrix_store(input_, matrix)
+    return matrix.array
+
+
+def distance_matrix_dataframe_update(input_: 'Input', data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    matrix, mask = distance_matrix_sync(input_, data)
+    distance_matrix_store(input_, matrix)
+    return matrix.array, mask
 
 
 def distance_matrix_dataframe_delete(input_: 'Input') -> None:
-    pose_data_group_remove(input_.parameters, INPUT_DISTANCE)
+    _distance_matrices.pop(input_.identifier, None)
+    idprop_delete(input_.id_data.data, input_propname_distance(input_))
+    snapshot_delete(input_.id_data.data, input_propname_distance_snapshot(input_))
 
 
 @event_handler(InputDataInitializedEvent)
 def on_input_initialized(event: InputDataInitializedEvent) -> None:
     input_ = event.input
+    if input_pose_index_enabled(input_):
+        return
     matrix = distance_matrix_dataframe_create(input_, event.data)
     dispatch_event(InputDistanceMatrixInitializedEvent(input_, matrix))
 
 
 @event_handler(InputDataUpdatedEvent)
 def on_input_data_update(event: InputDataUpdatedEvent) -> None:
+    # Pose insertion/removal and sample edits all arrive here with the full data array.
+    # The cached matrix diffs it against its own samples and only evaluates the affected
+    # rows/columns, so the radii manager can restrict its work to the flagged poses.
     input_ = event.input
-    matrix = distance_matrix_dataframe_update(input_, event.data)
-    dispatch_event(InputDistanceMatrixUpdatedEvent(input_, matrix), immediate=True)
+    if input_pose_index_enabled(input_):
+        # Radii are maintained by the input's pose index so the dense matrix isn't needed
+        distance_matrix_dataframe_delete(input_)
+        return
+    matrix, mask = distance_matrix_dataframe_update(input_, event.data)
+    dispatch_event(InputDistanceMatrixUpdatedEvent(input_, matrix, mask), immediate=True)
 
 
 @event_handler(InputDisposableEvent)
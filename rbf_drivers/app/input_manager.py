@@ -32,13 +32,7 @@ from ..api.input_targets import (
     INPUT_TARGET_ROTATION_MODE_TABLE,
     INPUT_TARGET_TRANSFORM_SPACE_TABLE,
     INPUT_TARGET_TRANSFORM_TYPE_TABLE,
-    InputTargetBoneTargetUpdateEvent,
-    InputTargetDataPathUpdateEvent,
-    InputTargetIDTypeUpdateEvent,
-    InputTargetObjectUpdateEvent,
-    InputTargetRotationModeUpdateEvent,
-    InputTargetTransformSpaceUpdateEvent,
-    InputTargetTransformTypeUpdateEvent,
+    InputTargetPropertyUpdateEvent,
     )
 from ..api.input_variables import (
     INPUT_VARIABLE_TYPE_TABLE,
@@ -59,7 +53,6 @@ from ..api.inputs import InputNewEvent
 from ..api.poses import PoseNewEvent, PoseRemovedEvent
 if TYPE_CHECKING:
     from ..api.input_data import InputSample
-    from ..api.input_targets import InputTargetPropertyUpdateEvent
     from ..api.input_variables import InputVariablePropertyUpdateEvent, InputVariable
     from ..api.input import InputPropertyUpdateEvent, Input
 
@@ -123,11 +116,13 @@ class InputInitializedEvent(Event):
 @dataclass(frozen=True)
 class InputSamplesUpdatedEvent(Event):
     input: 'Input'
+    coalesce_by = ("input",)
 
 
 @dataclass(frozen=True)
 class InputSourcesUpdatedEvent(Event):
     input: 'Input'
+    coalesce_by = ("input",)
 
 
 def input_variable_data_init(variable: 'InputVariable', pose_count: int) -> None:
@@ -281,7 +276,9 @@ def input_rotation_data_update(input_: 'Input',
     convert = ROTATION_CONVERSION_LUT[prev][mode]
     if convert:
         variables = input_.variables
-        matrix = np.array([tuple(v.data.values() for v in variables)], dtype=float)
+        matrix = np.empty((len(variables), len(variables[0].data)), dtype=float)
+        for variable, row in zip(variables, matrix):
+            variable.data.to_array(out=row)
         for vector, column in zip(matrix.T if prev != 'EULER' else matrix[1:].T,
                                 matrix.T if mode != 'EULER' else matrix[1:].T):
             column[:] = convert(vector)
@@ -297,13 +294,7 @@ def on_input_sample_update(event: InputSampleUpdateEvent) -> None:
     dispatch_event(InputSamplesUpdatedEvent(event.sample.input))
 
 
-@event_handler(InputTargetBoneTargetUpdateEvent,
-               InputTargetDataPathUpdateEvent,
-               InputTargetIDTypeUpdateEvent,
-               InputTargetObjectUpdateEvent,
-               InputTargetRotationModeUpdateEvent,
-               InputTargetTransformSpaceUpdateEvent,
-               InputTargetTransformTypeUpdateEvent)
+@event_handler(InputTargetPropertyUpdateEvent)
 def on_input_target_property_update(event: InputTargetPropertyUpdateEvent) -> None:
     dispatch_event(InputSourcesUpdatedEvent(event.target.input))
 
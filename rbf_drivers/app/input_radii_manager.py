@@ -1,12 +1,19 @@
 
-from typing import TYPE_CHECKING, Iterator, Tuple
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
 import numpy as np
 from rbf_drivers.api.pose_data_ import pose_data_container_update, pose_data_group_remove
+from . import radii
+from .distance import input_distance_metric
 from .events import dataclass, dispatch_event, event_handler, Event
+from .input_data_manager import InputDataInitializedEvent, InputDataUpdatedEvent
 from .input_distance_manager import (
     InputDistanceMatrixInitializedEvent,
     InputDistanceMatrixUpdatedEvent,
+    input_distance_matrix_stored,
     )
+from .input_manager import InputSamplesUpdatedEvent
+from .spatial import PoseIndex, input_pose_index_enabled
+from ..api.input import InputRadiusStrategyUpdateEvent, InputUsePoseIndexUpdateEvent
 from ..api.inputs import InputDisposableEvent
 if TYPE_CHECKING:
     from ..api.input import Input
@@ -27,13 +34,28 @@ class InputPoseRadiusUpdatedEvent(Event):
     value: float
 
 
-def input_pose_radii_calculate(input_: 'Input', distance_matrix: np.ndarray) -> np.ndarray:
-    matrix = np.ma.masked_values(distance_matrix, 0.0, atol=input_.tolerance)
-    result = []
-    for row in matrix:
-        row = row.compressed()
-        result.append(0.0 if len(row) else np.min(row))
-    return np.array(result, dtype=float)
+_pose_indices: Dict[str, PoseIndex] = {}
+
+
+def pose_index(input_: 'Input', data: np.ndarray) -> PoseIndex:
+    index = PoseIndex(data, input_distance_metric(input_)[0], input_.tolerance)
+    _pose_indices[input_.identifier] = index
+    return index
+
+
+def pose_index_sync(input_: 'Input', data: np.ndarray) -> Tuple[PoseIndex, np.ndarray]:
+    index = _pose_indices.get(input_.identifier)
+    if index is None:
+        index = pose_index(input_, data)
+        return index, np.ones(len(index), dtype=bool)
+    index.tolerance = input_.tolerance
+    return index, index.sync(data, input_distance_metric(input_)[0])
+
+
+def input_pose_radii_calculate(input_: 'Input',
+                               distance_matrix: np.ndarray,
+                               rows: Optional[np.ndarray]=None) -> np.ndarray:
+    return radii.input_pose_radii(input_, distance_matrix, rows, input_.tolerance)
 
 
 def input_pose_radii_dataframe_create(input_: 'Input', distance_matrix: np.ndarray) -> np.ndarray:
@@ -43,19 +65,79 @@ def input_pose_radii_dataframe_create(input_: 'Input', distance_matrix: np.ndarr
 
 
 def input_pose_radii_dataframe_update(input_: 'Input',
-                                      distance_matrix: np.ndarray) -> Iterator[Tuple[int, float]]:
+                                      distance_matrix: np.ndarray,
+                                      mask: Optional[np.ndarray]=None) -> Iterator[Tuple[int, float]]:
     container = input_.parameters[INPUT_RADII]
-    radii = input_pose_radii_calculate(input_, distance_matrix)
-    for index, (radius, component) in enumerate(zip(radii, container)):
+
+    if len(container) != len(distance_matrix):
+        values = input_pose_radii_calculate(input_, distance_matrix)
+        pose_data_container_update(container, values)
+        yield from enumerate(values)
+        return
+
+    # Only the nearest-neighbour strategy is confined to the rows flagged by the distance matrix
+    if mask is None or not radii.radius_strategy_is_local(input_.radius_strategy):
+        rows = np.arange(len(distance_matrix))
+    else:
+        rows = np.flatnonzero(mask)
+
+    values = input_pose_radii_calculate(input_, distance_matrix, rows)
+    yield from input_pose_radii_dataframe_assign(input_, rows, values)
+
+
+def input_pose_radii_dataframe_assign(input_: 'Input',
+                                      rows: np.ndarray,
+                                      values: np.ndarray) -> Iterator[Tuple[int, float]]:
+    container = input_.parameters[INPUT_RADII]
+    for index, radius in zip(rows.tolist(), values.tolist()):
+        component = container[index]
         if abs(radius - component.value) > input_.tolerance:
-            component["value"] = radius
+            component.value__internal__ = radius
             yield index, radius
 
 
+def input_pose_radii_index_create(input_: 'Input', data: np.ndarray) -> np.ndarray:
+    values = pose_index(input_, data).nearest
+    pose_data_container_update(input_.parameters[INPUT_RADII], values)
+    return values
+
+
+def input_pose_radii_index_update(input_: 'Input', data: np.ndarray) -> Iterator[Tuple[int, float]]:
+    index, mask = pose_index_sync(input_, data)
+    values = index.nearest
+    container = input_.parameters[INPUT_RADII]
+
+    if len(container) != len(values):
+        pose_data_container_update(container, values)
+        yield from enumerate(values.tolist())
+        return
+
+    rows = np.flatnonzero(mask)
+    yield from input_pose_radii_dataframe_assign(input_, rows, values[rows])
+
+
 def input_pose_radii_dataframe_delete(input_: 'Input') -> None:
+    _pose_indices.pop(input_.identifier, None)
     pose_data_group_remove(input_.parameters, INPUT_RADII)
 
 
+@event_handler(InputDataInitializedEvent)
+def on_input_data_initialized(event: InputDataInitializedEvent) -> None:
+    input_ = event.input
+    if input_pose_index_enabled(input_):
+        input_.parameters.internal__.add()["name"] = INPUT_RADII
+        radii = input_pose_radii_index_create(input_, event.data)
+        dispatch_event(InputPoseRadiiInitializedEvent(input_, radii))
+
+
+@event_handler(InputDataUpdatedEvent)
+def on_input_data_update(event: InputDataUpdatedEvent) -> None:
+    input_ = event.input
+    if input_pose_index_enabled(input_):
+        for index, value in input_pose_radii_index_update(input_, event.data):
+            dispatch_event(InputPoseRadiusUpdatedEvent(input_, index, value), immediate=True)
+
+
 @event_handler(InputDistanceMatrixInitializedEvent)
 def on_input_distance_matrix_initialized(event: InputDistanceMatrixInitializedEvent) -> None:
     input_ = event.input
@@ -67,10 +149,29 @@ def on_input_distance_matrix_initialized(event: InputDistanceMatrixInitializedEv
 @event_handler(InputDistanceMatrixUpdatedEvent)
 def on_input_distance_matrix_update(event: InputDistanceMatrixUpdatedEvent) -> None:
     input_ = event.input
-    for index, value in input_pose_radii_dataframe_update(input_, event.data):
+    _pose_indices.pop(input_.identifier, None)
+    for index, value in input_pose_radii_dataframe_update(input_, event.data, event.mask):
         dispatch_event(InputPoseRadiusUpdatedEvent(input_, index, value), immediate=True)
 
 
+@event_handler(InputRadiusStrategyUpdateEvent)
+def on_input_radius_strategy_update(event: InputRadiusStrategyUpdateEvent) -> None:
+    input_ = event.input
+    matrix = input_distance_matrix_stored(input_)
+    if matrix is None or input_pose_index_enabled(input_):
+        # Switching between the pose index and the dense distance matrix, so re-run the
+        # data pipeline to build whichever one is now required
+        dispatch_event(InputSamplesUpdatedEvent(input_), immediate=True)
+    else:
+        for index, value in input_pose_radii_dataframe_update(input_, matrix.to_array()):
+            dispatch_event(InputPoseRadiusUpdatedEvent(input_, index, value), immediate=True)
+
+
+@event_handler(InputUsePoseIndexUpdateEvent)
+def on_input_use_pose_index_update(event: InputUsePoseIndexUpdateEvent) -> None:
+    dispatch_event(InputSamplesUpdatedEvent(event.input), immediate=True)
+
+
 @event_handler(InputDisposableEvent)
 def on_input_disposable(event: InputDisposableEvent) -> None:
     input_pose_radii_dataframe_delete(event.input)
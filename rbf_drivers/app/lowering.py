@@ -0,0 +1,180 @@
+'''
+Lowers scripted driver specs to Blender's native driver types.
+
+A scripted expression that only sums, averages or takes the minimum or maximum of its variables
+(each used exactly once) is replaced by the SUM, AVERAGE, MIN or MAX driver type, which Blender
+evaluates without parsing an expression. A constant scale and offset around the reduction is
+folded into a polynomial generator modifier when the fcurve has no keyframes to remap it.
+'''
+
+import ast
+from dataclasses import replace
+from typing import List, Optional, Tuple
+from .driver_spec import DriverSpec, DriverSpecSet
+
+# Tolerance when matching a scale factor against 1/n for averages
+AVERAGE_TOLERANCE = 1e-9
+
+NATIVE_REDUCTIONS = {
+    "max": 'MAX',
+    "min": 'MIN',
+    }
+
+#region Matching
+#--------------------------------------------------------------------------------------------------
+
+def _number(node: ast.AST) -> Optional[float]:
+    if (isinstance(node, ast.Constant)
+            and isinstance(node.value, (int, float))
+            and not isinstance(node.value, bool)):
+        return float(node.value)
+    return None
+
+
+def _linear(node: ast.expr) -> Tuple[float, float, ast.expr]:
+    '''
+    Peels constant offsets and scale factors off node, returning (offset, scale, core) such that
+    node == offset + scale * core.
+    '''
+    offset = 0.0
+    scale = 1.0
+    while True:
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            scale = -scale
+            node = node.operand
+            continue
+
+        if isinstance(node, ast.BinOp):
+            a = _number(node.left)
+            b = _number(node.right)
+            op = node.op
+
+            if isinstance(op, ast.Add) and (a is None) != (b is None):
+                offset += scale * (b if a is None else a)
+                node = node.left if a is None else node.right
+                continue
+
+            if isinstance(op, ast.Sub) and (a is None) != (b is None):
+                if a is None:
+                    offset -= scale * b
+                    node = node.left
+                else:
+                    offset += scale * a
+                    scale = -scale
+                    node = node.right
+                continue
+
+            if isinstance(op, ast.Mult) and (a is None) != (b is None):
+                scale *= (b if a is None else a)
+                node = node.left if a is None else node.right
+                continue
+
+            if isinstance(op, ast.Div) and a is None and b is not None and b != 0.0:
+                scale /= b
+                node = node.left
+                continue
+
+        return offset, scale, node
+
+
+def _operands(node: ast.expr, op: type) -> Optional[List[str]]:
+    '''Variable names of a tree of op over plain names, or None if it is anything else'''
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.BinOp) and isinstance(node.op, op):
+        a = _operands(node.left, op)
+        b = _operands(node.right, op)
+        if a is not None and b is not None:
+            return a + b
+    return None
+
+
+def _call_operands(node: ast.expr, name: str) -> Optional[List[str]]:
+    '''Variable names of nested calls to name over plain names, or None if it is anything else'''
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if (isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == name
+            and node.args
+            and not node.keywords):
+        result = []
+        for arg in node.args:
+            names = _call_operands(arg, name)
+            if names is None:
+                return None
+            result.extend(names)
+        return result
+    return None
+
+
+def expression_reduction(expression: str) -> Optional[Tuple[str, List[str], float, float]]:
+    '''
+    Matches expression against a native reduction, returning the driver type, the variable names
+    it reduces and the offset and scale applied to the result, or None if there is no match.
+    '''
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        return None
+
+    offset, scale, core = _linear(tree.body)
+
+    names = _operands(core, ast.Add)
+    if names is not None:
+        type = 'SUM'
+    else:
+        for function, type in NATIVE_REDUCTIONS.items():
+            names = _call_operands(core, function)
+            if names is not None:
+                break
+        else:
+            return None
+
+    if len(set(names)) != len(names):
+        return None
+
+    if type == 'SUM' and len(names) > 1 and abs(scale * len(names) - 1.0) <= AVERAGE_TOLERANCE:
+        type = 'AVERAGE'
+        scale = 1.0
+
+    return type, names, offset, scale
+
+#endregion Matching
+
+#region Lowering
+#--------------------------------------------------------------------------------------------------
+
+def driver_spec_lower(spec: DriverSpec) -> DriverSpec:
+    '''Returns spec using a native driver type if its expression allows it, otherwise spec'''
+    if spec.type != 'SCRIPTED' or not spec.expression or spec.generator:
+        return spec
+
+    match = expression_reduction(spec.expression)
+    if match is None:
+        return spec
+
+    type, names, offset, scale = match
+    variables = {variable.name: variable for variable in spec.variables}
+    if not all(name in variables for name in names):
+        return spec
+
+    generator = ()
+    if offset != 0.0 or scale != 1.0:
+        # A generator modifier replaces the keyframed value so can only stand in for the scale
+        # and offset when there are no keyframes
+        if spec.keyframes:
+            return spec
+        generator = (offset, scale)
+
+    return replace(spec,
+                   type=type,
+                   expression="",
+                   variables=tuple(variables[name] for name in names),
+                   generator=generator)
+
+
+def driver_spec_set_lower(specs: DriverSpecSet) -> DriverSpecSet:
+    return replace(specs, drivers=tuple(map(driver_spec_lower, specs.drivers)))
+
+#endregion Lowering
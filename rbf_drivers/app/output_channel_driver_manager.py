@@ -1,18 +1,19 @@
 
-from itertools import repeat
-from math import floor
-from typing import Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING, Union
+from typing import Hashable, Iterable, Tuple, TYPE_CHECKING, Union
 from mathutils import Quaternion
 from idprop.types import IDPropertyArray
 import numpy as np
-from .events import event_handler
-from .utils import driver_variables_ensure, idprop_remove, owner_resolve
+from .driver_spec import (DriverSpec,
+                          DriverSpecSet,
+                          DriverVariableSpec,
+                          IDPropertySpec,
+                          single_prop_variable)
+from .driver_sync import driver_spec_set_sync
+from .events import event_handler, owner_key, rebuild, rebuild_cancel
+from .reduction import reduction_tree_specs
+from .utils import idprop_remove, owner_resolve
 from ..lib.rotation_utils import quaternion_to_logarithmic_map
-from ..lib.driver_utils import (driver_ensure,
-                                driver_find,
-                                driver_remove,
-                                driver_variables_clear,
-                                DriverVariableNameGenerator)
+from ..lib.driver_utils import driver_find, driver_remove
 from ..api.poses import PoseUpdateEvent
 from ..api.poses import PoseNewEvent, PoseRemovedEvent
 from ..api.output_data import OutputSampleUpdateEvent
@@ -28,14 +29,12 @@ from ..api.output import (OutputBoneTargetChangeEvent,
                           OutputUseLogarithmicMapUpdateEvent)
 from ..api.drivers import DriverDisposableEvent
 if TYPE_CHECKING:
-    from bpy.types import FCurve, Object
     from ..api.output_channels import OutputChannel
     from ..api.output_channels import RBFDriverOutputChannels
     from ..api.output import Output
     from ..api.driver import RBFDriver
 
 EPSILON = 10 * np.finfo(float).resolution
-MAX_PARAMS = 32
 
 
 def output_assign_channel_data_targets__singleprop(output: 'Output') -> None:
@@ -128,219 +127,8 @@ def idprop_qlend_exponential_map(output: 'Output') -> str:
     return f'rbfn_qbmap_{output.identifier}'
 
 
-def output_driver_init__qblend_magnitude(fcurve: 'FCurve',
-                                         object: 'Object',
-                                         tokens: Sequence[str]) -> None:
-    driver = fcurve.driver
-    driver.type = 'SCRIPTED'
-    driver.expression = f'sqrt(pow(x, 2.0) + pow(y, 2.0) + pow(z, 2.0))'
-
-    for variable, axis, path in zip(driver_variables_ensure(driver.variables, 3), "xyz", tokens[1:]):
-        variable.type = 'SINGLE_PROP'
-        variable.name = axis
-
-        target = variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = path
-
-
-def output_driver_init__qblend_sine(fcurve: 'FCurve',
-                                    object: 'Object',
-                                    magnitude: str) -> None:
-    driver = fcurve.driver
-    driver.type = 'SCRIPTED'
-    driver.expression = f'sin(n) / n if n != 0.0 else sin(n)'
-
-    variable = driver_variables_ensure(driver.variables, 1)[0]
-    variable.type = 'SINGLE_PROP'
-    variable.name = "n"
-
-    target = variable.targets[0]
-    target.id_type = object.type
-    target.id = object.data
-    target.data_path = magnitude
-
-
-def output_driver_init__qblend_exponent(fcurve: 'FCurve',
-                                        object: 'Object',
-                                        tokens: Sequence[str]) -> None:
-    driver = fcurve.driver
-    driver.type = 'SCRIPTED'
-    driver.expression = f'exp(w)'
-
-    variable = driver_variables_ensure(driver.variables, 1)[0]
-    variable.type = 'SINGLE_PROP'
-    variable.name = "w"
-
-    target = variable.targets[0]
-    target.id_type = object.type
-    target.id = object.data
-    target.data_path = tokens[0]
-
-
-def output_channel_driver_init__qblend_exponential_map(fcurve: 'FCurve',
-                          object: 'Object',
-                          logsum: Sequence[str],
-                          magnitude: str,
-                          sine: str,
-                          exponent: str) -> None:
-    driver = fcurve.driver
-    driver.type = 'SCRIPTED'
-
-    variables = driver.variables
-    driver_variables_clear(variables)
-
-    for name, path in zip("se", (sine, exponent)):
-        variable = variables.new()
-        variable.type = 'SINGLE_PROP'
-        variable.name = name
-
-        target = variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = path
-
-    if fcurve.array_index == 0:
-        variable = variables.new()
-        variable.type = 'SINGLE_PROP'
-        variable.name = "n"
-
-        target = variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = magnitude
-
-        driver.expression = f'e * cos(n) if n > {EPSILON} else e'
-    else:
-        variable = variables.new()
-        variable.type = 'SINGLE_PROP'
-        variable.name = "q"
-
-        target = variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = logsum[fcurve.array_index]
-
-        driver.expression = f'e * s * q'
-
-
-def output_channel_driver_init__qblend_final(fcurve: 'FCurve',
-                          object: 'Object',
-                          mean: Sequence[float],
-                          expmap: Sequence[str]) -> None:
-    
-    driver = fcurve.driver
-    driver.type = 'SCRIPTED'
-
-    for variable, key, path in zip(driver_variables_ensure(driver.variables, 4), "wxyz", expmap):
-        variable.type = 'SINGLE_PROP'
-        variable.name = key
-
-        target = variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = path
-
-    i = fcurve.array_index
-    w, x, y, z = mean
-
-    if   i == 0: driver.expression = f'{w}*w - {x}*x - {y}*y - {z}*z'
-    elif i == 1: driver.expression = f'{w}*x + {x}*w + {y}*z - {z}*y'
-    elif i == 2: driver.expression = f'{w}*y - {x}*z + {y}*w + {z}*x'
-    elif i == 3: driver.expression = f'{w}*z + {x}*y - {y}*x + {z}*w'
-
-
-def output_channel_driver_init__dot(fcurve: 'FCurve',
-                                    object: 'Object',
-                                    weights: Sequence[str],
-                                    samples: Sequence[str],
-                                    influence: Optional[str]="") -> None:
-
-    keygen = DriverVariableNameGenerator()
-    tokens = []
-    driver = fcurve.driver
-    driver.type = 'SCRIPTED'
-
-    variables = driver.variables
-    driver_variables_clear(variables)
-
-    for weight, sample in zip(weights, samples):
-
-        weight_variable = variables.new()
-        weight_variable.type = 'SINGLE_PROP'
-        weight_variable.name = next(keygen)
-
-        target = weight_variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = weight
-
-        sample_variable = variables.new()
-        sample_variable.type = 'SINGLE_PROP'
-        sample_variable.name = next(keygen)
-
-        target = sample_variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = sample
-
-        tokens.append(f'{weight_variable.name}*{sample_variable.name}')
-
-    driver.type = 'SCRIPTED'
-    driver.expression = "+".join(tokens)
-
-    if influence:
-        influence_variable = variables.new()
-        influence_variable.type = 'SINGLE_PROP'
-        influence_variable.name = next(keygen)
-
-        target = influence_variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = influence
-
-        driver.expression = f'{influence_variable.name}*({driver.expression})'
-
-
-def output_channel_driver_init__sum(fcurve: 'FCurve',
-                                    object: 'Object',
-                                    params: Sequence[str],
-                                    influence: Optional[str]="") -> None:
-    
-    keygen = DriverVariableNameGenerator()
-    driver = fcurve.driver
-    driver.type = 'SUM'
-
-    variables = driver.variables
-    driver_variables_clear(variables)
-
-    for param in params:
-        variable = variables.new()
-        variable.type = 'SINGLE_PROP'
-        variable.name = next(keygen)
-
-        target = variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = param
-
-    if influence:
-        variable = variables.new()
-        variable.type = 'SINGLE_PROP'
-        variable.name = next(keygen)
-
-        target = variable.targets[0]
-        target.id_type = object.type
-        target.id = object.data
-        target.data_path = influence
-
-        driver.type = 'SCRIPTED'
-        driver.expression = f'{variable.name}*({"+".join(variables[:-1])})'
-
-
-def output_channel_activate__weighted_average(output: 'Output',
-                                              channel: 'OutputChannel') -> None:
+def output_channel_specs__weighted_average(output: 'Output',
+                                           channel: 'OutputChannel') -> DriverSpecSet:
     object = output.id_data
     id = object.data
     propname = idprop_cdata(channel)
@@ -350,144 +138,113 @@ def output_channel_activate__weighted_average(output: 'Output',
     weights = [f'{weight.data_path}[{weight.array_index}]' for weight in weights]
     samples = [f'["{propname}"][{index}]' for index in range(len(weights))]
 
-    if len(samples) > MAX_PARAMS:
-        length = len(samples)
-        offset = 0
-        blocks: List[Tuple[Sequence[str], Sequence[str]]] = []
-
-        for _ in range(floor(length/MAX_PARAMS)):
-            blocks.append((weights[offset: offset + MAX_PARAMS], samples[offset: offset + MAX_PARAMS]))
-            offset += MAX_PARAMS
-
-        if offset < length:
-            blocks.append((weights[offset:], samples[offset:]))
-
-        propname = idprop_cnode(channel)
-        id[propname] = [0.0] * len(blocks)
+    root = DriverSpec(channel.id, *output_channel_data_target(channel), mute=channel.mute)
+    return reduction_tree_specs(root,
+                                object.type,
+                                id,
+                                tuple(zip(weights, samples)),
+                                idprop_cnode(channel),
+                                scale=output.influence.data_path)
 
-        fcurves = []
-        for index, (weights, samples) in enumerate(blocks):
-            fcurve = driver_ensure(output.id_data.data, f'["{propname}"]', index)
-            fcurves.append(fcurve)
-            output_channel_driver_init__dot(fcurve, object, weights, samples)
 
-        tokens = tuple(f'{fc.data_path}[{fc.array_index}]' for fc in fcurves)
-        fcurve = driver_ensure(channel.id, *output_channel_data_target(channel))
-        fcurve.mute = channel.mute
-        output_channel_driver_init__sum(fcurve, object, tokens, output.influence.data_path)
-    else:
-        fcurve = driver_ensure(channel.id, *output_channel_data_target(channel))
-        fcurve.mute = channel.mute
-        output_channel_driver_init__dot(fcurve, object, weights, samples, output.influence.data_path)
+def output_channel_activate__weighted_average(output: 'Output',
+                                              channel: 'OutputChannel') -> None:
+    driver_spec_set_sync(output_channel_specs__weighted_average(output, channel))
 
 
 def output_activate__weighted_average(output: 'Output') -> None:
+    # The channels drive indices of one data path, so their specs are synchronized together
+    specs = DriverSpecSet()
     for channel in filter(output_channel_is_enabled, output.channels):
         if channel.id:
-            output_channel_activate__weighted_average(output, channel)
+            specs += output_channel_specs__weighted_average(output, channel)
+    driver_spec_set_sync(specs)
 
 
-def output_activate__quaternion_blend(output: 'Output') -> None:
+def output_specs__quaternion_blend(output: 'Output') -> DriverSpecSet:
     object = output.object
+    id_type = object.type
+    id = object.data
 
-    if object:
-        id = object.data
-
-        data = np.array([tuple(ch.data.values()) for ch in output.channels], dtype=float)
-        mean = np.mean(data, axis=1)
-
-        for column in data.T:
-            column[:] = quaternion_to_logarithmic_map(mean @ Quaternion(tuple(column)))
-
-        for channel, row in zip(output.channels, data):
-            id[idprop_cdata(channel)] = list(row)
-
-        weights = [pose.weight for pose in owner_resolve(output, ".outputs").poses]
-        weights = [f'{weight.data_path}[{weight.array_index}]' for weight in weights]
-        indices = np.ndarray([list(range(len(weights)))] * 4, dtype=int)
-
-        # Compute the sum of the logarithmic maps
-        logarithmic_sum = idprop_qblend_logsum(output)
-        id[logarithmic_sum] = [0.0] * 4
-
-        if len(weights) > MAX_PARAMS:
-            length = len(weights)
-            offset = 0
-            blocks: List[Tuple[Sequence[str], np.ndarray]] = []
+    data = np.array([tuple(ch.data.values()) for ch in output.channels], dtype=float)
+    mean = np.mean(data, axis=1)
 
-            for _ in range(floor(length/MAX_PARAMS)):
-                index = offset + MAX_PARAMS
-                blocks.append(weights[offset:index], indices.T[offset:index].T)
-                offset = index
+    for column in data.T:
+        column[:] = quaternion_to_logarithmic_map(mean @ Quaternion(tuple(column)))
 
-            if offset < length:
-                blocks.append(weights[offset:], indices.T[offset:].T)
+    weights = [pose.weight for pose in owner_resolve(output, ".outputs").poses]
+    weights = [f'{weight.data_path}[{weight.array_index}]' for weight in weights]
 
-            for channel_index, channel in output.channels:
-                cdata = idprop_cdata(channel)
-                cnode = idprop_cnode(channel)
-                count = len(blocks)
-                id[cnode] = [0.0] * count
+    # Compute the sum of the logarithmic maps
+    logsum = IDPropertySpec(id, idprop_qblend_logsum(output), 4)
+    specs = DriverSpecSet(properties=(logsum,))
+
+    for index, (channel, row) in enumerate(zip(output.channels, data)):
+        cdata = IDPropertySpec(id, idprop_cdata(channel), len(row), tuple(row.tolist()))
+        terms = tuple((weight, f'{cdata.data_path}[{i}]') for i, weight in enumerate(weights))
+        specs += DriverSpecSet(properties=(cdata,))
+        specs += reduction_tree_specs(DriverSpec(id, logsum.data_path, index),
+                                      id_type,
+                                      id,
+                                      terms,
+                                      idprop_cnode(channel))
+
+    tokens = [f'{logsum.data_path}[{i}]' for i in range(4)]
+
+    magnitude = IDPropertySpec(id, idprop_qlend_magnitude(output))
+    sine = IDPropertySpec(id, idprop_qlend_sine(output))
+    exponent = IDPropertySpec(id, idprop_qlend_exponent(output))
+    exponential_map = IDPropertySpec(id, idprop_qlend_exponential_map(output), 4)
+
+    def variable(name: str, path: str) -> DriverVariableSpec:
+        return single_prop_variable(name, id_type, id, path)
+
+    drivers = [
+        # The vector magnitude of the summed logarithmic maps
+        DriverSpec(id, magnitude.data_path,
+                   expression='sqrt(pow(x, 2.0) + pow(y, 2.0) + pow(z, 2.0))',
+                   variables=tuple(map(variable, "xyz", tokens[1:]))),
+        # The sine of the magnitude
+        DriverSpec(id, sine.data_path,
+                   expression='sin(n) / n if n != 0.0 else sin(n)',
+                   variables=(variable("n", magnitude.data_path),)),
+        # The exponent of the summed logarithmic maps
+        DriverSpec(id, exponent.data_path,
+                   expression='exp(w)',
+                   variables=(variable("w", tokens[0]),)),
+        ]
+
+    # The exponential map of the summed logarithmic maps
+    factors = (variable("s", sine.data_path), variable("e", exponent.data_path))
+    drivers.append(DriverSpec(id, exponential_map.data_path, 0,
+                              expression=f'e * cos(n) if n > {EPSILON} else e',
+                              variables=factors + (variable("n", magnitude.data_path),)))
+    for index in range(1, 4):
+        drivers.append(DriverSpec(id, exponential_map.data_path, index,
+                                  expression='e * s * q',
+                                  variables=factors + (variable("q", tokens[index]),)))
+
+    # Final drivers multiply the exponential map by the mean quaternion
+    w, x, y, z = mean.tolist()
+    expressions = (f'{w}*w - {x}*x - {y}*y - {z}*z',
+                   f'{w}*x + {x}*w + {y}*z - {z}*y',
+                   f'{w}*y - {x}*z + {y}*w + {z}*x',
+                   f'{w}*z + {x}*y - {y}*x + {z}*w')
+    components = tuple(variable(key, f'{exponential_map.data_path}[{index}]')
+                       for index, key in enumerate("wxyz"))
+    for channel, expression in zip(output.channels, expressions):
+        drivers.append(DriverSpec(channel.id, *output_channel_data_target(channel),
+                                  expression=expression,
+                                  variables=components,
+                                  mute=channel.mute))
+
+    return specs + DriverSpecSet(properties=(magnitude, sine, exponent, exponential_map),
+                                 drivers=tuple(drivers))
 
-                for index, (weights, indices) in enumerate(blocks):
-                    fcurve = driver_ensure(id, f'["{cnode}"]', index)
-                    tokens = [f'["{cdata}"][{index}]' for index in indices[channel_index]]
-                    output_channel_driver_init__dot(fcurve, object, weights, tokens)
 
-                tokens = [f'["{cnode}"][{index}]' for index in range(count)]
-                fcurve = driver_ensure(id, f'["{logarithmic_sum}"]', channel_index)
-                output_channel_driver_init__sum(fcurve, object, tokens)
-        else:
-            for index, channel in enumerate(output.channels):
-                idprop = idprop_cdata(channel)
-                tokens = [f'["{idprop}"][{i}' for i in range(len(weights))]
-                fcurve = driver_ensure(id, f'["{logarithmic_sum}"]', index)
-                output_channel_driver_init__dot(fcurve, object, weights, tokens)
-
-        tokens = [f'["{logarithmic_sum}"][{i}]' for i in range(4)]
-
-        # Add a driver to compute the vector magnitude for the summed logarithmic maps
-        propname = idprop_qlend_magnitude(output)
-        id[propname] = 0.0
-
-        magnitude = driver_ensure(id, f'["{propname}"]')
-        output_driver_init__qblend_magnitude(magnitude, object, tokens)
-
-        # Add a driver to compute the sine of the magnitude
-        propname = idprop_qlend_sine(output)
-        id[propname] = 0.0
-
-        sine = driver_ensure(id, f'["{propname}"]')
-        output_driver_init__qblend_sine(sine, object, magnitude.data_path)
-
-        # Add a driver to compute the exponent of the summed logarithmic maps
-        propname = idprop_qlend_exponent(output)
-        id[propname] = 0.0
-
-        exponent = driver_ensure(id, f'["{propname}"]')
-        output_driver_init__qblend_exponent(exponent, object, tokens)
-
-        # Add a driver to compute the exponential map of the summed logarithmic maps
-        propname = idprop_qlend_exponential_map(output)
-        id[propname] = list(repeat(0.0, 4))
-
-        exponential_map = []
-        for index in range(4):
-            fcurve = driver_ensure(id, f'["{propname}"]', index)
-            exponential_map.append(fcurve)
-            output_channel_driver_init__qblend_exponential_map(fcurve,
-                                                               object,
-                                                               tokens,
-                                                               magnitude.data_path,
-                                                               sine.data_path,
-                                                               exponent.data_path)
-
-        # Final driver multiplies the exponential map by the mean quaternion
-        for channel in output.channels:
-            tokens = [f'{fc.data_path}[{fcurve.array_index}]' for fc in exponential_map]
-            fcurve = driver_ensure(channel.id, channel.data_path, channel.array_index)
-            fcurve.mute = channel.mute
-            output_channel_driver_init__qblend_final(fcurve, object, mean, tokens)
+def output_activate__quaternion_blend(output: 'Output') -> None:
+    if output.object:
+        driver_spec_set_sync(output_specs__quaternion_blend(output))
 
 
 def output_deactivate__quaternion_blend(output: 'Output') -> None:
@@ -687,23 +444,33 @@ def on_output_use_logarithmic_map_update(event: OutputUseLogarithmicMapUpdateEve
             output_activate__weighted_average(output)
 
 
+def outputs_rebuild_key(rbfn: 'RBFDriver') -> Hashable:
+    return (outputs_activate_valid, owner_key(rbfn))
+
+
+def outputs_rebuild(rbfn: 'RBFDriver') -> None:
+    '''Requests reactivation of the RBF driver's valid outputs once per dispatch cycle'''
+    rebuild(outputs_rebuild_key(rbfn), outputs_activate_valid, rbfn.outputs)
+
+
 @event_handler(PoseNewEvent)
 def on_pose_new(event: PoseNewEvent) -> None:
-    outputs_activate_valid(owner_resolve(event.pose, ".poses").outputs)
+    outputs_rebuild(owner_resolve(event.pose, ".poses"))
 
 
 @event_handler(PoseRemovedEvent)
 def on_pose_removed(event: PoseRemovedEvent) -> None:
-    outputs_activate_valid(owner_resolve(event.pose, ".poses").outputs)
+    outputs_rebuild(owner_resolve(event.pose, ".poses"))
 
 
 @event_handler(PoseUpdateEvent)
 def on_pose_update(event: PoseUpdateEvent) -> None:
-    outputs_activate_valid(owner_resolve(event.pose, ".poses").outputs)
+    outputs_rebuild(owner_resolve(event.pose, ".poses"))
 
 
 @event_handler(DriverDisposableEvent)
 def on_driver_disposable(event: DriverDisposableEvent) -> None:
+    rebuild_cancel(outputs_rebuild_key(event.driver))
     for output in event.driver.outputs:
         output_deactivate(output)
 
@@ -0,0 +1,92 @@
+'''
+Resolution of the property group that owns a piece of RBF driver data.
+
+Properties such as Pose.driver or Input.driver find their owner by taking the data's path from
+its ID, cutting it at a token and resolving the remainder. Both steps are string-based RNA
+lookups, and the rebuilds that walk every pose and input repeat them for the same data many
+times over. While an owner cache scope is open, resolved owners are remembered by data pointer
+and token so each is resolved once.
+
+Python references to RNA data are raw pointers, so a cached owner is only safe for as long as
+the collections it lives in are not added to, removed from or reordered. Scopes are therefore
+kept short (a rebuild, see .events), are cleared by the helpers that change collection
+structure, and never survive a file load or an undo step.
+'''
+
+from contextlib import contextmanager
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
+if TYPE_CHECKING:
+    from bpy.types import PropertyGroup
+
+_cache: Optional[Dict[Tuple[int, str], 'PropertyGroup']] = None
+_depth = 0
+
+
+def owner_path_resolve(data: 'PropertyGroup', token: str) -> 'PropertyGroup':
+    '''Resolves the owner of data from its path, cut at the last occurrence of token'''
+    path: str = data.path_from_id()
+    return data.id_data.path_resolve(path.rpartition(token)[0])
+
+
+def owner_resolve(data: 'PropertyGroup', token: str) -> 'PropertyGroup':
+    '''As owner_path_resolve, remembering the result while an owner cache scope is open'''
+    cache = _cache
+    if cache is None:
+        return owner_path_resolve(data, token)
+    key = (data.as_pointer(), token)
+    owner = cache.get(key)
+    if owner is None:
+        owner = cache[key] = owner_path_resolve(data, token)
+    return owner
+
+
+@contextmanager
+def owner_cache() -> Iterator[None]:
+    '''
+    Opens an owner cache scope. Code inside the scope must not add, remove or reorder collection
+    members other than through helpers that call owner_cache_clear. Nested scopes share the
+    outermost one's cache.
+    '''
+    global _cache, _depth
+    if _depth == 0:
+        _cache = {}
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        if _depth == 0:
+            _cache = None
+
+
+def owner_cache_clear() -> None:
+    '''Forgets cached owners, for use after collection members move in memory'''
+    if _cache is not None:
+        _cache.clear()
+
+
+def owner_resolve_benchmark(data: 'PropertyGroup',
+                            token: str,
+                            count: Optional[int]=10000) -> Dict[str, float]:
+    '''
+    Times count owner lookups for data with the path-based approach and through the owner cache.
+    Run it from Blender's Python console, e.g. for the driver of a pose:
+
+        owner_resolve_benchmark(C.object.rbf_drivers[0].poses[1], ".poses")
+
+    Returns the seconds per lookup for each approach and the speed-up.
+    '''
+    start = time.perf_counter()
+    for _ in range(count):
+        owner_path_resolve(data, token)
+    path = (time.perf_counter() - start) / count
+
+    with owner_cache():
+        owner_cache_clear()
+        start = time.perf_counter()
+        for _ in range(count):
+            owner_resolve(data, token)
+        cached = (time.perf_counter() - start) / count
+
+    return {"path": path, "cached": cached, "speedup": path / cached if cached else float("inf")}
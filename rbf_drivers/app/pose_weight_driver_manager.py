@@ -1,19 +1,25 @@
 
-from typing import Callable, Iterator, Sequence, Tuple, Union, TYPE_CHECKING
+from typing import Hashable, List, Sequence, Tuple, TYPE_CHECKING
 from logging import getLogger
-from math import acos, asin, fabs, pi, sqrt
 import numpy as np
-from .events import event_handler
-from .utils import owner_resolve, driver_variables_ensure, idprop_array_ensure, idprop_remove
-from ..lib.curve_mapping import keyframe_points_assign, to_bezier
-from ..api.input_target import (InputTargetPropertyUpdateEvent,
-                                InputTargetBoneTargetUpdateEvent,
-                                InputTargetDataPathUpdateEvent,
-                                InputTargetIDTypeUpdateEvent,
-                                InputTargetObjectUpdateEvent,
-                                InputTargetRotationModeUpdateEvent,
-                                InputTargetTransformSpaceUpdateEvent,
-                                InputTargetTransformTypeUpdateEvent)
+from . import distance, radii
+from .driver_applier import idprop_spec_remove
+from .driver_spec import (DriverSpec,
+                          DriverSpecSet,
+                          DriverTargetSpec,
+                          DriverVariableSpec,
+                          IDPropertySpec,
+                          driver_spec_extend,
+                          keyframes_from_bezier,
+                          single_prop_variable)
+from .driver_sync import DriverSyncReport, driver_spec_set_sync
+from .events import event_handler, owner_key, rebuild, rebuild_cancel
+from .expression import driver_spec_optimize, driver_spec_set_optimize, driver_specs_hoist
+from .lowering import driver_spec_set_lower
+from .reduction import reduction_tree_specs
+from .simple_expression import driver_spec_set_simplify
+from .utils import owner_resolve, to_bezier, DriverVariableNameGenerator
+from ..api.input_target import InputTargetPropertyUpdateEvent
 from ..api.input_variable import (input_variable_is_enabled,
                                   InputVariableNameUpdateEvent,
                                   InputVariableIsEnabledUpdateEvent,
@@ -34,9 +40,8 @@ from ..api.pose import PoseUpdateEvent
 from ..api.poses import PoseMoveEvent, PoseNewEvent, PoseRemovedEvent
 from ..api.driver_interpolation import DriverInterpolationUpdateEvent
 from ..api.drivers import DriverDisposableEvent
-from ..lib.driver_utils import driver_ensure, driver_variables_clear, DriverVariableNameGenerator
 if TYPE_CHECKING:
-    from bpy.types import Driver, DriverTarget, DriverVariable, FCurve
+    from bpy.types import ID
     from ..api.input_target import InputTarget
     from ..api.input_data import InputData
     from ..api.input_variable import InputVariable
@@ -47,265 +52,196 @@ if TYPE_CHECKING:
 log = getLogger("rbf_drivers")
 
 
-def distance_euclidean(a: Sequence[float], b: Sequence[float]) -> float:
-    return sqrt(sum(pow(ai - bi, 2.0) for ai, bi in zip(a, b)))
-
-
-def distance_angle(a: Sequence[float], b: Sequence[float]) -> float:
-    return fabs(a[0]-b[0])/pi
-
-
-def distance_quaternion(a: Sequence[float], b: Sequence[float]) -> float:
-    return acos((2.0 * pow(min(max(sum(ai * bi for ai, bi in zip(a, b)), -1.0), 1.0), 2.0)) - 1.0) / pi
-
-
-def distance_direction(a: Sequence[float], b: Sequence[float], axis: str) -> float:
-    aw, ax, ay, az = a
-    bw, bx, by, bz = b
-
-    if axis == 'X':
-        a = (1.0 - 2.0 * (ay * ay + az * az), 2.0 * (ax * ay + aw * az), 2.0 * (ax * az - aw * ay))
-        b = (1.0 - 2.0 * (by * by + bz * bz), 2.0 * (bx * by + bw * bz), 2.0 * (bx * bz - bw * by))
-    elif axis == 'Y':
-        a = (2.0 * (ax * ay - aw * az), 1.0 - 2.0 * (ax * ax + az * az), 2.0 * (ay * az + aw * ax))
-        b = (2.0 * (bx * by - bw * bz), 1.0 - 2.0 * (bx * bx + bz * bz), 2.0 * (by * bz + bw * bx))
-    else:
-        a = (2.0 * (ax * az + aw * ay), 2.0 * (ay * az - aw * ax), 1.0 - 2.0 * (ax * ax + ay * ay))
-        b = (2.0 * (bx * bz + bw * by), 2.0 * (by * bz - bw * bx), 1.0 - 2.0 * (bx * bx + by * by))
-
-    return (asin((sum(ai * bi for ai, bi in zip(a, b)))) - -(pi / 2.0)) / pi
-
-
-def input_distance_metric(input: 'Input') -> Union[Callable[[Sequence[float], Sequence[float]], float],
-                                                            Callable[[Sequence[float], Sequence[float], str], float]]:
-    type = input.type
-
-    if type == 'ROTATION':
-        mode = input.rotation_mode
-        if mode == 'QUATERNION': return distance_quaternion
-        if mode == 'SWING'     : return distance_direction
-        if mode == 'TWIST'     : return distance_angle
-
-    return distance_euclidean
-
 def input_distance_matrix(input: 'Input') -> np.ndarray:
     active = filter(input_variable_is_enabled, input.variables)
     params = np.array([tuple(v.data.values(v.data.is_normalized)) for v in active], dtype=float).T
-    matrix = np.empty((len(params), len(params)), dtype=float)
-    metric = input_distance_metric(input)
-
-    for a, row in zip(params, matrix):
-        for i, b in enumerate(params):
-            row[i] = metric(a, b)
-
-    return matrix
+    return distance.distance_matrix(params, *distance.input_distance_metric(input))
 
 
-def input_pose_radii(matrix: np.ndarray) -> Iterator[float]:
-    for row in np.ma.masked_values(matrix, 0.0, atol=0.001):
-        row = row.compressed()
-        yield 0.0 if len(row) == 0 else np.min(row)
+def input_pose_radii(input: 'Input', matrix: np.ndarray) -> np.ndarray:
+    return radii.input_pose_radii(input, matrix)
 
 
-def tgt_assign__prop(tgt: 'DriverTarget', src: 'InputTarget') -> None:
-    tgt.id_type = src.id_type
-    tgt.id = src.id
-    tgt.data_path = src.data_path
+def input_target_spec__prop(src: 'InputTarget') -> DriverTargetSpec:
+    return DriverTargetSpec(id_type=src.id_type, id=src.id, data_path=src.data_path)
 
 
-def tgt_assign__xform(tgt: 'DriverTarget', src: 'InputTarget') -> None:
-    tgt.id = src.object
-    tgt.bone_target = src.bone_target
-    tgt.transform_type = src.transform_type
-    tgt.transform_space = src.transform_space
-    tgt.rotation_mode = src.rotation_mode
+def input_target_spec__xform(src: 'InputTarget') -> DriverTargetSpec:
+    return DriverTargetSpec(id=src.object,
+                            bone_target=src.bone_target,
+                            transform_type=src.transform_type,
+                            transform_space=src.transform_space,
+                            rotation_mode=src.rotation_mode)
 
 
-def tgt_assign__diff(tgt: 'DriverTarget', src: 'InputTarget') -> None:
-    tgt.id = src.object
-    tgt.bone_target = src.bone_target
-    tgt.transform_space = src.transform_space
+def input_target_spec__diff(src: 'InputTarget') -> DriverTargetSpec:
+    return DriverTargetSpec(id=src.object,
+                            bone_target=src.bone_target,
+                            transform_space=src.transform_space)
 
 
-def tgt_assign(var: 'DriverVariable', src: 'InputVariable') -> None:
-    type = var.type
+def input_variable_spec(name: str, src: 'InputVariable') -> DriverVariableSpec:
+    type = src.type
     if type == 'SINGLE_PROP':
-        return tgt_assign__prop(var.targets[0], src.targets[0])
-    if type == 'TRANSFORMS' :
-        return tgt_assign__xform(var.targets[0], src.targets[0])
-    for tgt, src in zip(var.targets, src.targets):
-        tgt_assign__diff(tgt, src)
+        targets = (input_target_spec__prop(src.targets[0]),)
+    elif type == 'TRANSFORMS':
+        targets = (input_target_spec__xform(src.targets[0]),)
+    else:
+        targets = tuple(map(input_target_spec__diff, src.targets))
+    return DriverVariableSpec(name, type, targets)
 
 
-def ipw_dist_metric__euclidean(driver: 'Driver', tokens: Sequence[Tuple[str, str]]) -> None:
-    driver.type = 'SCRIPTED'
-    driver.expression = f'sqrt({"+".join("pow("+a+"-"+b+",2.0)" for a, b in tokens)})'
+def ipw_dist_expression__euclidean(tokens: Sequence[Tuple[str, float]]) -> str:
+    return f'sqrt({"+".join(f"pow({a}-{b},2.0)" for a, b in tokens)})'
 
 
-def ipw_dist_metric__quaternion(driver: 'Driver', tokens: Sequence[Tuple[str, str]]) -> None:
+def ipw_dist_expression__quaternion(tokens: Sequence[Tuple[str, float]]) -> str:
     if len(tokens) != 4:
-        log.error()
-        return ipw_dist_metric__euclidean(driver, tokens)
-
-    driver.type = 'SCRIPTED'
-    driver.expression = f'acos((2.0*pow(clamp({"+".join(["*".join(x) for x in tokens])},-1.0,1.0),2.0))-1.0)/pi'
+        log.error(f'Expected 4 quaternion variables, not {len(tokens)}')
+        return ipw_dist_expression__euclidean(tokens)
+    return f'acos((2.0*pow(clamp({"+".join(f"{a}*{b}" for a, b in tokens)},-1.0,1.0),2.0))-1.0)/pi'
 
 
-def ipw_dist_metric__swing(driver: 'Driver', tokens: Sequence[Tuple[str, str]], axis: str) -> None:
+def ipw_dist_expression__swing(tokens: Sequence[Tuple[str, float]], axis: str) -> str:
     if len(tokens) != 4:
-        log.error()
-        return ipw_dist_metric__euclidean(driver, tokens)
+        log.error(f'Expected 4 quaternion variables, not {len(tokens)}')
+        return ipw_dist_expression__euclidean(tokens)
 
-    w, x, y, z = tokens
+    w, x, y, z = (param for param, _ in tokens)
+    a, b, c = distance.swing_axis(np.array([[value for _, value in tokens]], dtype=float), axis)[0]
 
     if axis == 'X':
-        a = str(1.0-2.0*(y*y+z*z))
-        b = str(2.0*(x*y+w*z))
-        c = str(2.0*(x*z-w*y))
-        expression = f'(asin((1.0-2.0*(y*y+z*z))*{a}+2.0*(x*y+w*z)*{b}+2.0*(x*z-w*y)*{c})-(pi/2.0))/pi'
-
+        u = f'(1.0-2.0*({y}*{y}+{z}*{z}))'
+        v = f'2.0*({x}*{y}+{w}*{z})'
+        t = f'2.0*({x}*{z}-{w}*{y})'
     elif axis == 'Y':
-        a = str(2.0*(x*y-w*z))
-        b = str(1.0-2.0*(x*x+z*z))
-        c = str(2.0*(y*z+w*x))
-        expression = f'(asin(2.0*(x*y-w*z)*{a}+(1.0-2.0*(x*x+z*z))*{b}+2.0*(y*z+w*x)*{c})--(pi/2.0))/pi'
-
+        u = f'2.0*({x}*{y}-{w}*{z})'
+        v = f'(1.0-2.0*({x}*{x}+{z}*{z}))'
+        t = f'2.0*({y}*{z}+{w}*{x})'
     else:
-        a = str(2.0*(x*z+w*y))
-        b = str(2.0*(y*z-w*x))
-        c = str(1.0-2.0*(x*x+y*y))
-        expression = f'(asin(2.0*(x*z+w*y)*{a}+2.0*(y*z-w*x)*{b}+(1.0-2.0*(x*x+y*y))*{c})--(pi/2.0))/pi'
+        u = f'2.0*({x}*{z}+{w}*{y})'
+        v = f'2.0*({y}*{z}-{w}*{x})'
+        t = f'(1.0-2.0*({x}*{x}+{y}*{y}))'
 
-    driver.type = 'SCRIPTED'
-    driver.expression = expression
+    return f'(asin(clamp({u}*{a}+{v}*{b}+{t}*{c},-1.0,1.0))+(pi/2.0))/pi'
 
 
-def ipw_dist_metric__twist(driver: 'Driver', tokens: Sequence[Tuple[str, str]]) -> None:
+def ipw_dist_expression__twist(tokens: Sequence[Tuple[str, float]]) -> str:
     if len(tokens) != 1:
-        log.error()
-        return ipw_dist_metric__euclidean(driver, tokens)
-
-    driver.type = 'SCRIPTED'
-    driver.expression = f'fabs({tokens[0][0]}-{str(tokens[0][1])})/pi'
+        log.error(f'Expected 1 twist variable, not {len(tokens)}')
+        return ipw_dist_expression__euclidean(tokens)
+    return f'fabs({tokens[0][0]}-{tokens[0][1]})/pi'
 
 
-def ipw_dist_metric(fcurve: 'FCurve', input: 'Input', index: int) -> None:
+def ipw_dist_expression(input: 'Input', tokens: Sequence[Tuple[str, float]]) -> str:
+    if len(tokens) == 0:
+        return "0.0"
+    if input.type == 'ROTATION':
+        mode = input.rotation_mode
+        if mode == 'SWING'     : return ipw_dist_expression__swing(tokens, input.rotation_axis)
+        if mode == 'TWIST'     : return ipw_dist_expression__twist(tokens)
+        if mode == 'QUATERNION': return ipw_dist_expression__quaternion(tokens)
+    return ipw_dist_expression__euclidean(tokens)
+
+
+def ipw_dist_spec(id: 'ID',
+                  path: str,
+                  array_index: int,
+                  input: 'Input',
+                  index: int,
+                  pose: 'Pose',
+                  radius: float) -> DriverSpec:
     keygen = DriverVariableNameGenerator()
+    variables = []
     tokens = []
 
-    dr = fcurve.driver
-    dr.type = 'SCRIPTED'
-    driver_variables_clear(dr.variables)
-
     for src in filter(input_variable_is_enabled, input.variables):
-        var = dr.variables.new()
-        var.type = src.type
-        var.name = next(keygen)
-        tgt_assign(var, src)
+        name = next(keygen)
+        variables.append(input_variable_spec(name, src))
 
         data: 'InputData' = src.data
         try:
-            val = data.value(index, data.is_normalized)
+            value = data.value(index, data.is_normalized)
         except IndexError:
-            log.warning()
-            val = src.default_value
+            log.warning(f'Missing sample {index} for {src}, using default value')
+            value = src.default_value
 
         if data.is_normalized and data.norm != 0.0:
-            param = f'{var.name}/{data.norm}'
+            param = f'({name}/{data.norm})'
         else:
-            param = var.name
-
-        tokens.append((param, str(val)))
+            param = name
 
-    if len(tokens) == 0:
-        dr.expression = "0.0"
-        return
-
-    if input.type == 'ROTATION':
-        mode = input.rotation_mode
-        if   mode == 'SWING'     : ipw_dist_metric__swing(dr, tokens, input.rotation_axis)
-        elif mode == 'TWIST'     : ipw_dist_metric__twist(dr, tokens)
-        elif mode == 'QUATERNION': ipw_dist_metric__quaternion(dr, tokens)
-        else                     : ipw_dist_metric__euclidean(dr, tokens)
-    else:
-        ipw_dist_metric__euclidean(dr, tokens)
-
-
-def ipw_dist_weight(fc: 'FCurve', pose: 'Pose', rad: float) -> None:
-    dr = fc.driver
-
-    var = dr.variables.new()
-    var.type = 'SINGLE_PROP'
-    var.name = "r_"
+        tokens.append((param, value))
 
     src = pose.radius
-    tgt = var.targets[0]
-    tgt.id_type = src.id_type
-    tgt.id = src.id
-    tgt.data_path = src.data_path
+    variables.append(single_prop_variable("r_", src.id_type, src.id, src.data_path))
 
-    dr.expression = f'1.0-({dr.expression})/{rad if rad > 0.0 else "1.0"}*{var.name}'
+    expression = ipw_dist_expression(input, tokens)
+    expression = f'1.0-({expression})/{radius if radius > 0.0 else "1.0"}*r_'
+
+    return DriverSpec(id, path, array_index, 'SCRIPTED', expression, tuple(variables))
 
 
 def ipw_dist_idprop(rbfn: 'RBFDriver') -> str:
     return f'rbfn_pdst_{rbfn.identifier}'
 
 
-def ipw_dist_update(rbfn: 'RBFDriver') -> np.ndarray:
-
+def ipw_dist_specs(rbfn: 'RBFDriver') -> Tuple[IDPropertySpec, List[List[DriverSpec]]]:
     id = rbfn.id_data.data
     name = ipw_dist_idprop(rbfn)
     path = f'["{name}"]'
 
-    fx = []
+    rows = []
     ai = 0
 
     for input in filter(input_is_valid, rbfn.inputs):
-        radii = tuple(input_pose_radii(input_distance_matrix(input)))
+        values = input_pose_radii(input, input_distance_matrix(input))
 
         row = []
-        fx.append(row)
+        rows.append(row)
 
-        for i, (pose, rad) in enumerate(zip(rbfn.poses, radii)):
-            fc = driver_ensure(id, path, ai)
-            row.append(fc)
-
-            ipw_dist_metric(fc, input, i)
-            ipw_dist_weight(fc, pose, rad)
-            
+        for i, (pose, rad) in enumerate(zip(rbfn.poses, values.tolist())):
+            row.append(ipw_dist_spec(id, path, ai, input, i, pose, rad))
             ai += 1
 
-    idprop_array_ensure(id, name, ai)
-    return np.array(fx, dtype=object)
+    return IDPropertySpec(id, name, ai), rows
 
 
-def ipw_zero_ensure(rbfn: 'RBFDriver') -> Sequence['FCurve']:
-    id = rbfn.id_data.data
-    fx = []
+def ipw_cse_idprop(rbfn: 'RBFDriver') -> str:
+    return f'rbfn_pcse_{rbfn.identifier}'
 
-    name = ipw_dist_idprop(rbfn)
-    path = f'["{name}"]'
-    size = len(rbfn.poses)
 
-    idprop_array_ensure(id, name, size)
+def ipw_cse_specs(rbfn: 'RBFDriver',
+                  rows: Sequence[Sequence[DriverSpec]]) -> Tuple[DriverSpecSet, List[List[DriverSpec]]]:
+    '''
+    Folds constants in the distance drivers and moves terms they share (such as the rotated
+    axis of a swing input) into drivers of their own.
+    '''
+    ob = rbfn.id_data
+    flat = [driver_spec_optimize(spec) for row in rows for spec in row]
+    shared, flat = driver_specs_hoist(flat, ob.type, ob.data, ipw_cse_idprop(rbfn))
+    result = []
+    offset = 0
+    for row in rows:
+        result.append(flat[offset:offset+len(row)])
+        offset += len(row)
+    return shared, result
 
-    for i in range(size):
-        fc = driver_ensure(id, path, i)
-        dr = fc.driver
-        dr.expression = "0.0"
-        driver_variables_clear(dr.variables)
-        fx.append(fc)
 
-    return fx
+def ipw_zero_specs(rbfn: 'RBFDriver') -> Tuple[IDPropertySpec, List[DriverSpec]]:
+    id = rbfn.id_data.data
+    name = ipw_dist_idprop(rbfn)
+    path = f'["{name}"]'
+    size = len(rbfn.poses)
+    return IDPropertySpec(id, name, size), [DriverSpec(id, path, i, 'SCRIPTED', "0.0") for i in range(size)]
 
 
 def ipw_norm_idprop(rbfn: 'RBFDriver') -> str:
     return f'rbfn_pavg_{rbfn.identifier}'
 
 
-def ipw_norm_update(rbfn: 'RBFDriver', matrix: np.ndarray) -> Sequence['FCurve']:
-    matrix = matrix.T
-
+def ipw_norm_specs(rbfn: 'RBFDriver',
+                   rows: Sequence[Sequence[DriverSpec]]) -> Tuple[IDPropertySpec, List[DriverSpec]]:
     ob = rbfn.id_data
     id = ob.data
 
@@ -313,106 +249,62 @@ def ipw_norm_update(rbfn: 'RBFDriver', matrix: np.ndarray) -> Sequence['FCurve']
     dp = f'["{pk}"]'
     fx = []
 
-    for i, ipw_fx in enumerate(matrix.T):
-        
-        fc_avg = driver_ensure(id, dp, i)
-        dr_avg = fc_avg.driver
+    for i, column in enumerate(zip(*rows)):
         keygen = DriverVariableNameGenerator()
-        params = []
-
-        dvars = dr_avg.variables
-        driver_variables_clear(dvars)
-
-        for fc in ipw_fx:
-
-            var = dvars.new()
-            var.type = 'SINGLE_PROP'
-            var.name = next(keygen)
-
-            tgt = var.targets[0]
-            tgt.id_type = ob.type
-            tgt.id = ob.data
-            tgt.data_path = f'{fc.data_path}[{fc.array_index}]'
+        variables = tuple(single_prop_variable(next(keygen), ob.type, id, spec.path) for spec in column)
+        params = "+".join(variable.name for variable in variables)
+        fx.append(DriverSpec(id, dp, i, 'SCRIPTED', f'({params})/{float(len(variables))}', variables))
 
-            params.append(var.name)
+    return IDPropertySpec(id, pk, len(fx)), fx
 
-        dr_avg.type = 'SCRIPTED'
-        dr_avg.expression = f'({"+".join(params)})/{float(len(params))}'
-        fx.append(fc_avg)
 
-    idprop_array_ensure(id, pk, len(fx))
-    return fx
-
-
-def ipw_norm_remove(rbfn: 'RBFDriver') -> None:
-    name = ipw_norm_idprop(rbfn)
-    idprop_remove(rbfn.id_data.data, name)
-
-
-def wgt_infl_assign(rbfn: 'RBFDriver', fx: Sequence['FCurve']) -> None:
-    for fc, pose in zip(fx, rbfn.poses):
-        dr = fc.driver
+def wgt_infl_specs(rbfn: 'RBFDriver', fx: Sequence[DriverSpec]) -> List[DriverSpec]:
+    result = []
+    for spec, pose in zip(fx, rbfn.poses):
         pi = pose.influence
+        variable = single_prop_variable("i_", pi.id_type, pi.id, pi.data_path)
+        result.append(driver_spec_extend(spec, (variable,), expression=f'i_*({spec.expression})'))
+    return result
 
-        var = dr.variables.new()
-        var.type = 'SINGLE_PROP'
-        var.name = 'i_'
-
-        tgt = var.targets[0]
-        tgt.id_type = pi.id_type
-        tgt.id = pi.id
-        tgt.data_path = pi.data_path
 
-        dr.expression = f'{var.name}*({dr.expression})'
-
-
-def wgt_cmap_assign(rbfn: 'RBFDriver', fx: Sequence['FCurve']) -> None:
+def wgt_cmap_specs(rbfn: 'RBFDriver', fx: Sequence[DriverSpec]) -> List[DriverSpec]:
     dft = rbfn.interpolation.curve.points
-    for fc, pose in zip(fx, rbfn.poses):
+    result = []
+    for spec, pose in zip(fx, rbfn.poses):
         opt = pose.interpolation
         pts = opt.curve.points if opt.use_curve else dft
-        keyframe_points_assign(fc.keyframe_points, to_bezier(pts, extrapolate=False))
+        keyframes = keyframes_from_bezier(to_bezier(pts, extrapolate=False))
+        result.append(driver_spec_extend(spec, keyframes=keyframes))
+    return result
 
 
 def wgt_summ_idprop(rbfn: 'RBFDriver') -> str:
     return f'rbfn_wsum_{rbfn.identifier}'
 
 
-def wgt_summ_update(rbfn: 'RBFDriver', wgts: Sequence['FCurve']) -> 'FCurve':
+def wgt_snode_idprop(rbfn: 'RBFDriver') -> str:
+    return f'rbfn_wsnd_{rbfn.identifier}'
+
 
+def wgt_summ_specs(rbfn: 'RBFDriver', wgts: Sequence[DriverSpec]) -> Tuple[DriverSpecSet, DriverSpec]:
     ob = rbfn.id_data
     id = ob.data
-
     name = wgt_summ_idprop(rbfn)
-    id[name] = 0.0
-
-    fc = driver_ensure(id, f'["{name}"]')
-    dr = fc.driver
-    dr.type = 'SUM'
-
-    for wgt, var in zip(wgts, driver_variables_ensure(dr.variables, len(wgts))):
-        var.type = 'SINGLE_PROP'
-        var.name = f'w{wgt.array_index}'
-
-        tgt = var.targets[0]
-        tgt.id_type = ob.type
-        tgt.id = wgt.id_data
-        tgt.data_path = f'{wgt.data_path}[{wgt.array_index}]'
-
-    return fc
-
-
-def wgt_summ_remove(rbfn: 'RBFDriver') -> None:
-    key = wgt_summ_idprop(rbfn)
-    idprop_remove(rbfn.id_data.data, key, remove_drivers=True)
+    tree = reduction_tree_specs(DriverSpec(id, f'["{name}"]'),
+                                ob.type,
+                                id,
+                                [(wgt.path,) for wgt in wgts],
+                                wgt_snode_idprop(rbfn))
+    return DriverSpecSet((IDPropertySpec(id, name),)) + tree, tree.drivers[-1]
 
 
 def wgt_norm_idprop(rbfn: 'RBFDriver') -> str:
     return f'rbfn_norm_{rbfn.identifier}'
 
 
-def wgt_norm_update(rbfn: 'RBFDriver', wgts: Sequence['FCurve'], wsum: 'FCurve') -> Sequence['FCurve']:
-
+def wgt_norm_specs(rbfn: 'RBFDriver',
+                   wgts: Sequence[DriverSpec],
+                   wsum: DriverSpec) -> Tuple[IDPropertySpec, List[DriverSpec]]:
     ob = rbfn.id_data
     id = ob.data
     fx = []
@@ -420,98 +312,104 @@ def wgt_norm_update(rbfn: 'RBFDriver', wgts: Sequence['FCurve'], wsum: 'FCurve')
     name = wgt_norm_idprop(rbfn)
     path = f'["{name}"]'
 
-    idprop_array_ensure(id, name, len(wgts), remove_drivers=True)
-    
     for wgt in wgts:
-        fc = driver_ensure(id, path, wgt.array_index)
-        dr = fc.driver
-        dr.type = 'SCRIPTED'
-        dr.expression = "w / s if s != 0.0 else w"
-        
-        vars = driver_variables_ensure(dr.variables, 2)
-
-        w = vars[0]
-        w.type = 'SINGLE_PROP'
-        w.name = "w"
-
-        tgt = w.targets[0]
-        tgt.id_type = ob.type
-        tgt.id = wgt.id_data
-        tgt.data_path = f'{wgt.data_path}[{wgt.array_index}]'
+        variables = (single_prop_variable("w", ob.type, wgt.id, wgt.path),
+                     single_prop_variable("s", ob.type, wsum.id, wsum.path))
+        fx.append(DriverSpec(id, path, wgt.array_index, 'SCRIPTED', "w / s if s != 0.0 else w", variables))
 
-        s = vars[1]
-        s.type = 'SINGLE_PROP'
-        s.name = "s"
+    return IDPropertySpec(id, name, len(wgts)), fx
 
-        tgt = s.targets[0]
-        tgt.id_type = ob.type
-        tgt.id = wsum.id_data
-        tgt.data_path = wsum.data_path
 
-        fx.append(fc)
+def pose_weight_driver_specs(rbfn: 'RBFDriver') -> Tuple[DriverSpecSet, Tuple[DriverSpec, ...]]:
+    '''
+    Returns the driver specs for an RBF driver's pose weights along with the specs of the
+    drivers holding the final weight of each pose. Reads but never modifies Blender data.
+    '''
+    id = rbfn.id_data.data
+    dist, rows = ipw_dist_specs(rbfn)
+
+    if not rows or not rows[0]:
+        zero, fx = ipw_zero_specs(rbfn)
+        removed = tuple(IDPropertySpec(id, fn(rbfn)) for fn in (ipw_cse_idprop,
+                                                               ipw_norm_idprop,
+                                                               wgt_summ_idprop,
+                                                               wgt_snode_idprop,
+                                                               wgt_norm_idprop))
+        return DriverSpecSet((zero,), tuple(fx), removed), tuple(fx)
+
+    shared, rows = ipw_cse_specs(rbfn, rows)
+    properties = [dist]
+    removed = []
+
+    if len(rows) == 1:
+        drivers = []
+        removed.append(IDPropertySpec(id, ipw_norm_idprop(rbfn)))
+        fx = rows[0]
+    else:
+        drivers = [spec for row in rows for spec in row]
+        norm, fx = ipw_norm_specs(rbfn, rows)
+        properties.append(norm)
 
-    return fx
+    fx = wgt_cmap_specs(rbfn, wgt_infl_specs(rbfn, fx))
+    summ, wsum = wgt_summ_specs(rbfn, fx)
+    norm, wgts = wgt_norm_specs(rbfn, fx, wsum)
 
+    properties.append(norm)
+    drivers.extend(fx)
+    drivers.extend(wgts)
 
-def wgt_norm_remove(rbfn: 'RBFDriver') -> None:
-    name = wgt_norm_idprop(rbfn)
-    idprop_remove(rbfn.id_data.data, name, remove_drivers=True)
+    specs = shared + DriverSpecSet(tuple(properties), tuple(drivers), tuple(removed)) + summ
+    specs = driver_spec_set_optimize(specs)
+    specs = driver_spec_set_simplify(specs)
+    specs = driver_spec_set_lower(specs)
+    return specs, tuple(wgts)
 
 
-def pose_weight_drivers_update(rbfn: 'RBFDriver') -> None:
+def pose_weight_drivers_rebuild_key(rbfn: 'RBFDriver') -> Hashable:
+    return (pose_weight_drivers_update, owner_key(rbfn))
 
-    fx = ipw_dist_update(rbfn)
 
-    if not fx.size:
-        ipw_norm_remove(rbfn)
-        wgt_summ_remove(rbfn)
-        wgt_norm_remove(rbfn)
-        fx = ipw_zero_ensure(rbfn)
-    else:
-        if len(fx) == 1:
-            fx = fx[0]
-            ipw_norm_remove(rbfn)
-        else:
-            fx = ipw_norm_update(rbfn, fx)
+def pose_weight_drivers_rebuild(rbfn: 'RBFDriver') -> None:
+    '''Requests a pose weight driver update that runs once per dispatch cycle'''
+    rebuild(pose_weight_drivers_rebuild_key(rbfn), pose_weight_drivers_update, rbfn)
 
-        wgt_infl_assign(rbfn, fx)
-        wgt_cmap_assign(rbfn, fx)
-        fx = wgt_norm_update(rbfn, fx, wgt_summ_update(rbfn, fx))
 
-    for pose, fc in zip(rbfn.poses, fx):
+def pose_weight_drivers_update(rbfn: 'RBFDriver') -> DriverSyncReport:
+    specs, weights = pose_weight_driver_specs(rbfn)
+    report = driver_spec_set_sync(specs)
+    log.debug(f'Synchronized pose weight drivers for {rbfn}: {report}')
+    for pose, spec in zip(rbfn.poses, weights):
         prop = pose.weight
-        prop["name"] = fc.data_path[2:-2]
-        prop["array_index"] = fc.array_index
+        name = spec.data_path[2:-2]
+        if prop.get("name") != name:
+            prop["name"] = name
+        if prop.get("array_index") != spec.array_index:
+            prop["array_index"] = spec.array_index
+    return report
 
 
-@event_handler(InputTargetBoneTargetUpdateEvent,
-               InputTargetDataPathUpdateEvent,
-               InputTargetIDTypeUpdateEvent,
-               InputTargetObjectUpdateEvent,
-               InputTargetRotationModeUpdateEvent,
-               InputTargetTransformSpaceUpdateEvent,
-               InputTargetTransformTypeUpdateEvent)
+@event_handler(InputTargetPropertyUpdateEvent)
 def on_input_target_property_update(event: InputTargetPropertyUpdateEvent) -> None:
     '''
     Updates pose weight drivers when input target properties change. Note that the
     input target property handlers screen invalid property updates based on the input
     type so no checking is required here.
     '''
-    pose_weight_drivers_update(owner_resolve(event.target, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.target, ".inputs"))
 
 
 @event_handler(InputVariableIsEnabledUpdateEvent)
 def on_input_variable_is_enabled_update(event: InputVariableIsEnabledUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.variable, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.variable, ".inputs"))
 
 
 @event_handler(InputVariableNameUpdateEvent)
 def on_input_variable_name_update(event: InputVariableNameUpdateEvent) -> None:
     input: 'Input' = owner_resolve(event.variable, ".variables")
     if input.type == 'SHAPE_KEY':
-        pose_weight_drivers_update(owner_resolve(input, ".inputs"))
+        pose_weight_drivers_rebuild(owner_resolve(input, ".inputs"))
 
 
 @event_handler(InputVariableTypeUpdateEvent)
@@ -521,119 +419,119 @@ def on_input_variable_type_update(event: InputVariableTypeUpdateEvent) -> None:
     update handlers on the input variable screen invalid update notifications based
     on the input type so no checking is required here.
     '''
-    pose_weight_drivers_update(owner_resolve(event.variable, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.variable, ".inputs"))
 
 
 @event_handler(InputNewEvent)
 def on_input_new(event: InputNewEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputRemovedEvent)
 def on_input_removed(event: InputRemovedEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.inputs, "."))
+    pose_weight_drivers_rebuild(owner_resolve(event.inputs, "."))
 
 
 @event_handler(InputBoneTargetUpdateEvent)
 def on_input_InputBoneTargetUpdate(event: InputBoneTargetUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputDataTypeUpdateEvent)
 def on_input_InputDataTypeUpdate(event: InputDataTypeUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputObjectUpdateEvent)
 def on_input_InputObjectUpdate(event: InputObjectUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputRotationAxisUpdateEvent)
 def on_input_InputRotationAxisUpdate(event: InputRotationAxisUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputTransformSpaceChangeEvent)
 def on_input_InputTransformSpaceChange(event: InputTransformSpaceChangeEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputTypeUpdateEvent)
 def on_input_InputTypeUpdate(event: InputTypeUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputUseSwingUpdateEvent)
 def on_input_InputUseSwingUpdate(event: InputUseSwingUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(InputRotationModeChangeEvent)
 def on_input_rotation_mode_change(event: InputRotationModeChangeEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.input, ".inputs"))
+    pose_weight_drivers_rebuild(owner_resolve(event.input, ".inputs"))
 
 
 @event_handler(PoseInterpolationUpdateEvent)
 def on_pose_interpolation_update(event: PoseInterpolationUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.interpolation, ".poses"))
+    pose_weight_drivers_rebuild(owner_resolve(event.interpolation, ".poses"))
 
 
 @event_handler(PoseMoveEvent)
 def on_pose_move(event: PoseMoveEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.pose, ".poses"))
+    pose_weight_drivers_rebuild(owner_resolve(event.pose, ".poses"))
 
 
 @event_handler(PoseNewEvent)
 def on_pose_new(event: PoseNewEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.pose, ".poses"))
+    pose_weight_drivers_rebuild(owner_resolve(event.pose, ".poses"))
 
 
 @event_handler(PoseRemovedEvent)
 def on_pose_removed(event: PoseRemovedEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.poses, "."))
+    pose_weight_drivers_rebuild(owner_resolve(event.poses, "."))
 
 
 @event_handler(PoseUpdateEvent)
 def on_pose_update(event: PoseUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.pose, ".poses"))
+    pose_weight_drivers_rebuild(owner_resolve(event.pose, ".poses"))
 
 
 @event_handler(DriverInterpolationUpdateEvent)
 def on_driver_interpolation_update(event: DriverInterpolationUpdateEvent) -> None:
     '''
     '''
-    pose_weight_drivers_update(owner_resolve(event.interpolation, "."))
+    pose_weight_drivers_rebuild(owner_resolve(event.interpolation, "."))
 
 
 @event_handler(DriverDisposableEvent)
@@ -641,6 +539,12 @@ def on_driver_disposable(event: DriverDisposableEvent) -> None:
     '''
     '''
     rbfn: 'RBFDriver' = event.driver
+    rebuild_cancel(pose_weight_drivers_rebuild_key(rbfn))
     id = rbfn.id_data.data
-    for fn in (ipw_dist_idprop, ipw_norm_idprop, wgt_summ_idprop, wgt_norm_idprop):
-        idprop_remove(id, fn(rbfn), remove_drivers=True)
+    for fn in (ipw_dist_idprop,
+               ipw_cse_idprop,
+               ipw_norm_idprop,
+               wgt_summ_idprop,
+               wgt_snode_idprop,
+               wgt_norm_idprop):
+        idprop_spec_remove(IDPropertySpec(id, fn(rbfn)))
@@ -0,0 +1,154 @@
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+import numpy as np
+if TYPE_CHECKING:
+    from ..api.input import Input
+
+RadiusStrategy = Callable[..., np.ndarray]
+
+#region Strategies
+#--------------------------------------------------------------------------------------------------
+
+def neighbour_distances(matrix: np.ndarray,
+                        tolerance: Optional[float]=0.001,
+                        rows: Optional[np.ndarray]=None) -> np.ndarray:
+    '''
+    Returns a copy of the distance matrix (or of the given rows) with coincident distances, i.e.
+    those within tolerance of zero, replaced by inf so that they drop out of any reduction.
+    '''
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(matrix), -1)
+    if rows is not None:
+        matrix = matrix[rows]
+    return np.where(np.abs(matrix) > tolerance, matrix, np.inf)
+
+
+def radii_nearest(matrix: np.ndarray,
+                  tolerance: Optional[float]=0.001,
+                  rows: Optional[np.ndarray]=None,
+                  **_) -> np.ndarray:
+    '''Distance from each pose to its nearest non-coincident pose or 0.0 where there is none'''
+    distances = neighbour_distances(matrix, tolerance, rows)
+    result = distances.min(axis=1, initial=np.inf)
+    result[np.isinf(result)] = 0.0
+    return result
+
+
+def radii_kth_nearest(matrix: np.ndarray,
+                      tolerance: Optional[float]=0.001,
+                      rows: Optional[np.ndarray]=None,
+                      neighbours: Optional[int]=1,
+                      **_) -> np.ndarray:
+    '''
+    Distance from each pose to its k-th nearest non-coincident pose. Poses with fewer than k
+    neighbours use their furthest neighbour, and poses with none are given 0.0.
+    '''
+    distances = neighbour_distances(matrix, tolerance, rows)
+    count = distances.shape[1]
+    if count == 0:
+        return np.zeros(len(distances), dtype=float)
+    k = min(max(int(neighbours), 1), count)
+    result = np.partition(distances, k - 1, axis=1)[:, k - 1]
+    missing = np.isinf(result)
+    if missing.any():
+        finite = np.where(np.isinf(distances[missing]), -np.inf, distances[missing])
+        furthest = finite.max(axis=1)
+        furthest[np.isinf(furthest)] = 0.0
+        result[missing] = furthest
+    return result
+
+
+def radii_mean_nearest(matrix: np.ndarray,
+                       tolerance: Optional[float]=0.001,
+                       rows: Optional[np.ndarray]=None,
+                       neighbours: Optional[int]=1,
+                       **_) -> np.ndarray:
+    '''
+    Mean distance from each pose to its k nearest non-coincident poses (or to as many as it
+    has) or 0.0 where there are none.
+    '''
+    distances = neighbour_distances(matrix, tolerance, rows)
+    count = distances.shape[1]
+    if count == 0:
+        return np.zeros(len(distances), dtype=float)
+    k = min(max(int(neighbours), 1), count)
+    nearest = np.partition(distances, k - 1, axis=1)[:, :k]
+    finite = np.isfinite(nearest)
+    total = np.where(finite, nearest, 0.0).sum(axis=1)
+    found = finite.sum(axis=1)
+    return np.divide(total, found, out=np.zeros(len(total), dtype=float), where=found > 0)
+
+
+def radii_constant(matrix: np.ndarray,
+                   tolerance: Optional[float]=0.001,
+                   rows: Optional[np.ndarray]=None,
+                   value: Optional[float]=0.0,
+                   **_) -> np.ndarray:
+    '''
+    A single radius shared by every pose. Uses value when it is positive, otherwise the mean
+    nearest-neighbour distance across all poses that have a neighbour.
+    '''
+    size = len(matrix) if rows is None else len(np.arange(len(matrix))[rows])
+    if value <= 0.0:
+        nearest = radii_nearest(matrix, tolerance)
+        nearest = nearest[nearest > 0.0]
+        value = float(nearest.mean()) if len(nearest) else 0.0
+    return np.full(size, value, dtype=float)
+
+
+RADIUS_STRATEGIES: Dict[str, RadiusStrategy] = {
+    'NEAREST'     : radii_nearest,
+    'KTH_NEAREST' : radii_kth_nearest,
+    'MEAN_NEAREST': radii_mean_nearest,
+    'CONSTANT'    : radii_constant,
+    }
+
+#endregion Strategies
+
+#region Utilities
+#--------------------------------------------------------------------------------------------------
+
+def radius_strategy(name: str) -> RadiusStrategy:
+    try:
+        return RADIUS_STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f'Unknown radius strategy "{name}"') from None
+
+
+def radius_strategy_is_local(name: str) -> bool:
+    '''
+    True if each radius only depends on the pose's nearest neighbour, in which case only the
+    radii flagged by DistanceMatrix edits need to be recomputed.
+    '''
+    return name == 'NEAREST'
+
+
+def pose_radii(matrix: np.ndarray,
+               strategy: Optional[str]='NEAREST',
+               tolerance: Optional[float]=0.001,
+               rows: Optional[np.ndarray]=None,
+               neighbours: Optional[int]=1,
+               value: Optional[float]=0.0) -> np.ndarray:
+    '''
+    Computes pose radii from a square distance matrix (or for the given rows of it) in a single
+    vectorized reduction using the named strategy.
+    '''
+    return radius_strategy(strategy)(matrix,
+                                     tolerance=tolerance,
+                                     rows=rows,
+                                     neighbours=neighbours,
+                                     value=value)
+
+
+def input_radius_strategy(input_: 'Input') -> Tuple[str, int, float]:
+    return input_.radius_strategy, input_.radius_neighbours, input_.radius_value
+
+
+def input_pose_radii(input_: 'Input',
+                     matrix: np.ndarray,
+                     rows: Optional[np.ndarray]=None,
+                     tolerance: Optional[float]=0.001) -> np.ndarray:
+    strategy, neighbours, value = input_radius_strategy(input_)
+    return pose_radii(matrix, strategy, tolerance, rows, neighbours, value)
+
+#endregion Utilities
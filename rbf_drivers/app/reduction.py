@@ -0,0 +1,135 @@
+'''
+Balanced reduction trees for sums and dot products with more operands than a single driver
+should hold.
+
+Each node is a driver summing at most fan_out terms. Leaf nodes sum the products of the input
+terms and upper nodes sum the outputs of the level below, so the depth of the driver graph grows
+as log(N) with the number of terms. Intermediate node values are stored in a single float array
+ID property.
+'''
+
+from dataclasses import replace
+from typing import Any, List, Optional, Sequence, Tuple
+from .driver_spec import (DriverSpec,
+                          DriverSpecSet,
+                          DriverVariableSpec,
+                          IDPropertySpec,
+                          single_prop_variable)
+from .utils import DriverVariableNameGenerator
+
+# Default number of terms summed by a single driver
+MAX_PARAMS = 32
+
+#region Layout
+#--------------------------------------------------------------------------------------------------
+
+def balanced_blocks(count: int, fan_out: Optional[int]=MAX_PARAMS) -> List[Tuple[int, int]]:
+    '''
+    Splits count items into the fewest blocks of at most fan_out items, with block sizes that
+    differ by at most one. Returns (start, stop) pairs.
+    '''
+    if fan_out < 2:
+        raise ValueError(f'Reduction fan-out must be at least 2, not {fan_out}')
+    if count <= 0:
+        return []
+    blocks = -(-count // fan_out)
+    size, extra = divmod(count, blocks)
+    result = []
+    start = 0
+    for index in range(blocks):
+        stop = start + size + (index < extra)
+        result.append((start, stop))
+        start = stop
+    return result
+
+
+def reduction_levels(count: int, fan_out: Optional[int]=MAX_PARAMS) -> List[List[Tuple[int, int]]]:
+    '''
+    Returns the blocks of each level of a balanced reduction of count terms, from the leaves up.
+    The last level always has a single block, which is the root.
+    '''
+    levels = [balanced_blocks(count, fan_out)]
+    while len(levels[-1]) > 1:
+        levels.append(balanced_blocks(len(levels[-1]), fan_out))
+    return levels
+
+
+def reduction_depth(count: int, fan_out: Optional[int]=MAX_PARAMS) -> int:
+    return len(reduction_levels(count, fan_out)) if count > 0 else 0
+
+#endregion Layout
+
+#region Specs
+#--------------------------------------------------------------------------------------------------
+
+def reduction_node_spec(template: DriverSpec,
+                        id_type: str,
+                        id: Any,
+                        terms: Sequence[Sequence[str]],
+                        scale: Optional[str]="") -> DriverSpec:
+    '''
+    Returns a copy of template driving the sum of the products of terms (each a sequence of data
+    paths on id), optionally multiplied by the value at the scale data path. Plain sums use the
+    native SUM driver type.
+    '''
+    keygen = DriverVariableNameGenerator()
+    variables: List[DriverVariableSpec] = []
+    products = []
+
+    for term in terms:
+        names = []
+        for path in term:
+            name = next(keygen)
+            names.append(name)
+            variables.append(single_prop_variable(name, id_type, id, path))
+        products.append("*".join(names))
+
+    if not scale and all(len(term) == 1 for term in terms):
+        return replace(template, type='SUM', expression="", variables=tuple(variables))
+
+    expression = "+".join(products) or "0.0"
+    if scale:
+        name = next(keygen)
+        variables.append(single_prop_variable(name, id_type, id, scale))
+        expression = f'{name}*({expression})'
+
+    return replace(template, type='SCRIPTED', expression=expression, variables=tuple(variables))
+
+
+def reduction_tree_specs(root: DriverSpec,
+                         id_type: str,
+                         id: Any,
+                         terms: Sequence[Sequence[str]],
+                         nodes: str,
+                         fan_out: Optional[int]=MAX_PARAMS,
+                         scale: Optional[str]="") -> DriverSpecSet:
+    '''
+    Returns the specs for a balanced reduction tree computing the sum of the products of terms
+    and writing it to root's fcurve (root supplies the target and any mute state). Intermediate
+    results are stored in the float array ID property named nodes on id, which is removed when
+    the terms fit in a single driver.
+    '''
+    levels = reduction_levels(len(terms), fan_out)
+    node_count = sum(map(len, levels[:-1]))
+
+    if node_count == 0:
+        spec = reduction_node_spec(root, id_type, id, terms, scale)
+        return DriverSpecSet(drivers=(spec,), removed=(IDPropertySpec(id, nodes),))
+
+    storage = IDPropertySpec(id, nodes, node_count)
+    template = DriverSpec(id, storage.data_path)
+    drivers: List[DriverSpec] = []
+    operands = terms
+
+    for level in levels[:-1]:
+        paths = []
+        for start, stop in level:
+            spec = reduction_node_spec(replace(template, array_index=len(drivers)), id_type, id, operands[start:stop])
+            drivers.append(spec)
+            paths.append((spec.path,))
+        operands = paths
+
+    drivers.append(reduction_node_spec(root, id_type, id, operands, scale))
+    return DriverSpecSet(properties=(storage,), drivers=tuple(drivers))
+
+#endregion Specs
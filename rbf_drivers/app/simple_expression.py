@@ -0,0 +1,259 @@
+'''
+Checks driver expressions against the subset of Python that Blender evaluates natively.
+
+Blender only evaluates a scripted driver without Python (and without requiring scripts to be
+trusted) when its expression is a "simple expression": numeric literals, driver variables, a
+fixed set of math functions and constants, arithmetic, comparison and boolean operators and
+conditional expressions. Anything else falls back to the Python interpreter. This module reports
+non-simple constructs and rewrites the ones that have an equivalent simple form.
+'''
+
+import ast
+import math
+from dataclasses import dataclass, replace
+from logging import getLogger
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from .driver_spec import DriverSpec, DriverSpecSet
+
+log = getLogger("rbf_drivers")
+
+# Functions available to simple expressions and the argument counts they accept
+SIMPLE_FUNCTIONS: Dict[str, FrozenSet[int]] = {
+    "abs"       : frozenset({1}),
+    "acos"      : frozenset({1}),
+    "asin"      : frozenset({1}),
+    "atan"      : frozenset({1}),
+    "atan2"     : frozenset({2}),
+    "ceil"      : frozenset({1}),
+    "clamp"     : frozenset({1, 3}),
+    "cos"       : frozenset({1}),
+    "degrees"   : frozenset({1}),
+    "exp"       : frozenset({1}),
+    "fabs"      : frozenset({1}),
+    "floor"     : frozenset({1}),
+    "fmod"      : frozenset({2}),
+    "int"       : frozenset({1}),
+    "lerp"      : frozenset({3}),
+    "log"       : frozenset({1, 2}),
+    "max"       : frozenset({2}),
+    "min"       : frozenset({2}),
+    "pow"       : frozenset({2}),
+    "radians"   : frozenset({1}),
+    "round"     : frozenset({1}),
+    "sin"       : frozenset({1}),
+    "smoothstep": frozenset({3}),
+    "sqrt"      : frozenset({1}),
+    "tan"       : frozenset({1}),
+    "trunc"     : frozenset({1}),
+    }
+
+# Functions that also accept any number of arguments beyond their largest listed count
+SIMPLE_VARIADIC_FUNCTIONS = frozenset({"max", "min"})
+
+SIMPLE_CONSTANTS = frozenset({"pi", "True", "False"})
+
+# Names Blender adds to every driver's namespace
+SIMPLE_NAMES = frozenset({"frame"})
+
+SIMPLE_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div)
+
+SIMPLE_UNARY_OPERATORS = (ast.USub, ast.Not)
+
+# Constants of the Python driver namespace that simple expressions do not define
+REWRITE_CONSTANTS: Dict[str, float] = {
+    "e"  : math.e,
+    "tau": math.tau,
+    }
+
+# Integer literals beyond this can not be represented exactly by the evaluator's doubles
+MAX_EXACT_INTEGER = 2 ** 53
+
+
+@dataclass(frozen=True)
+class ExpressionCheck:
+    expression: str
+    issues: Tuple[str, ...] = ()
+
+    @property
+    def is_simple(self) -> bool:
+        return len(self.issues) == 0
+
+#region Checking
+#--------------------------------------------------------------------------------------------------
+
+def _literal_issue(node: ast.Constant) -> Optional[str]:
+    value = node.value
+    if isinstance(value, bool):
+        return None
+    if not isinstance(value, (int, float)):
+        return f'unsupported literal {value!r}'
+    if not math.isfinite(value):
+        return f'non-finite literal {value!r}'
+    if isinstance(value, int) and abs(value) > MAX_EXACT_INTEGER:
+        return f'oversized literal {value}'
+    return None
+
+
+def _argument_count_valid(name: str, count: int) -> bool:
+    counts = SIMPLE_FUNCTIONS[name]
+    return count in counts or (name in SIMPLE_VARIADIC_FUNCTIONS and count > max(counts))
+
+
+def expression_issues(expression: str, names: Iterable[str]=()) -> List[str]:
+    '''
+    Returns descriptions of the constructs in expression that prevent Blender from evaluating it
+    as a simple expression. names are the driver's variable names.
+    '''
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as error:
+        return [f'syntax error ({error.msg})']
+
+    names = SIMPLE_NAMES.union(names)
+    issues = []
+    callees = {id(node.func) for node in ast.walk(tree.body) if isinstance(node, ast.Call)}
+
+    for node in ast.walk(tree.body):
+        if id(node) in callees:
+            continue
+        if isinstance(node, ast.Constant):
+            issue = _literal_issue(node)
+            if issue:
+                issues.append(issue)
+        elif isinstance(node, ast.Name):
+            if node.id not in names and node.id not in SIMPLE_CONSTANTS and node.id not in SIMPLE_FUNCTIONS:
+                issues.append(f'unknown name "{node.id}"')
+        elif isinstance(node, ast.BinOp):
+            if not isinstance(node.op, SIMPLE_OPERATORS):
+                issues.append(f'unsupported operator {type(node.op).__name__}')
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, SIMPLE_UNARY_OPERATORS):
+                issues.append(f'unsupported operator {type(node.op).__name__}')
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if not isinstance(func, ast.Name) or func.id in names:
+                issues.append(f'unsupported call "{ast.unparse(func)}"')
+            elif func.id not in SIMPLE_FUNCTIONS:
+                issues.append(f'unsupported function "{func.id}"')
+            elif node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+                issues.append(f'unsupported arguments to "{func.id}"')
+            elif not _argument_count_valid(func.id, len(node.args)):
+                issues.append(f'unsupported argument count {len(node.args)} for "{func.id}"')
+        elif not isinstance(node, (ast.BoolOp, ast.Compare, ast.IfExp,
+                                   ast.boolop, ast.cmpop, ast.operator, ast.unaryop,
+                                   ast.expr_context)):
+            issues.append(f'unsupported construct {type(node).__name__}')
+
+    return issues
+
+
+def expression_check(expression: str, names: Iterable[str]=()) -> ExpressionCheck:
+    return ExpressionCheck(expression, tuple(expression_issues(expression, names)))
+
+
+def driver_spec_check(spec: DriverSpec) -> ExpressionCheck:
+    '''Checks a scripted driver spec. Other driver types are always evaluated natively.'''
+    if spec.type != 'SCRIPTED':
+        return ExpressionCheck(spec.expression)
+    return expression_check(spec.expression, (variable.name for variable in spec.variables))
+
+#endregion Checking
+
+#region Rewriting
+#--------------------------------------------------------------------------------------------------
+
+def _call(name: str, args: List[ast.expr], node: ast.AST) -> ast.Call:
+    return ast.copy_location(ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[]), node)
+
+
+class SimpleExpressionRewriter(ast.NodeTransformer):
+    '''Rewrites non-simple constructs that have an equivalent simple form'''
+
+    def __init__(self, names: Iterable[str]=()) -> None:
+        self.names = SIMPLE_NAMES.union(names)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id not in self.names and node.id in REWRITE_CONSTANTS:
+            return ast.copy_location(ast.Constant(value=REWRITE_CONSTANTS[node.id]), node)
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        value = node.value
+        if isinstance(value, int) and not isinstance(value, bool) and abs(value) > MAX_EXACT_INTEGER:
+            return ast.copy_location(ast.Constant(value=float(value)), node)
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.UAdd):
+            return node.operand
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return _call("pow", [node.left, node.right], node)
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        func = node.func
+
+        # math.sin(x) -> sin(x)
+        if (isinstance(func, ast.Attribute)
+            and isinstance(func.value, ast.Name)
+            and func.value.id == "math"
+            and "math" not in self.names
+            ):
+            func = node.func = ast.copy_location(ast.Name(id=func.attr, ctx=ast.Load()), func)
+
+        if not isinstance(func, ast.Name) or func.id in self.names or node.keywords:
+            return node
+
+        name = func.id
+        args = node.args
+
+        if name == "hypot" and len(args) == 2:
+            a, b = args
+            terms = ast.BinOp(left=ast.BinOp(left=a, op=ast.Mult(), right=a),
+                              op=ast.Add(),
+                              right=ast.BinOp(left=b, op=ast.Mult(), right=b))
+            return _call("sqrt", [ast.copy_location(terms, node)], node)
+
+        return node
+
+
+def expression_simplify(expression: str, names: Iterable[str]=()) -> str:
+    '''
+    Returns expression with non-simple constructs rewritten into equivalent simple forms where
+    possible, or expression unchanged if it can not be parsed.
+    '''
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        log.warning(f'Failed to parse driver expression "{expression}"')
+        return expression
+    tree = SimpleExpressionRewriter(names).visit(tree)
+    return ast.unparse(ast.fix_missing_locations(tree))
+
+
+def driver_spec_simplify(spec: DriverSpec) -> DriverSpec:
+    if spec.type != 'SCRIPTED' or not spec.expression:
+        return spec
+
+    names = [variable.name for variable in spec.variables]
+    if not expression_issues(spec.expression, names):
+        return spec
+
+    expression = expression_simplify(spec.expression, names)
+    issues = expression_issues(expression, names)
+    if issues:
+        log.warning(f'Driver {spec.path} can not be evaluated as a simple expression: {"; ".join(issues)}')
+
+    return replace(spec, expression=expression)
+
+
+def driver_spec_set_simplify(specs: DriverSpecSet) -> DriverSpecSet:
+    return replace(specs, drivers=tuple(map(driver_spec_simplify, specs.drivers)))
+
+#endregion Rewriting
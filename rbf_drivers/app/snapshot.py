@@ -0,0 +1,135 @@
+'''
+Persisted snapshots of the derived distance data of an input.
+
+The incrementally maintained DistanceMatrix of an input only lives in memory, so after a file is
+opened the first edit to each input rebuilds its matrix from scratch. A snapshot stores the
+state needed to restore it in a single float array ID property next to the input's other
+properties: a versioned header, the (N, D) samples and the nearest neighbour distances. The
+(N, N) distances are not duplicated, they are read from the condensed distance property the
+pose weight drivers already use. The header holds a digest of the samples, the distances and the
+distance settings, and a snapshot is only restored when the digest matches, so a stale or
+corrupt snapshot falls back to recalculation.
+
+A float IDPropertyArray stores doubles and supports the buffer protocol, so snapshots are read
+without copying the property.
+'''
+
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+import numpy as np
+from .distance import DistanceMatrix, condensed_size, squareform
+from .idprop import idprop_assign, idprop_delete, idprop_isarray, idprop_view
+if TYPE_CHECKING:
+    from bpy.types import ID
+
+SNAPSHOT_MAGIC = 0x52424653 # "RBFS"
+
+SNAPSHOT_VERSION = 1
+
+# magic, version, 4 digest words, sample count, sample size
+SNAPSHOT_HEADER_SIZE = 8
+
+SNAPSHOT_DIGEST_SIZE = 16
+
+Digest = Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    digest: Digest
+    # (N, D) samples
+    data: np.ndarray
+    # (N,) nearest non-coincident neighbour distances, inf where there is none
+    nearest: np.ndarray
+
+
+def snapshot_digest(data: np.ndarray,
+                    distances: np.ndarray,
+                    metric: str,
+                    axis: Optional[str],
+                    tolerance: float) -> Digest:
+    '''Digest of everything a snapshot's derived data depends on, as four 32-bit words'''
+    hash = blake2b(digest_size=SNAPSHOT_DIGEST_SIZE)
+    hash.update(f'{metric}:{axis}:{tolerance!r}:{data.shape}'.encode())
+    hash.update(np.ascontiguousarray(data, dtype=float).tobytes())
+    hash.update(np.ascontiguousarray(distances, dtype=float).tobytes())
+    return tuple(np.frombuffer(hash.digest(), dtype="<u4").tolist())
+
+
+def snapshot_encode(digest: Digest, data: np.ndarray, nearest: np.ndarray) -> np.ndarray:
+    count, size = data.shape
+    header = (SNAPSHOT_MAGIC, SNAPSHOT_VERSION) + tuple(digest) + (count, size)
+    return np.concatenate((np.array(header, dtype=float), data.ravel(), nearest))
+
+
+def snapshot_decode(buffer: np.ndarray) -> Optional[Snapshot]:
+    '''Returns the snapshot encoded in buffer as views of it, or None if it is not valid'''
+    if len(buffer) < SNAPSHOT_HEADER_SIZE:
+        return None
+
+    header = buffer[:SNAPSHOT_HEADER_SIZE].tolist()
+    if header[0] != SNAPSHOT_MAGIC or header[1] != SNAPSHOT_VERSION:
+        return None
+
+    count, size = int(header[6]), int(header[7])
+    end = SNAPSHOT_HEADER_SIZE + count * size
+    if count < 0 or size < 0 or len(buffer) != end + count:
+        return None
+
+    return Snapshot(tuple(int(word) for word in header[2:6]),
+                    buffer[SNAPSHOT_HEADER_SIZE:end].reshape(count, size),
+                    buffer[end:])
+
+
+def snapshot_read(id_: 'ID', name: str) -> Optional[Snapshot]:
+    prop = id_.get(name)
+    if idprop_isarray(prop):
+        return snapshot_decode(idprop_view(prop))
+
+
+def snapshot_write(id_: 'ID',
+                   name: str,
+                   matrix: DistanceMatrix,
+                   distances: Sequence[float]) -> None:
+    '''Stores the snapshot of matrix, whose condensed distances are stored as distances'''
+    data = matrix.data
+    digest = snapshot_digest(data, distances, matrix.metric, matrix.axis, matrix.tolerance)
+    idprop_assign(id_, name, snapshot_encode(digest, data, matrix.nearest_raw))
+
+
+def snapshot_delete(id_: 'ID', name: str) -> None:
+    idprop_delete(id_, name)
+
+
+def snapshot_restore(id_: 'ID',
+                     name: str,
+                     distances: Optional[Sequence[float]],
+                     metric: str,
+                     axis: Optional[str],
+                     tolerance: float) -> Optional[DistanceMatrix]:
+    '''
+    Recreates the DistanceMatrix stored in the snapshot name of id_ if the snapshot matches the
+    condensed distances and distance settings, otherwise returns None.
+    '''
+    if distances is None:
+        return None
+
+    snapshot = snapshot_read(id_, name)
+    if snapshot is None:
+        return None
+
+    distances = idprop_view(distances)
+    count = len(snapshot.data)
+    if len(distances) != condensed_size(count):
+        return None
+
+    if snapshot.digest != snapshot_digest(snapshot.data, distances, metric, axis, tolerance):
+        return None
+
+    return DistanceMatrix.restore(snapshot.data,
+                                  squareform(distances, count),
+                                  snapshot.nearest,
+                                  metric,
+                                  axis,
+                                  tolerance)
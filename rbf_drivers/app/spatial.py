@@ -0,0 +1,450 @@
+from math import cos, inf, pi, sqrt
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+import numpy as np
+from .distance import as_samples, first_mismatch, input_distance_metric
+if TYPE_CHECKING:
+    from ..api.input import Input
+
+POSE_INDEX_METRICS = ('EUCLIDEAN', 'QUATERNION')
+
+#region Metrics
+#--------------------------------------------------------------------------------------------------
+# The index searches in Euclidean (chord) space. Quaternion distance is a monotonic function
+# of the chord between unit quaternions (taking the shorter of q and -q), so nearest
+# neighbours agree and distances only need converting at the boundary.
+
+def quaternion_to_chord(distance: float) -> float:
+    dot = sqrt(max((cos(pi * distance) + 1.0) * 0.5, 0.0))
+    return sqrt(max(2.0 - 2.0 * dot, 0.0))
+
+
+def chord_to_quaternion(chord: np.ndarray) -> np.ndarray:
+    dot = np.clip(1.0 - 0.5 * np.square(chord), -1.0, 1.0)
+    return np.arccos(np.clip(2.0 * np.square(dot) - 1.0, -1.0, 1.0)) / pi
+
+#endregion Metrics
+
+#region PoseIndex
+#--------------------------------------------------------------------------------------------------
+
+class _Node:
+    __slots__ = ("axis", "split", "left", "right", "parent", "slots", "rmax")
+
+    def __init__(self, parent: Optional['_Node']=None) -> None:
+        self.axis = -1
+        self.split = 0.0
+        self.left: Optional['_Node'] = None
+        self.right: Optional['_Node'] = None
+        self.parent = parent
+        # Sample slots held by a leaf (None for branches)
+        self.slots: Optional[List[int]] = []
+        # Largest nearest-neighbour distance within the subtree, used to prune reverse queries
+        self.rmax = -inf
+
+
+class PoseIndex:
+    '''
+    KD-tree over an (N, D) array of samples that maintains the distance from each sample to its
+    nearest non-coincident neighbour (i.e. the pose radius) without a dense distance matrix.
+
+    Inserting, deleting or editing a sample only re-queries the samples whose nearest
+    neighbour it was or becomes, so maintenance costs O(log N) per affected sample and a full
+    build O(N log N). Each edit returns a boolean mask flagging the samples whose radius may
+    have changed, matching DistanceMatrix. Supports the EUCLIDEAN and QUATERNION metrics.
+    '''
+
+    LEAF_SIZE = 16
+
+    def __init__(self,
+                 data: Optional[np.ndarray]=(),
+                 metric: Optional[str]='EUCLIDEAN',
+                 tolerance: Optional[float]=0.001) -> None:
+        self._tolerance = tolerance
+        self._stale = False
+        self._metric(metric)
+        self.reset(data)
+
+    @property
+    def data(self) -> np.ndarray:
+        '''The (N, D) samples in pose order (a copy)'''
+        return self._samples[self._order]
+
+    @property
+    def metric(self) -> str:
+        return self._metric_name
+
+    @property
+    def nearest(self) -> np.ndarray:
+        '''Distance from each sample to its nearest non-coincident sample or 0.0 where none'''
+        chord = self._nearest[self._order]
+        found = np.isfinite(chord)
+        result = np.zeros(len(chord), dtype=float)
+        result[found] = chord_to_quaternion(chord[found]) if self._symmetric else chord[found]
+        return result
+
+    @property
+    def tolerance(self) -> float:
+        return self._tolerance
+
+    @tolerance.setter
+    def tolerance(self, value: float) -> None:
+        if value != self._tolerance:
+            self._tolerance = value
+            self._stale = True
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _metric(self, metric: str) -> None:
+        if metric not in POSE_INDEX_METRICS:
+            raise ValueError((f'{self.__class__.__name__}: '
+                              f'Unsupported metric "{metric}" (expected one of {POSE_INDEX_METRICS})'))
+        self._metric_name = metric
+        self._symmetric = metric == 'QUATERNION'
+        tolerance = self._tolerance
+        self._chord_tolerance = quaternion_to_chord(tolerance) if self._symmetric else tolerance
+
+    def _embed(self, data: np.ndarray) -> np.ndarray:
+        if self._symmetric:
+            norms = np.linalg.norm(data, axis=-1, keepdims=True)
+            data = np.divide(data, norms, out=np.zeros_like(data), where=norms > 0.0)
+        return data
+
+    def _chords(self, slots: np.ndarray, point: np.ndarray) -> np.ndarray:
+        points = self._points[slots]
+        result = np.sqrt(np.square(points - point).sum(axis=1))
+        if self._symmetric:
+            np.minimum(result, np.sqrt(np.square(points + point).sum(axis=1)), out=result)
+        return result
+
+    def _queries(self, point: np.ndarray) -> Tuple[np.ndarray, ...]:
+        return (point, -point) if self._symmetric else (point,)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._nearest)
+        if size > capacity:
+            capacity = max(size, capacity * 2, 8)
+            count = self._slots
+            for name in ("_samples", "_points"):
+                array = getattr(self, name)
+                buffer = np.empty((capacity, array.shape[1]), dtype=float)
+                buffer[:count] = array[:count]
+                setattr(self, name, buffer)
+            nearest = np.full(capacity, inf, dtype=float)
+            nearest[:count] = self._nearest[:count]
+            neighbour = np.full(capacity, -1, dtype=int)
+            neighbour[:count] = self._neighbour[:count]
+            self._nearest = nearest
+            self._neighbour = neighbour
+            self._leaves.extend([None] * (capacity - len(self._leaves)))
+            self._dependents.extend(set() for _ in range(capacity - len(self._dependents)))
+
+    def _allocate(self, sample: np.ndarray) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            self._reserve(self._slots + 1)
+            slot = self._slots
+            self._slots += 1
+        self._samples[slot] = sample
+        self._points[slot] = self._embed(sample)
+        return slot
+
+    def _sample(self, sample: np.ndarray) -> np.ndarray:
+        sample = np.asarray(sample, dtype=float).reshape(-1)
+        if len(sample) != self._samples.shape[1]:
+            raise ValueError((f'{self.__class__.__name__}: '
+                              f'Expected sample of length {self._samples.shape[1]}, not {len(sample)}'))
+        return sample
+
+    def _index(self, index: int, limit: int) -> int:
+        if index < 0:
+            index += limit
+        if not 0 <= index < limit:
+            raise IndexError(f'{self.__class__.__name__}: index {index} out of range 0-{limit-1}')
+        return index
+
+    def _mask(self, slots: Set[int]) -> np.ndarray:
+        return np.isin(np.array(self._order, dtype=int), list(slots))
+
+    #region Tree
+
+    def _build(self, node: _Node, slots: np.ndarray) -> _Node:
+        points = self._points[slots]
+        if len(slots) > self.LEAF_SIZE and points.shape[1]:
+            spread = points.max(axis=0) - points.min(axis=0)
+            axis = int(np.argmax(spread))
+            if spread[axis] > 0.0:
+                values = points[:, axis]
+                split = float(np.median(values))
+                left = values < split
+                if not left.any():
+                    split = float(values[values > split].min())
+                    left = values < split
+                node.axis = axis
+                node.split = split
+                node.slots = None
+                node.left = self._build(_Node(node), slots[left])
+                node.right = self._build(_Node(node), slots[~left])
+                node.rmax = max(node.left.rmax, node.right.rmax)
+                return node
+        node.axis = -1
+        node.left = None
+        node.right = None
+        node.slots = slots.tolist()
+        for slot in node.slots:
+            self._leaves[slot] = node
+        node.rmax = float(self._nearest[slots].max()) if len(slots) else -inf
+        return node
+
+    def _rebuild(self) -> None:
+        self._root = self._build(_Node(), np.array(self._order, dtype=int))
+        self._removed = 0
+
+    def _refresh(self, node: _Node) -> None:
+        '''Recomputes rmax for node and propagates the change towards the root'''
+        self._refresh_all(node)
+        node = node.parent
+        while node is not None:
+            rmax = max(node.left.rmax, node.right.rmax)
+            if rmax == node.rmax:
+                break
+            node.rmax = rmax
+            node = node.parent
+
+    def _refresh_all(self, node: _Node) -> float:
+        if node.slots is None:
+            node.rmax = max(self._refresh_all(node.left), self._refresh_all(node.right))
+        else:
+            node.rmax = float(self._nearest[node.slots].max()) if node.slots else -inf
+        return node.rmax
+
+    def _attach(self, slot: int) -> _Node:
+        node = self._root
+        point = self._points[slot]
+        while node.slots is None:
+            node = node.left if point[node.axis] < node.split else node.right
+        node.slots.append(slot)
+        self._leaves[slot] = node
+        if len(node.slots) > 2 * self.LEAF_SIZE:
+            self._build(node, np.array(node.slots, dtype=int))
+        return node
+
+    def _detach(self, slot: int) -> _Node:
+        leaf = self._leaves[slot]
+        leaf.slots.remove(slot)
+        self._leaves[slot] = None
+        return leaf
+
+    def _search(self,
+                node: _Node,
+                query: np.ndarray,
+                point: np.ndarray,
+                exclude: int,
+                best: List) -> None:
+        if node.slots is not None:
+            if node.slots:
+                slots = np.array(node.slots, dtype=int)
+                chords = self._chords(slots, point)
+                chords[(chords <= self._chord_tolerance) | (slots == exclude)] = inf
+                index = int(np.argmin(chords))
+                if chords[index] < best[0]:
+                    best[0] = float(chords[index])
+                    best[1] = int(slots[index])
+            return
+        gap = query[node.axis] - node.split
+        near, far = (node.left, node.right) if gap < 0.0 else (node.right, node.left)
+        self._search(near, query, point, exclude, best)
+        if abs(gap) < best[0]:
+            self._search(far, query, point, exclude, best)
+
+    def _search_reverse(self,
+                        node: _Node,
+                        query: np.ndarray,
+                        point: np.ndarray,
+                        bound: float,
+                        found: Dict[int, float]) -> None:
+        if bound >= node.rmax:
+            return
+        if node.slots is not None:
+            if node.slots:
+                slots = np.array(node.slots, dtype=int)
+                chords = self._chords(slots, point)
+                hits = (chords > self._chord_tolerance) & (chords < self._nearest[slots])
+                for slot, chord in zip(slots[hits].tolist(), chords[hits].tolist()):
+                    found[slot] = chord
+            return
+        gap = query[node.axis] - node.split
+        near, far = (node.left, node.right) if gap < 0.0 else (node.right, node.left)
+        self._search_reverse(near, query, point, bound, found)
+        self._search_reverse(far, query, point, max(bound, abs(gap)), found)
+
+    def _query(self, point: np.ndarray, exclude: Optional[int]=-1) -> Tuple[float, int]:
+        '''Returns the chord distance to and slot of the nearest non-coincident sample'''
+        best = [inf, -1]
+        for query in self._queries(point):
+            self._search(self._root, query, point, exclude, best)
+        return best[0], best[1]
+
+    #endregion Tree
+
+    #region Bookkeeping
+
+    def _assign(self, slot: int, chord: float, neighbour: int) -> None:
+        previous = self._neighbour[slot]
+        if previous >= 0:
+            self._dependents[previous].discard(slot)
+        self._nearest[slot] = chord
+        self._neighbour[slot] = neighbour
+        if neighbour >= 0:
+            self._dependents[neighbour].add(slot)
+
+    def _add(self, slot: int) -> Set[int]:
+        '''Adds an allocated slot to the tree, returning the slots whose radius changed'''
+        point = self._points[slot]
+        found: Dict[int, float] = {}
+        for query in self._queries(point):
+            self._search_reverse(self._root, query, point, 0.0, found)
+        self._assign(slot, *self._query(point, slot))
+        nodes = set()
+        for other, chord in found.items():
+            self._assign(other, chord, slot)
+            nodes.add(self._leaves[other])
+        nodes.add(self._attach(slot))
+        for node in nodes:
+            self._refresh(node)
+        result = set(found)
+        result.add(slot)
+        return result
+
+    def _remove(self, slot: int) -> Set[int]:
+        '''Removes a slot from the tree, returning the slots whose radius changed'''
+        nodes = {self._detach(slot)}
+        dependents = set(self._dependents[slot])
+        self._assign(slot, inf, -1)
+        for other in dependents:
+            self._assign(other, *self._query(self._points[other], other))
+            nodes.add(self._leaves[other])
+        for node in nodes:
+            self._refresh(node)
+        return dependents
+
+    #endregion Bookkeeping
+
+    def reset(self, data: np.ndarray, metric: Optional[str]=None) -> np.ndarray:
+        '''Rebuilds the index from data, returning a mask with every sample flagged'''
+        self._stale = False
+        self._metric(metric or self._metric_name)
+        data = as_samples(data)
+        count = len(data)
+        self._samples = np.empty((0, data.shape[1]), dtype=float)
+        self._points = np.empty((0, data.shape[1]), dtype=float)
+        self._nearest = np.empty(0, dtype=float)
+        self._neighbour = np.empty(0, dtype=int)
+        self._leaves: List[Optional[_Node]] = []
+        self._dependents: List[Set[int]] = []
+        self._free: List[int] = []
+        self._slots = 0
+        self._reserve(count)
+        self._slots = count
+        self._samples[:count] = data
+        self._points[:count] = self._embed(data)
+        self._order = list(range(count))
+        self._rebuild()
+        for slot in self._order:
+            self._assign(slot, *self._query(self._points[slot], slot))
+        self._refresh_all(self._root)
+        return np.ones(count, dtype=bool)
+
+    def insert(self, index: int, sample: np.ndarray) -> np.ndarray:
+        '''Inserts a sample before index'''
+        sample = self._sample(sample)
+        index = self._index(index, len(self._order) + 1)
+        slot = self._allocate(sample)
+        self._order.insert(index, slot)
+        return self._mask(self._add(slot))
+
+    def append(self, sample: np.ndarray) -> np.ndarray:
+        '''Appends a sample'''
+        return self.insert(len(self._order), sample)
+
+    def delete(self, index: int) -> np.ndarray:
+        '''Deletes the sample at index, returning the mask for the remaining samples'''
+        index = self._index(index, len(self._order))
+        slot = self._order.pop(index)
+        changed = self._remove(slot)
+        self._free.append(slot)
+        self._removed += 1
+        if self._removed > max(len(self._order), self.LEAF_SIZE):
+            # Deleting never merges leaves, so rebalance once half the tree has been removed
+            self._rebuild()
+        return self._mask(changed)
+
+    def update(self, index: int, sample: np.ndarray) -> np.ndarray:
+        '''Replaces the sample at index'''
+        sample = self._sample(sample)
+        index = self._index(index, len(self._order))
+        slot = self._order[index]
+        changed = self._remove(slot)
+        self._samples[slot] = sample
+        self._points[slot] = self._embed(sample)
+        changed |= self._add(slot)
+        return self._mask(changed)
+
+    def sync(self, data: np.ndarray, metric: Optional[str]=None) -> np.ndarray:
+        '''
+        Brings the index in line with data, detecting a single insertion or deletion or a
+        small number of edited samples and falling back to a full rebuild otherwise.
+        '''
+        data = as_samples(data)
+
+        if (self._stale
+            or (metric is not None and metric != self._metric_name)
+            or data.shape[1] != self._samples.shape[1]):
+            return self.reset(data, metric)
+
+        count = len(self._order)
+        cache = self._samples[self._order]
+        delta = len(data) - count
+
+        if delta == 0:
+            rows = np.flatnonzero(np.any(cache != data, axis=1))
+            if len(rows) * 4 > count:
+                return self.reset(data)
+            mask = np.zeros(count, dtype=bool)
+            for index in rows:
+                mask |= self.update(index, data[index])
+            return mask
+
+        if delta == 1:
+            index = first_mismatch(cache, data[:count])
+            if np.array_equal(cache[index:], data[index+1:]):
+                return self.insert(index, data[index])
+
+        elif delta == -1:
+            index = first_mismatch(cache[:-1], data)
+            if np.array_equal(cache[index+1:], data[index:]):
+                return self.delete(index)
+
+        return self.reset(data)
+
+#endregion PoseIndex
+
+#region Utilities
+#--------------------------------------------------------------------------------------------------
+
+def input_pose_index_supported(input_: 'Input') -> bool:
+    '''True if the input's distance metric can be served by a PoseIndex'''
+    return input_distance_metric(input_)[0] in POSE_INDEX_METRICS
+
+
+def input_pose_index_enabled(input_: 'Input') -> bool:
+    '''
+    True if pose radii for the input are maintained by a PoseIndex rather than derived from the
+    dense distance matrix. Only the nearest-neighbour radius strategy is served by the index.
+    '''
+    return (input_.use_pose_index
+            and input_.radius_strategy == 'NEAREST'
+            and input_pose_index_supported(input_))
+
+#endregion Utilities
@@ -185,11 +185,11 @@ def resolve_input_mirror(input: 'Input') -> Tuple['RBFDriver', 'Input']:
 
 def resolve_output_channel_mirror(channel: 'OutputChannel') -> Tuple['RBFDriver', 'OutputChannel']:
 
-    output: 'Input' = owner_resolve(channel, ".channels")
+    output: 'Output' = owner_resolve(channel, ".channels")
     if not output.has_symmetry_target:
         raise SymmetryError(f'Symmetry target defined for {channel} but not for {output}')
 
-    m_driver, m_output = resolve_input_mirror(output)
+    m_driver, m_output = resolve_output_mirror(output)
 
     m_channel = m_output.channels.search(channel.symmetry_identifier)
     if m_channel is None:
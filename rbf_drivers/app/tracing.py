@@ -0,0 +1,137 @@
+'''
+Opt-in tracing of the event bus.
+
+While a tracer is active every handler and rebuild run by .events is timed and recorded with the
+event type, owner and nesting depth in a fixed size ring buffer. The records can be exported as
+Chrome trace JSON and opened in chrome://tracing or https://ui.perfetto.dev.
+'''
+
+from collections import deque
+from dataclasses import dataclass
+import json
+import os
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Number of records kept by default. Older records are dropped once the buffer is full.
+TRACE_CAPACITY = 100000
+
+
+@dataclass(frozen=True)
+class TraceRecord:
+    # Qualified name of the handler or rebuild callback
+    name: str
+    # Event class name, or "rebuild"
+    category: str
+    # Description of what the event is about
+    owner: str
+    # Seconds since the tracer started
+    start: float
+    duration: float
+    # Number of traced calls enclosing this one
+    depth: int
+    error: str = ""
+
+
+class Tracer:
+
+    def __init__(self, capacity: Optional[int]=TRACE_CAPACITY) -> None:
+        self.records: Deque[TraceRecord] = deque(maxlen=capacity)
+        self.count = 0
+        self.depth = 0
+        self.origin = time.perf_counter()
+
+    @property
+    def dropped(self) -> int:
+        return self.count - len(self.records)
+
+    def call(self,
+             name: str,
+             category: str,
+             owner: str,
+             callback: Callable[..., None],
+             *args: Any) -> None:
+        '''Calls callback(*args), recording its duration. Exceptions are recorded and re-raised.'''
+        depth = self.depth
+        error = ""
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            callback(*args)
+        except Exception as exception:
+            error = f'{exception.__class__.__name__}: {exception}'
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.depth = depth
+            self.count += 1
+            self.records.append(TraceRecord(name,
+                                            category,
+                                            owner,
+                                            start - self.origin,
+                                            duration,
+                                            depth,
+                                            error))
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        '''Returns the records in Chrome trace event format'''
+        events: List[Dict[str, Any]] = []
+        pid = os.getpid()
+        for record in self.records:
+            args = {"owner": record.owner, "depth": record.depth}
+            if record.error:
+                args["error"] = record.error
+            events.append({
+                "name": record.name,
+                "cat": record.category,
+                "ph": "X",
+                "ts": record.start * 1e6,
+                "dur": record.duration * 1e6,
+                "pid": pid,
+                "tid": 0,
+                "args": args,
+                })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped": self.dropped},
+            }
+
+
+_tracer: Optional[Tracer] = None
+# The most recently started tracer, kept after it stops so it can still be exported
+_latest: Optional[Tracer] = None
+
+
+def tracer() -> Optional[Tracer]:
+    '''The active tracer, or None if tracing is off'''
+    return _tracer
+
+
+def trace_start(capacity: Optional[int]=TRACE_CAPACITY) -> Tracer:
+    '''Starts tracing into a new ring buffer of capacity records, replacing any active tracer'''
+    global _tracer, _latest
+    _tracer = _latest = Tracer(capacity)
+    return _tracer
+
+
+def trace_stop() -> Optional[Tracer]:
+    '''Stops tracing and returns the tracer that was active, if any'''
+    global _tracer
+    result = _tracer
+    _tracer = None
+    return result
+
+
+def trace_export(filepath: str, source: Optional[Tracer]=None) -> int:
+    '''
+    Writes the records of source (by default the active or most recently stopped tracer) to
+    filepath as Chrome trace JSON and returns the number of records written.
+    '''
+    source = source or _latest
+    if source is None:
+        raise RuntimeError("No trace to export")
+    data = source.chrome_trace()
+    with open(filepath, "w") as file:
+        json.dump(data, file)
+    return len(data["traceEvents"])
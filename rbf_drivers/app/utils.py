@@ -1,6 +1,7 @@
 
 from itertools import product
 from functools import partial
+from keyword import iskeyword
 from math import cos, sin
 from operator import attrgetter
 from string import ascii_letters
@@ -8,6 +9,10 @@ from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, Seque
 from mathutils import Euler, Quaternion, Vector
 from bpy.types import PoseBone, PropertyGroup
 from idprop.types import IDPropertyArray
+import numpy as np
+from .frame_cache import frame_cache, frame_key
+from .idprop import idprop_gather, idprop_scatter
+from .owners import owner_resolve
 if TYPE_CHECKING:
     from mathutils import Matrix
     from bpy.types import (
@@ -20,16 +25,11 @@ if TYPE_CHECKING:
         Object,
         UILayout
         )
-    from ..api.mixins import IDPropertyController
+    from ..api.mixins import IDPropertyController, Identifiable
     from ..api.pose_interpolation import CurvePointInterface
     from ..api.preferences import RBFDriverPreferences
 
 
-def owner_resolve(data: PropertyGroup, token: str) -> PropertyGroup:
-    path: str = data.path_from_id()
-    return data.id_data.path_resolve(path.rpartition(token)[0])
-
-
 def name_unique(value: str,
                 names: Sequence[str],
                 separator: Optional[str]=".",
@@ -81,13 +81,15 @@ class DriverVariableNameGenerator:
         return self
 
     def __next__(self) -> str:
-        try:
-            name = next(self._names)
-        except StopIteration:
-            self._count += 1
-            self._names = product(self._chars, repeat=self._count)
-            name = next(self._names)
-        return name
+        while True:
+            try:
+                name = "".join(next(self._names))
+            except StopIteration:
+                self._count += 1
+                self._names = product(self._chars, repeat=self._count)
+                name = "".join(next(self._names))
+            if not iskeyword(name):
+                return name
 
 
 def driver_variables_ensure(variables: 'ChannelDriverVariables', count: int) -> 'ChannelDriverVariables':
@@ -512,24 +514,23 @@ def keyframe_points_assign(points: 'FCurveKeyframePoints',
 
 class MetaFrame(type):
 
-    def __call__(cls, owner: Identifiable):
-        cache = cls._cache
-        if cache is None:
-            cache = cls._cache = {}
-        key = owner.identifier
-        dataframe: Optional[DataFrame] = cache.get(key)
-        if dataframe:
+    def __call__(cls, owner: 'Identifiable'):
+        key = frame_key(cls, owner)
+        dataframe: Optional[DataFrame] = frame_cache.get(key)
+        if dataframe is not None:
             dataframe._owner = owner
         else:
             dataframe: DataFrame = super(MetaFrame, cls).__call__(owner)
-            cache[key] = dataframe
+            frame_cache.put(key, dataframe)
         return dataframe
 
-Owner = TypeVar("Owner", bound=Identifiable)
+Owner = TypeVar("Owner", bound='Identifiable')
 
 class DataFrame(Generic[Owner], metaclass=MetaFrame):
-
-    _cache = None
+    '''
+    Derived data for an owner, shared by all callers for the same owner while it remains in
+    the bounded frame cache (see .frame_cache).
+    '''
 
     def __new__(cls, owner: Owner):
         dataframe = super().__new__(cls)
@@ -537,10 +538,8 @@ class DataFrame(Generic[Owner], metaclass=MetaFrame):
         return dataframe
 
     @classmethod
-    def delete(cls, owner: Identifiable) -> None:
-        try:
-            del cls._cache[owner.identifier]
-        except KeyError: pass
+    def delete(cls, owner: 'Identifiable') -> None:
+        frame_cache.discard_owner(cls, owner.identifier)
 
     @property
     def id(self) -> 'ID':
@@ -581,38 +580,48 @@ def idprop_path(obj: Union[np.ndarray, np.void]) -> str:
     return res
 
 
+def idprop_root(obj: Union[np.ndarray, np.void]) -> np.ndarray:
+    '''The array owning the memory of obj (obj itself if it is not a view or element)'''
+    root = obj
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    return root
+
+
 def idprop_read(id: 'ID', obj: Union[np.ndarray, np.void]) -> Optional[Union[float, List[float]]]:
     data = id.get(idprop_name(obj))
     if isinstance(data, IDPropertyArray):
-        n = len(data)
         if isinstance(obj, np.void):
             i = obj["index"]
-            return data[i] if i < n else obj["value"]
-        return [data[i] if i < n else v for i, v in obj.flat]
+            return data[i] if i < len(data) else obj["value"]
+        return idprop_gather(data, obj["index"].ravel(), obj["value"].ravel()).tolist()
 
 
 def idprop_isvalid(id_: 'ID', obj: Union[np.ndarray, np.void]) -> bool:
-    arr = obj.base or obj
     val = id_.get(idprop_name(obj))
-    return isinstance(val, IDPropertyArray) and len(val) == arr.size
+    return isinstance(val, IDPropertyArray) and len(val) == idprop_root(obj).size
 
 
 def idprop_ensure(id_: 'ID', obj: Union[np.ndarray, np.void]) -> None:
     if not idprop_isvalid(id_, obj):
-        idprop_update(id_, obj.base or obj)
+        idprop_update(id_, idprop_root(obj))
 
 
 def idprop_update(id_: 'ID', obj: Union[np.ndarray, np.void]) -> None:
-    arr = obj.base or obj
-    if arr is obj or not idprop_isvalid(id_, obj):
+    '''
+    Writes obj (a structured array, view or element) to its ID property. The property is only
+    recreated when its length no longer matches, otherwise values are written in place with
+    slice assignments over the contiguous index ranges of obj.
+    '''
+    arr = idprop_root(obj)
+    if not idprop_isvalid(id_, obj):
         id_[idprop_name(arr)] = arr["value"].flatten()
     else:
         val = id_[idprop_name(obj)]
         if isinstance(obj, np.void):
             val[obj["index"]] = obj["value"]
         else:
-            for x in obj.flat:
-                val[x["index"]] = x["value"]
+            idprop_scatter(val, obj["index"], obj["value"])
 
 
 def idprop_reindex(data: np.ndarray) -> None:
@@ -18,7 +18,12 @@ from bpy.props import (BoolProperty,
                        IntVectorProperty,
                        PointerProperty,
                        StringProperty)
-from .. import utils_
+from ..app.distance import (CondensedDistanceMatrix,
+                            condense,
+                            condensed_count,
+                            distance_matrix)
+from ..app.radii import pose_radii
+from ..api.mixins import collection_foreach_get, collection_foreach_set
 from ..utils_ import resolve
 from .mixins import Observable, Identifiable
 if TYPE_CHECKING:
@@ -777,19 +782,6 @@ class InputVariables(Observable, PropertyGroup):
 #region InputDistanceMatrix
 #--------------------------------------------------------------------------------------------------
 
-def input_distance_value_get(distance: 'InputDistance') -> float:
-    return distance.get("value", 0.0)
-
-
-class InputDistance(PropertyGroup):
-
-    value: FloatProperty(
-        name="Value",
-        get=input_distance_value_get,
-        options=set()
-        )
-
-
 class InputDistanceMatrixRow:
 
     def __init__(self, matrix: 'InputDistanceMatrix', offset: int) -> None:
@@ -797,14 +789,7 @@ class InputDistanceMatrixRow:
         self._offset = offset
 
     def __iter__(self) -> Iterator[float]:
-        matrix = self._matrix
-        ncols = matrix.shape[1]
-        index = self._offset * ncols
-        limit = index + ncols
-        items = matrix.items__
-        while index < limit:
-            yield items[index].value
-            index += 1
+        return iter(self._matrix.condensed().row(self._offset).tolist())
 
     def __len__(self) -> int:
         return self._matrix.shape[1]
@@ -818,8 +803,7 @@ class InputDistanceMatrixRow:
         if isinstance(key, int):
             if key >= len(self):
                 raise IndexError()
-            index = self._offset * self._matrix.shape[1] + key
-            return self._matrix.items__[index]
+            return self._matrix[self._offset, key]
 
 
 class InputDistanceMatrixColumn(PropertyGroup):
@@ -833,21 +817,22 @@ class InputDistanceMatrixColumn(PropertyGroup):
 
 
 def input_distance_matrix_shape_get(matrix: 'InputDistanceMatrix') -> Tuple[int, int]:
-    return matrix.get("shape", (0, 0))
+    data = matrix.get("data")
+    if data is None:
+        return (0, 0)
+    count = condensed_count(len(data))
+    return (count, count)
 
 
 class InputDistanceMatrix(PropertyGroup):
+    # The matrix is stored in condensed form (the strict upper triangle, row by row) as a
+    # single float array ID property under "data". The diagonal is implied.
 
     index__: CollectionProperty(
         type=PropertyGroup,
         options={'HIDDEN'}
         )
 
-    items__: CollectionProperty(
-        type=InputDistance,
-        options={'HIDDEN'}
-        )
-
     shape: IntVectorProperty(
         name="Shape",
         size=2,
@@ -881,34 +866,22 @@ class InputDistanceMatrix(PropertyGroup):
                 raise IndexError()
             return InputDistanceMatrixRow(self, index)
         if isinstance(key, tuple):
-            row = key[0]
-            col = key[1]
-            if row < 0:
-                row = self.shape[0] + row
-            if 0 > row >= self.shape[0]:
-                raise IndexError()
-            if col < 0:
-                col = self.shape[1] + col
-            if 0 > col >= self.shape[1]:
-                raise IndexError()
-            index = row * self.shape[1] + col
-            return self.items__[index].value
+            return self.condensed()[key]
         raise TypeError()
 
+    def condensed(self) -> CondensedDistanceMatrix:
+        return CondensedDistanceMatrix(self.get("data", ()))
+
+    def to_array(self) -> np.ndarray:
+        return self.condensed().to_array() if "data" in self else np.empty((0, 0), dtype=float)
+
     def update(self) -> None:
         input_ = resolve(self, ".")
         values = [v.data.values(v.data.is_normalized) for v in input_.variables if v.enable]
         params = np.array(values, dtype=float).T
-        result = np.empty((len(params), len(params)), dtype=float)
-        metric = getattr(utils_, f'distance_{input_.distance_metric.lower()}')
+        result = distance_matrix(params, input_.distance_metric, input_.rotation_axis)
         matrix = input_.distance_matrix
-        for a, row in zip(params, result):
-            for i, b in enumerate(params):
-                row[i] = metric(a, b)
-        items = matrix.items__
-        items.clear()
-        for value in result.flat:
-            items.add()["value"] = value
+        matrix["data"] = condense(result)
         input_.notify_observers("distance_matrix", matrix)
         input_.pose_radii.update()
 
@@ -926,7 +899,7 @@ def input_radius_name_set(radius: 'InputPoseRadius', _) -> None:
 
 
 def input_radius_value_get(radius: 'InputPoseRadius') -> float:
-    return radius.get("value", 0.0)
+    return radius.value__internal__
 
 
 class InputPoseRadius(PropertyGroup):
@@ -946,6 +919,10 @@ class InputPoseRadius(PropertyGroup):
         options=set()
         )
 
+    value__internal__: FloatProperty(
+        options={'HIDDEN'}
+        )
+
 class InputPoseRadii(Identifiable, PropertyGroup):
 
     internal__: CollectionProperty(
@@ -985,14 +962,12 @@ class InputPoseRadii(Identifiable, PropertyGroup):
 
     def update(self) -> None:
         input_ = resolve(self, ".")
-        matrix = input_.distance_matrix
-        values = np.array(matrix.size, dtype=np.float)
-        matrix.items__.foreach_get("value", values)
-        values.shape = tuple(matrix.shape)
+        values = input_.distance_matrix.to_array()
         radii = self.internal__
-        for radius, row in zip(radii, np.ma.masked_values(values, 0.0, atol=0.001)):
-            row = row.compressed()
-            radius["value"] = 0.0 if len(row) == 0 else np.min(row)
+        data = collection_foreach_get(radii, "value__internal__")
+        count = min(len(data), len(values))
+        data[:count] = pose_radii(values)[:count]
+        collection_foreach_set(radii, "value__internal__", data)
         input_.notify_observers("pose_radii", input_.pose_radii)
 
 
@@ -4,11 +4,13 @@
 from collections import defaultdict
 from contextlib import contextmanager
 from functools import partial, wraps
+from itertools import chain
 from typing import (
     Any,
     Callable,
     DefaultDict,
     Dict,
+    Iterable,
     Iterator,
     List,
     Optional,
@@ -18,7 +20,9 @@ from typing import (
     TYPE_CHECKING,
     Union)
 from uuid import uuid4
+import bpy
 from bpy.app import timers
+from bpy.app.handlers import persistent
 from bpy.types import (
     Node,
     NodeCustomGroup,
@@ -110,81 +114,247 @@ def reevaluate(socket: 'RBFDriverNodeSocket') -> None:
                 reevaluate(socket)
 
 
+#region Topology
+#--------------------------------------------------------------------------------------------------
+# The edges and socket identifiers of each tree as of its last update are kept, with reroutes
+# spliced out, so that an update only re-initialises the edge references of the sockets whose
+# edges changed and of the nodes that were added or gained or lost sockets, invalidates the cache
+# downstream of them and evaluates the terminal nodes they reach. The first update of a
+# tree after registration, a file load or an undo step rebuilds everything.
+
+# (source node name, output identifier, target node name, input identifier)
+Edge = Tuple[str, str, str, str]
+
+# (cache key, input identifiers, output identifiers) of a node
+Shape = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+
+class Topology:
+
+    def __init__(self) -> None:
+        self.token = uuid4().hex
+        self.nodes: Dict[str, Shape] = {}
+        self.edges: Dict[Edge, None] = {}
+        # node name -> successor node name -> number of edges between them
+        self.successors: DefaultDict[str, Dict[str, int]] = defaultdict(dict)
+
+    def apply(self,
+              nodes: Dict[str, Shape],
+              edges: Dict[Edge, None]) -> Tuple[List[Edge], List[Edge], Set[str], Set[str]]:
+        '''
+        Replaces the nodes and edges, returning the edges added and removed, the names of the nodes
+        added or whose sockets changed and the cache keys of the nodes removed.
+        '''
+        prev = self.nodes
+        reshaped = {name for name, shape in nodes.items() if prev.get(name) != shape}
+        freed = {prev[name][0] for name in prev.keys() - nodes.keys()}
+        freed.difference_update(shape[0] for shape in nodes.values())
+        added = [edge for edge in edges if edge not in self.edges]
+        removed = [edge for edge in self.edges if edge not in edges]
+        for src, _, tgt, _ in removed:
+            succ = self.successors[src]
+            succ[tgt] -= 1
+            if not succ[tgt]:
+                del succ[tgt]
+        for src, _, tgt, _ in added:
+            succ = self.successors[src]
+            succ[tgt] = succ.get(tgt, 0) + 1
+        for name in prev.keys() - nodes.keys():
+            self.successors.pop(name, None)
+        self.nodes = nodes
+        self.edges = edges
+        return added, removed, reshaped, freed
+
+    def downstream(self, names: Iterable[str]) -> List[str]:
+        '''Returns names and the nodes reachable from them, sorted topologically where acyclic'''
+        succ = self.successors
+        reach = {name for name in names if name in self.nodes}
+        stack = list(reach)
+        while stack:
+            for name in succ.get(stack.pop(), ()):
+                if name not in reach:
+                    reach.add(name)
+                    stack.append(name)
+
+        poll = dict.fromkeys(reach, 0)
+        for name in reach:
+            for item in succ.get(name, ()):
+                poll[item] += 1
+
+        topo = [name for name in reach if poll[name] == 0]
+        for name in topo:
+            for item in succ.get(name, ()):
+                poll[item] -= 1
+                if poll[item] == 0:
+                    topo.append(item)
+
+        # nodes in cycles are never released by the sort
+        if len(topo) < len(reach):
+            topo.extend(name for name in reach if poll[name] > 0)
+        return topo
+
+
+_topologies: Dict[int, Topology] = {}
+
+
+def topology(tree: 'RBFDriverNodeTree') -> Optional[Topology]:
+    item = _topologies.get(tree.as_pointer())
+    if item is not None and tree.get("topology") == item.token:
+        return item
+
+
+def tree_edges(tree: 'RBFDriverNodeTree') -> Dict[Edge, None]:
+    '''Returns the edges of the valid, unmuted links of tree with reroutes spliced out'''
+    links = [x for x in tree.links if x.is_valid and not x.is_muted]
+
+    feeds: DefaultDict[str, List[Tuple[Node, NodeSocket]]] = defaultdict(list)
+    for link in links:
+        if isinstance(link.to_node, NodeReroute):
+            feeds[link.to_node.name].append((link.from_node, link.from_socket))
+
+    def sources(node: Node, sock: NodeSocket, seen: Set[str]) -> Iterator[Tuple[str, str]]:
+        if not isinstance(node, NodeReroute):
+            yield node.name, sock.identifier
+        elif node.name not in seen:
+            seen.add(node.name)
+            for item in feeds[node.name]:
+                yield from sources(*item, seen)
+
+    result = {}
+    for link in links:
+        tgtnode = link.to_node
+        if not isinstance(tgtnode, NodeReroute):
+            tgt = (tgtnode.name, link.to_socket.identifier)
+            for src in sources(link.from_node, link.from_socket, set()):
+                result[src + tgt] = None
+    return result
+
+
+def socket_resolve(nodes: Any, name: str, identifier: str, is_output: bool) -> Optional[NodeSocket]:
+    node = nodes.get(name)
+    if node:
+        return next((x for x in (node.outputs if is_output else node.inputs) if x.identifier == identifier), None)
+
+
+@persistent
+def _on_file_or_undo(*_) -> None:
+    _topologies.clear()
+
+
+TOPOLOGY_HANDLERS = (
+    ("load_post", _on_file_or_undo),
+    ("undo_post", _on_file_or_undo),
+    ("redo_post", _on_file_or_undo),
+    )
+
+
+def topology_register() -> None:
+    for name, handler in TOPOLOGY_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler not in handlers:
+            handlers.append(handler)
+
+
+def topology_unregister() -> None:
+    for name, handler in TOPOLOGY_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler in handlers:
+            handlers.remove(handler)
+    _topologies.clear()
+
+#endregion Topology
+
+
 def update(tree: 'RBFDriverNodeTree') -> None:
     tree["is_updating"] = False
 
     nodes = tree.nodes
-    graph = {
-        node: {
-            "node": node,
-            "poll": 0,
-            "deps": [],
-            "pred": {sock: list(sock.edge) for sock in node.inputs if isinstance(sock, RBFDriverNodeSocket)},
-            "incoming": defaultdict(list),
-            "outgoing": defaultdict(list),
-        } for node in nodes
+    shapes = {
+        node.name: (nodeid(node),
+                    tuple(sock.identifier for sock in node.inputs),
+                    tuple(sock.identifier for sock in node.outputs))
+        for node in nodes
     }
-
-    for link in tree.links:
-        if link.is_valid and not link.is_muted:
-            srcnode = link.from_node
-            srcsock = link.from_socket
-            srcitem = graph[srcnode]
-            tgtnode = link.to_node
-            tgtsock = link.to_socket
-            tgtitem = graph[tgtnode]
-            tgtitem["poll"] += 1
-            srcitem["deps"].append(tgtnode)
-            tgtitem["incoming"][tgtsock].append(srcsock)
-            srcitem["outgoing"][srcsock].append(tgtsock)
-
-    # topological sort
-    topo = [x for x in graph.values() if x["poll"] == 0]
-    for item in topo:
-        for node in item["deps"]:
-            item = graph[node]
-            poll = item["poll"] = item["poll"] - 1
-            if poll == 0:
-                topo.append(item)
-
-    # splice reroutes
-    i = len(topo)-1
-    while i >= 0:
-        item = topo[i]
-        node = item["node"]
-        if isinstance(node, NodeReroute):
-            del topo[i]
-            for sock, conn in item["incoming"]:
-                edge = graph[sock.node]["outgoing"]
-                edge[sock] = [x for x in edge[sock] if x.node != node] + conn
-        i -= 1
+    graph = tree_edges(tree)
+
+    topo = topology(tree)
+    full = topo is None
+    if full:
+        topo = _topologies[tree.as_pointer()] = Topology()
+        tree["topology"] = topo.token
+
+    # every node is reshaped on a full update
+    added, removed, reshaped, freed = topo.apply(shapes, graph)
+
+    inputs = {edge[2:] for edge in chain(added, removed)}
+    outputs = {edge[:2] for edge in chain(added, removed)}
+    for name in reshaped:
+        _, ins, outs = shapes[name]
+        inputs.update((name, id_) for id_ in ins)
+        outputs.update((name, id_) for id_ in outs)
+    dirty = {edge[2] for edge in chain(added, removed)} | reshaped
+
+    incoming = defaultdict(list)
+    outgoing = defaultdict(list)
+    for edge in graph:
+        src = edge[:2]
+        tgt = edge[2:]
+        if tgt in inputs:
+            incoming[tgt].append(src)
+        if src in outputs:
+            outgoing[src].append(tgt)
 
     # update socket edges
-    for item in topo:
-        node = item["node"]
-        revalidate = False
-        for sock in node.inputs:
-            if isinstance(sock, RBFDriverNodeSocket):
-                edge = sock.edge
-                prev = item["pred"]
-                curr = item["incoming"][sock]
-                edge.init(curr)
-                if curr != prev:
-                    revalidate = True
-                    if curr:
-                        sock.validate(curr[0])
-                    else:
-                        sock.error = ""
-        # Could be NodeGroupInput | NodeGroupOutput
-        if revalidate and isinstance(node, RBFDriverNode):
+    changed = []
+    revalidate = set(reshaped)
+    for name, id_ in inputs:
+        sock = socket_resolve(nodes, name, id_, False)
+        if isinstance(sock, RBFDriverNodeSocket):
+            edge = sock.edge
+            pred = list(edge)
+            curr = list(filter(None, (socket_resolve(nodes, *x, True) for x in incoming[(name, id_)])))
+            edge.init(curr)
+            if curr != pred:
+                changed.append((nodes[name], sock))
+                revalidate.add(name)
+                if curr:
+                    sock.validate(curr[0])
+                else:
+                    sock.error = ""
+
+    for name, id_ in outputs:
+        sock = socket_resolve(nodes, name, id_, True)
+        if isinstance(sock, RBFDriverNodeSocket):
+            curr = list(filter(None, (socket_resolve(nodes, *x, False) for x in outgoing[(name, id_)])))
+            sock.edge.init(curr)
+
+    # invalidate cache
+    if full:
+        tree.cache.clear()
+    else:
+        for key in freed:
+            tree.cache.pop(key, None)
+        for name in reshaped:
+            node = nodes[name]
+            tree.cache.pop(shapes[name][0], None)
+            for sock in node.outputs:
+                if isinstance(sock, RBFDriverNodeSocket):
+                    reevaluate(sock)
+        for node, sock in changed:
+            tree.cache[nodeid(node)][0].pop(sock.identifier, None)
+            if isinstance(node, RBFDriverNode):
+                node.input_update(sock)
+            reevaluate(sock)
+
+    # Could be NodeGroupInput | NodeGroupOutput
+    for name in revalidate:
+        node = nodes[name]
+        if isinstance(node, RBFDriverNode):
             node.validate()
-        for sock in node.outputs:
-            if isinstance(sock, RBFDriverNodeSocket):
-                sock.edge.init(item["outgoing"][sock])
 
     # evaluate tree
-    tree.cache.clear()
-    for node in nodes:
+    for name in topo.downstream(dirty):
+        node = nodes.get(name)
         if isinstance(node, RBFDriverNode) and not len(node.outputs):
             node.evaluate()
 
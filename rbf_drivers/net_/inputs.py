@@ -1,6 +1,6 @@
 
 from typing import Callable, Optional, Sequence, Set, Tuple, Union, TYPE_CHECKING
-from math import acos, asin, fabs, isclose, pi, sqrt
+from math import isclose
 from functools import partial
 from string import ascii_letters
 import numpy as np
@@ -13,6 +13,7 @@ from ..app.utils import (
     idprop_drivers,
     idprop_variables
     )
+from ..app import distance, radii
 from ..app.events import event_handler
 from ..api.input_targets import (
     InputTargetBoneTargetUpdateEvent,
@@ -33,6 +34,7 @@ from ..api.input import (
     InputBoneTargetUpdateEvent,
     InputDisposableEvent,
     InputObjectUpdateEvent,
+    InputRadiusStrategyUpdateEvent,
     InputRotationAxisUpdateEvent,
     InputRotationModeUpdateEvent,
     InputTransformSpaceUpdateEvent
@@ -85,75 +87,35 @@ class pose_data(DataFrame['Input']):
 
 class distance_matrix(DataFrame['Input']):
 
-    @staticmethod
-    def _euclidean(a: Sequence[float], b: Sequence[float]) -> float:
-        return sqrt(sum(pow(ai - bi, 2.0) for ai, bi in zip(a, b)))
-
-    @staticmethod
-    def _angle(a: Sequence[float], b: Sequence[float]) -> float:
-        return fabs(a[0]-b[0])/pi
-
-    @staticmethod
-    def _quaternion(a: Sequence[float], b: Sequence[float]) -> float:
-        return acos((2.0 * pow(min(max(sum(ai * bi for ai, bi in zip(a, b)), -1.0), 1.0), 2.0)) - 1.0) / pi
-
-    @staticmethod
-    def _direction(a: Sequence[float], b: Sequence[float], axis: str) -> float:
-        aw, ax, ay, az = a
-        bw, bx, by, bz = b
-        if axis == 'X':
-            a = (1.0 - 2.0 * (ay * ay + az * az), 2.0 * (ax * ay + aw * az), 2.0 * (ax * az - aw * ay))
-            b = (1.0 - 2.0 * (by * by + bz * bz), 2.0 * (bx * by + bw * bz), 2.0 * (bx * bz - bw * by))
-        elif axis == 'Y':
-            a = (2.0 * (ax * ay - aw * az), 1.0 - 2.0 * (ax * ax + az * az), 2.0 * (ay * az + aw * ax))
-            b = (2.0 * (bx * by - bw * bz), 1.0 - 2.0 * (bx * bx + bz * bz), 2.0 * (by * bz + bw * bx))
-        else:
-            a = (2.0 * (ax * az + aw * ay), 2.0 * (ay * az - aw * ax), 1.0 - 2.0 * (ax * ax + ay * ay))
-            b = (2.0 * (bx * bz + bw * by), 2.0 * (by * bz - bw * bx), 1.0 - 2.0 * (bx * bx + by * by))
-        return (asin((sum(ai * bi for ai, bi in zip(a, b)))) - -(pi / 2.0)) / pi
-
-    def _function(self) -> Callable[[Sequence[float], Sequence[float]], float]:
-        o = self.source
-        t = o.type
-        if t == 'ROTATION':
-            m = o.rotation_mode
-            if m == 'QUATERNION': return self._quaternion
-            if m == 'SWING'     : return partial(self._direction, axis=o.rotation_axis)
-            if m == 'TWIST'     : return self._angle
-        return self._euclidean
-
     def __init__(self, input: 'Input') -> None:
         src = pose_data(input).data["value"]
-        dfn = self._function()
-        out = np.array([dfn(a, b) for a in src for b in src], dtype=float)
-        self.data = out.reshape(src.shape[0], src.shape[0])
+        self.matrix = distance.DistanceMatrix(src, *distance.input_distance_metric(input))
+        self.mask = np.ones(len(src), dtype=bool)
+
+    @property
+    def data(self) -> np.ndarray:
+        return self.matrix.array
 
     def update(self, index: Optional[int]=None) -> None:
-        input = self.input
+        input = self.owner
+        src = pose_data(input).data["value"]
         if index is None:
-            self.__init__(input)
+            self.mask = self.matrix.sync(src, *distance.input_distance_metric(input))
         else:
-            src = pose_data(input).data["value"]
-            out = self.data
-            dfn = partial(self._function(), src[index])
-            out[index] = out.T[index] = list(map(dfn, src))
+            self.mask = self.matrix.update(index, src[index])
         pose_radii(input).update()
 
 
 class pose_radii(DataFrame['Input']):
 
     def __init__(self, input: 'Input') -> None:
-        src = np.ma.masked_values(distance_matrix(input).data, 0.0, atol=0.001)
-        out = np.empty(len(src), dtype=float)
-        for i, row in enumerate(src):
-            row = row.compressed()
-            out[i] = 0.0 if len(row) else np.min(row)
-        self.data = out
+        self.data = radii.input_pose_radii(input, distance_matrix(input).data)
 
     def update(self) -> None:
         input = self.source
 
-        src = distance_matrix(input).data
+        dst = distance_matrix(input)
+        src = dst.data
         out = self.data
         wgt = pose_weights(input)
         flg = {'FCURVE'}
@@ -162,11 +124,13 @@ class pose_radii(DataFrame['Input']):
             self.__init__(input)
             wgt.update(flags=flg)
         else:
-            src = np.ma.masked_values(src, 0.0, atol=0.001)
-            for i, (row, rad) in enumerate(zip(src, out)):
-                row = row.compressed()
-                val = 0.0 if len(row) == 0 else np.min(row)
-                if not isclose(val, rad, abs_tol=0.001):
+            if radii.radius_strategy_is_local(input.radius_strategy):
+                rows = np.flatnonzero(dst.mask)
+            else:
+                rows = np.arange(len(src))
+            values = radii.input_pose_radii(input, src, rows)
+            for i, val in zip(rows.tolist(), values.tolist()):
+                if not isclose(val, out[i], abs_tol=0.001):
                     out[i] = val
                     wgt.update(i, flg)
 
@@ -351,6 +315,13 @@ def on_input_rotation_mode_update(event: InputRotationModeUpdateEvent) -> None:
     pose_weights(input).update({'DRIVER'})
 
 
+@event_handler(InputRadiusStrategyUpdateEvent)
+def on_input_radius_strategy_update(event: InputRadiusStrategyUpdateEvent) -> None:
+    input = event.input
+    pose_radii(input).__init__(input)
+    pose_weights(input).update(flags={'FCURVE'})
+
+
 @event_handler(InputVariableIsEnabledUpdateEvent)
 def on_input_variable_is_enabled_update(event: InputVariableIsEnabledUpdateEvent) -> None:
     input = event.variable.input
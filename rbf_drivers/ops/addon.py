@@ -2,7 +2,8 @@
 from typing import Set, TYPE_CHECKING
 import logging
 from bpy.types import Operator
-from bpy.props import StringProperty
+from bpy.props import IntProperty, StringProperty
+from ..app.tracing import TRACE_CAPACITY, trace_export, trace_start, trace_stop, tracer
 from ..app.utils import update_filepath_check, update_script_read, update_preferences
 if TYPE_CHECKING:
     from bpy.types import Context, Event
@@ -307,3 +308,60 @@ class RBFDRIVERS_OT_addon_download_update(Operator):
 
         prefs = context.preferences.addons["rbf_drivers"].preferences
         prefs.update_progress = 0.0
+
+
+class RBFDRIVERS_OT_trace_toggle(Operator):
+    bl_idname = "rbf_driver.trace_toggle"
+    bl_label = "Toggle Event Tracing"
+    bl_description = "Start or stop recording the event handlers run by RBF drivers and their timings"
+    bl_options = {'INTERNAL'}
+
+    capacity: IntProperty(
+        name="Capacity",
+        description="Maximum number of records kept. Older records are dropped once exceeded",
+        min=1,
+        default=TRACE_CAPACITY,
+        options=set()
+        )
+
+    def execute(self, context: 'Context') -> Set[str]:
+        if tracer() is None:
+            trace_start(self.capacity)
+            self.report({'INFO'}, "Event tracing started")
+        else:
+            stopped = trace_stop()
+            self.report({'INFO'}, f'Event tracing stopped ({len(stopped.records)} records)')
+        return {'FINISHED'}
+
+
+class RBFDRIVERS_OT_trace_export(Operator):
+    bl_idname = "rbf_driver.trace_export"
+    bl_label = "Export Event Trace"
+    bl_description = "Save the recorded event trace as Chrome trace JSON (chrome://tracing or Perfetto)"
+    bl_options = {'INTERNAL'}
+
+    filepath: StringProperty(
+        name="File Path",
+        subtype='FILE_PATH',
+        default="rbf_drivers_trace.json",
+        options=set()
+        )
+
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+        )
+
+    def invoke(self, context: 'Context', event: 'Event') -> Set[str]:
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context: 'Context') -> Set[str]:
+        try:
+            count = trace_export(self.filepath)
+        except (RuntimeError, OSError) as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        log.info(f'Exported {count} trace records to "{self.filepath}"')
+        self.report({'INFO'}, f'Exported {count} trace records')
+        return {'FINISHED'}
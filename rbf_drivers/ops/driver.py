@@ -1,5 +1,6 @@
 
 from itertools import filterfalse
+from logging import getLogger
 from operator import attrgetter
 from typing import Iterator, List, Optional, Set, Tuple, Union, TYPE_CHECKING
 from bpy.types import Object, Operator, PropertyGroup
@@ -15,6 +16,7 @@ from ..api.input import (INPUT_ROTATION_AXIS_TABLE,
                          INPUT_ROTATION_MODE_TABLE,
                          INPUT_ROTATION_ORDER_TABLE)
 from ..api.driver import DRIVER_TYPE_TABLE
+from ..app.driver_check import drivers_check
 from ..app.name_manager import outputname
 from ..app.output_channel_driver_manager import outputs_activate_valid
 from ..app.pose_weight_driver_manager import pose_weight_drivers_update
@@ -26,6 +28,8 @@ if TYPE_CHECKING:
     from ..api.driver import RBFDriver
     from ..api.drivers import RBFDrivers
 
+log = getLogger("rbf_drivers")
+
 
 def new_type_items():
     items = []
@@ -174,6 +178,50 @@ class RBFDRIVERS_OT_make_generic(Operator):
         return {'FINISHED'}
 
 
+class RBFDRIVERS_OT_check_expressions(Operator):
+    bl_idname = "rbf_driver.check_expressions"
+    bl_label = "Check Expressions"
+    bl_description = "Report RBF driver expressions that Blender can not evaluate without Python"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    rewrite: BoolProperty(
+        name="Rewrite",
+        description="Rewrite non-simple expressions into equivalent simple forms where possible",
+        default=False,
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        object = context.object
+        return object is not None and object.is_property_set("rbf_drivers")
+
+    def execute(self, context: 'Context') -> Set[str]:
+        object = context.object
+        ids = [object, object.data]
+
+        for driver in object.rbf_drivers:
+            for output in driver.outputs:
+                for channel in output.channels:
+                    id = channel.id
+                    if id is not None and id not in ids:
+                        ids.append(id)
+
+        checks = drivers_check(ids, self.rewrite)
+        failed = [check for check in checks if not check.is_simple]
+        rewritten = sum(check.rewritten for check in checks)
+
+        for check in checks:
+            if check.is_simple:
+                log.debug(str(check))
+            else:
+                log.warning(str(check))
+
+        message = f'{len(checks)} driver(s) checked, {len(failed)} not simple, {rewritten} rewritten'
+        self.report({'WARNING'} if failed else {'INFO'}, message)
+        return {'FINISHED'}
+
+
 class RBFDRIVERS_OT_move_up(Operator):
 
     bl_idname = "rbf_driver.move_up"